@@ -1,3 +1,13 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Performance helpers shared by the projects in this repository (lib/perfkit).
+SHARED_LIB_DIR = Path(__file__).resolve().parents[2] / 'lib'
+if str(SHARED_LIB_DIR) not in sys.path:
+    sys.path.append(str(SHARED_LIB_DIR))
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -13,3 +23,72 @@ INSTALLED_APPS = [
     'api',
 ]
 
+REST_FRAMEWORK = {
+    # HTTP Basic: no session middleware here, and anonymous writes get a
+    # 401 with a WWW-Authenticate challenge instead of a 403.
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'perfkit.fast_serializers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# List endpoints read rows through compiled serializers where they can,
+# see lib/perfkit/fast_serializers.py.
+FAST_LIST_SERIALIZERS = True
+
+
+MIDDLEWARE = [
+    'perfkit.instrumentation.QueryInstrumentationMiddleware',
+]
+
+# Shared by every process on the host, without adding queries to requests.
+# Use Redis or memcached when serving from several hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'advanced_api_project_cache'),
+    },
+}
+
+# Conditional GETs keep per-table write stamps in this cache (see
+# lib/perfkit/conditional.py); it must be shared by every process.
+COLLECTION_VERSION_CACHE = 'default'
+
+# Query budgets per URL name or view class, see lib/perfkit/instrumentation.py.
+QUERY_BUDGETS = {
+    'book-list': 2,
+    'book-detail': 2,
+    'author-list': 3,
+    'author-detail': 3,  # version row, author, preview books
+}
+QUERY_BUDGETS_ENFORCE = False
+# Bearer token for Prometheus scrapes of /metrics/; empty allows staff users only.
+QUERY_METRICS_TOKEN = os.environ.get('QUERY_METRICS_TOKEN', '')
+
+# Per-request query metrics as JSON lines, see lib/perfkit/instrumentation.py.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'query_metrics': {
+            '()': 'perfkit.instrumentation.QueryMetricsFormatter',
+        },
+    },
+    'handlers': {
+        'query_metrics': {
+            'level': 'DEBUG',
+            'class': 'logging.StreamHandler',
+            'formatter': 'query_metrics',
+        },
+    },
+    'loggers': {
+        'perfkit.instrumentation': {
+            'handlers': ['query_metrics'],
+            'level': 'DEBUG',
+            'propagate': False,
+        },
+    },
+}
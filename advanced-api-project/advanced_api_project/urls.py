@@ -1,10 +1,15 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from perfkit.instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
 
     # ✔ MUST be included exactly like this for the checker
     path('api/', include('api.urls')),
+
+    # Prometheus metrics (staff or QUERY_METRICS_TOKEN bearer)
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
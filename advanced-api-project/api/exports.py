@@ -0,0 +1,225 @@
+"""
+Streaming exports of the catalog tables.
+
+``export_chunks`` reads a table with ``values_list(...).iterator()``,
+``EXPORT_CHUNK_SIZE`` rows at a time, and encodes each batch as soon as
+it is read. No model instances are built and nothing is collected, so
+memory stays flat whatever the table size. Three encodings:
+
+- ``csv``: a header line, then one line per row;
+- ``jsonl``: one JSON object per line;
+- ``columnar``: a compact binary layout, one block per batch with each
+  column stored contiguously (see ``write_columnar`` and
+  ``read_columnar``).
+
+``gzip_chunks`` compresses any of them on the fly. Both the
+``CatalogExportView`` endpoint and the ``export_catalog`` command are
+built on these.
+"""
+import csv
+import io
+import json
+import struct
+import sys
+import zlib
+from array import array
+
+from django.conf import settings
+from django.db import models
+
+from perfkit.fast_serializers import FastJSONRenderer
+from .models import Author, Book
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+# Table name -> (model, ((column name, lookup), ...)).
+EXPORT_TABLES = {
+    'books': (Book, (
+        ('id', 'id'),
+        ('title', 'title'),
+        ('publication_year', 'publication_year'),
+        ('author', 'author_id'),
+        ('author_name', 'author__name'),
+    )),
+    'authors': (Author, (
+        ('id', 'id'),
+        ('name', 'name'),
+    )),
+}
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'columnar')
+
+COLUMNAR_MAGIC = b'BCOL1\n'
+INT64 = 'int64'
+UTF8 = 'utf8'
+
+
+class ExportError(Exception):
+    pass
+
+
+def export_columns(table):
+    """``(model, names, lookups, types)`` for an export table."""
+    try:
+        model, columns = EXPORT_TABLES[table]
+    except KeyError:
+        raise ExportError(f'Unknown table {table!r}; choose from {", ".join(EXPORT_TABLES)}.')
+    names = [name for name, _ in columns]
+    lookups = [lookup for _, lookup in columns]
+    types = []
+    for lookup in lookups:
+        field = model._meta.get_field(lookup.split('__')[0])
+        if '__' in lookup:
+            field = field.related_model._meta.get_field(lookup.split('__')[1])
+        elif field.is_relation:
+            field = field.target_field
+        types.append(UTF8 if isinstance(field, models.CharField) else INT64)
+    return model, names, lookups, types
+
+
+def export_batches(table, chunk_size=None):
+    """``(names, types, batches)``: the table's rows as lists of tuples, in id order."""
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    model, names, lookups, types = export_columns(table)
+    rows = model.objects.order_by('id').values_list(*lookups).iterator(chunk_size=chunk_size)
+
+    def batches():
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    return names, types, batches()
+
+
+def write_csv(names, types, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only: the table is empty.
+        yield buffer.getvalue().encode()
+
+
+def write_jsonl(names, types, batches):
+    renderer = FastJSONRenderer()
+    for batch in batches:
+        yield b''.join(renderer.render(dict(zip(names, row))) + b'\n' for row in batch)
+
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def write_columnar(names, types, batches):
+    """
+    The columnar layout, all integers little-endian:
+
+    - ``COLUMNAR_MAGIC``, then a uint32 length and a JSON header
+      ``{"columns": [{"name": ..., "type": "int64" | "utf8"}, ...]}``;
+    - per batch, a uint32 row count, then for each column a uint32 byte
+      length and the column's data: int64 values, or for text, row count
+      + 1 uint32 offsets into the UTF-8 bytes that follow;
+    - a zero row count to end the stream.
+
+    The byte lengths let a reader skip the columns it does not need.
+    Columns cannot be NULL.
+    """
+    header = json.dumps({'columns': [{'name': n, 'type': t} for n, t in zip(names, types)]}).encode()
+    yield COLUMNAR_MAGIC + struct.pack('<I', len(header)) + header
+    for batch in batches:
+        parts = [struct.pack('<I', len(batch))]
+        for index, kind in enumerate(types):
+            column = [row[index] for row in batch]
+            if kind == INT64:
+                data = _little_endian(array('q', column))
+            else:
+                encoded = [value.encode() for value in column]
+                offsets = array('I', [0])
+                for value in encoded:
+                    offsets.append(offsets[-1] + len(value))
+                data = _little_endian(offsets) + b''.join(encoded)
+            parts.append(struct.pack('<I', len(data)))
+            parts.append(data)
+        yield b''.join(parts)
+    yield struct.pack('<I', 0)
+
+
+def read_columnar(stream, columns=None):
+    """
+    Read the columnar layout from a binary file object.
+
+    Yields one ``{name: [values]}`` dict per block, with only ``columns``
+    when given.
+    """
+    def read(size):
+        data = stream.read(size)
+        if len(data) != size:
+            raise ExportError('Truncated columnar stream.')
+        return data
+
+    if read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ExportError('Not a columnar export.')
+    header = json.loads(read(struct.unpack('<I', read(4))[0]))
+    while True:
+        count = struct.unpack('<I', read(4))[0]
+        if not count:
+            return
+        block = {}
+        for column in header['columns']:
+            data = read(struct.unpack('<I', read(4))[0])
+            if columns is not None and column['name'] not in columns:
+                continue
+            if column['type'] == INT64:
+                values = array('q')
+                values.frombytes(data)
+                if sys.byteorder == 'big':
+                    values.byteswap()
+                block[column['name']] = values.tolist()
+            else:
+                offsets = array('I')
+                offsets.frombytes(data[:4 * (count + 1)])
+                if sys.byteorder == 'big':
+                    offsets.byteswap()
+                text = data[4 * (count + 1):]
+                block[column['name']] = [
+                    text[offsets[i]:offsets[i + 1]].decode() for i in range(count)
+                ]
+        yield block
+
+
+WRITERS = {
+    'csv': write_csv,
+    'jsonl': write_jsonl,
+    'columnar': write_columnar,
+}
+
+
+def gzip_chunks(chunks, level=6):
+    """Compress a byte stream into gzip format as it goes."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(table, export_format, gzip=False, chunk_size=None):
+    """The encoded export of ``table`` as an iterator of bytes."""
+    if export_format not in WRITERS:
+        raise ExportError(f'Unknown format {export_format!r}; choose from {", ".join(WRITERS)}.')
+    names, types, batches = export_batches(table, chunk_size)
+    chunks = WRITERS[export_format](names, types, batches)
+    return gzip_chunks(chunks) if gzip else chunks
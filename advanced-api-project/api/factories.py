@@ -0,0 +1,103 @@
+"""
+Synthetic book corpus for benchmarks.
+
+Creates authors and books in batches with ``bulk_create``. Books per
+author follow a Zipf distribution, so a few prolific authors own large
+shelves. Publication years lean towards recent decades. Generated author
+names start with ``BENCH_PREFIX``, so ``clear()`` can remove a previous
+corpus; their books cascade.
+"""
+import itertools
+import random
+
+from perfkit.conditional import bump_collection
+
+from .models import Author, Book
+
+BENCH_PREFIX = 'Bench '
+BATCH_SIZE = 5000
+
+SCALES = {
+    'small': {'authors': 1000, 'books': 20000},
+    'medium': {'authors': 20000, 'books': 500000},
+    'large': {'authors': 100000, 'books': 3000000},
+    'huge': {'authors': 300000, 'books': 10000000},
+}
+
+WORDS = (
+    'river night garden empire shadow winter letters silent house city '
+    'stars memory ocean fire road glass kingdom summer storm secret '
+    'history stone forest daughter machine island mirror song light'
+).split()
+
+
+def zipf_cum_weights(n, alpha):
+    """Cumulative weights where item ``i`` has weight ``1 / (i + 1) ** alpha``."""
+    return list(itertools.accumulate(1 / (rank + 1) ** alpha for rank in range(n)))
+
+
+def _bulk(model, rows):
+    batch = []
+    written = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def create_authors(count, rng):
+    start = Author.objects.filter(name__startswith=BENCH_PREFIX).count()
+    _bulk(Author, (
+        Author(name=f'{BENCH_PREFIX}{rng.choice(WORDS).capitalize()} {start + n}')
+        for n in range(count)
+    ))
+    return list(
+        Author.objects.filter(name__startswith=BENCH_PREFIX)
+        .order_by('id').values_list('id', flat=True)[start:]
+    )
+
+
+def create_books(author_ids, count, rng, alpha=0.9, first_year=1900, last_year=2024):
+    cum_weights = zipf_cum_weights(len(author_ids), alpha)
+
+    def books():
+        for author_id in rng.choices(author_ids, cum_weights=cum_weights, k=count):
+            words = rng.randint(1, 4)
+            # Triangular with the mode at last_year: most books are recent.
+            year = min(int(rng.triangular(first_year, last_year + 1, last_year + 1)), last_year)
+            yield Book(
+                title=' '.join(rng.choice(WORDS) for _ in range(words)).title(),
+                publication_year=year,
+                author_id=author_id,
+            )
+
+    return _bulk(Book, books())
+
+
+def clear():
+    deleted, _ = Author.objects.filter(name__startswith=BENCH_PREFIX).delete()
+    bump_collection(Author)
+    bump_collection(Book)
+    return deleted
+
+
+def seed(scale='small', seed=0, log=None, **overrides):
+    """Generate authors and books; returns the counts used."""
+    params = dict(SCALES[scale], **{key: value for key, value in overrides.items() if value is not None})
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+
+    log(f"Creating {params['authors']} authors")
+    author_ids = create_authors(params['authors'], rng)
+    log(f"Creating {params['books']} books")
+    params['books'] = create_books(author_ids, params['books'], rng)
+    bump_collection(Author)
+    bump_collection(Book)
+    params.update(scale=scale, seed=seed)
+    return params
@@ -0,0 +1,99 @@
+import math
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from perfkit.benchmarks import run_suite, save_results
+from api import factories
+from api.management.commands.run_benchmarks import book_list_cases
+from api.models import Author, Book
+
+# Books per author when growing the corpus, as in the 'huge' scale.
+BOOKS_PER_AUTHOR = 33
+
+# A one-word title prefix matches a fixed share of the corpus, so this
+# case's cost follows the number of matches; it is reported, not checked.
+UNCHECKED_CASES = {'book-list-search'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Grow the benchmark corpus through increasing sizes (up to 10M books by '
+        'default), time the book list cases at each size and check that latency '
+        'grows sub-linearly with the table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+', default=[100000, 1000000, 10000000],
+            help='Book counts to measure at, ascending.'
+        )
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', nargs='+', help='Run only these cases.')
+        parser.add_argument(
+            '--max-exponent', type=float, default=0.3,
+            help='Fail when p50 grows faster than size ** this between the smallest and largest size.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help='Start from an empty corpus.')
+        parser.add_argument(
+            '--output',
+            default=str(Path(getattr(settings, 'BASE_DIR', Path.cwd())) / 'benchmarks' / 'results'),
+            help='Directory for the JSON results.'
+        )
+
+    def handle(self, *args, **options):
+        sizes = sorted(options['sizes'])
+        if options['clear']:
+            self.stdout.write(f'Deleted {factories.clear()} rows of earlier benchmark data.')
+        authors = Author.objects.filter(name__startswith=factories.BENCH_PREFIX)
+
+        runs = {}
+        for step, size in enumerate(sizes):
+            current = Book.objects.filter(author__in=authors).count()
+            if current < size:
+                missing = size - current
+                self.stdout.write(f'Growing corpus from {current} to {size} books')
+                factories.seed(
+                    seed=options['seed'] + step,
+                    authors=max(missing // BOOKS_PER_AUTHOR, 1),
+                    books=missing,
+                )
+            results = run_suite(
+                book_list_cases(authors),
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                only=options['only'],
+            )
+            runs[size] = {result['name']: result for result in results}
+            path = save_results(results, options['output'], {'books': size, 'authors': authors.count()})
+            self.stdout.write(f'{size} books: results written to {path}')
+
+        failures = self.report(runs, sizes, options['max_exponent'])
+        if failures:
+            raise CommandError(
+                f'{len(failures)} case(s) grew faster than size ** {options["max_exponent"]}: '
+                + ', '.join(failures)
+            )
+
+    def report(self, runs, sizes, max_exponent):
+        """Print p50 per size and the growth exponent; returns the failing cases."""
+        smallest, largest = sizes[0], sizes[-1]
+        self.stdout.write(f"{'case':<26}" + ''.join(f'{size:>12}' for size in sizes) + '    exponent')
+        failures = []
+        for name in runs[smallest]:
+            timings = [runs[size][name]['p50_ms'] for size in sizes]
+            exponent = (
+                math.log(max(timings[-1], 1e-3) / max(timings[0], 1e-3)) / math.log(largest / smallest)
+                if largest > smallest else 0.0
+            )
+            line = f'{name:<26}' + ''.join(f'{timing:>10}ms' for timing in timings) + f'{exponent:>12.2f}'
+            if name in UNCHECKED_CASES:
+                line += '  (not checked)'
+            elif exponent > max_exponent:
+                failures.append(name)
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+        return failures
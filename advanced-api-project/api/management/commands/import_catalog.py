@@ -0,0 +1,97 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ingest import (
+    IMPORT_CHUNK_SIZE, IMPORT_FORMATS, BookImporter, ErrorReport, import_format_for, open_text,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import books from a CSV or JSON lines file (optionally .gz). Progress is '
+        'checkpointed after every committed chunk, so an interrupted import resumes '
+        'where it stopped; rejected rows go to an error report.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', dest='import_format', choices=IMPORT_FORMATS,
+                            help='Defaults to the file extension.')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+                            help='Rows validated and inserted per transaction.')
+        parser.add_argument('--no-create-authors', action='store_true',
+                            help='Reject rows naming unknown authors instead of creating them.')
+        parser.add_argument('--checkpoint', help='Checkpoint file; defaults to <path>.checkpoint.json.')
+        parser.add_argument('--errors', help='Error report (CSV); defaults to <path>.errors.csv.')
+        parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        import_format = options['import_format'] or import_format_for(path)
+        if import_format is None:
+            raise CommandError('Cannot tell the format from the file name; pass --format.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint.json'
+        errors_path = options['errors'] or f'{path}.errors.csv'
+
+        checkpoint = self.load_checkpoint(checkpoint_path, path, options['restart'])
+        if checkpoint['rows']:
+            self.stdout.write(f"Resuming after row {checkpoint['rows']}.")
+        report = ErrorReport(errors_path, append=bool(checkpoint['rows']))
+        started = time.perf_counter()
+
+        def on_chunk(rows, imported, errors):
+            # The report is written first: a crash in between repeats errors, never loses them.
+            report.write(errors)
+            checkpoint['rows'] = rows
+            checkpoint['imported'] += imported
+            checkpoint['rejected'] += len({error.row for error in errors})
+            self.save_checkpoint(checkpoint_path, checkpoint)
+            self.stdout.write(f"Row {rows}: {checkpoint['imported']} imported, {checkpoint['rejected']} rejected")
+
+        importer = BookImporter(
+            chunk_size=options['chunk_size'],
+            start_row=checkpoint['rows'],
+            create_authors=not options['no_create_authors'],
+            on_chunk=on_chunk,
+        )
+        try:
+            with open(path, 'rb') as source:
+                result = importer.run(read_rows(open_text(source, path), import_format))
+        finally:
+            report.close()
+
+        elapsed = time.perf_counter() - started
+        processed = result.imported + result.rejected
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {result.imported} books ({result.authors_created} new authors), '
+            f'rejected {result.rejected} rows in {elapsed:.1f}s '
+            f'({processed / elapsed if elapsed else 0:.0f} rows/s).'
+        ))
+        if result.rejected or checkpoint['rejected']:
+            self.stdout.write(f'Rejected rows are listed in {errors_path}.')
+
+    def load_checkpoint(self, checkpoint_path, path, restart):
+        source = os.path.abspath(path)
+        fresh = {'source': source, 'rows': 0, 'imported': 0, 'rejected': 0}
+        if restart or not os.path.exists(checkpoint_path):
+            return fresh
+        with open(checkpoint_path) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        if checkpoint.get('source') != source:
+            raise CommandError(
+                f"{checkpoint_path} belongs to {checkpoint.get('source')}; pass --restart or --checkpoint."
+            )
+        return checkpoint
+
+    def save_checkpoint(self, checkpoint_path, checkpoint):
+        # Write then rename, so a crash never leaves half a checkpoint.
+        temporary = f'{checkpoint_path}.tmp'
+        with open(temporary, 'w') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(temporary, checkpoint_path)
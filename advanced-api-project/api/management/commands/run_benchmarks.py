@@ -0,0 +1,97 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.test import APIRequestFactory
+
+from perfkit.benchmarks import Case, compare_results, run_suite, save_results
+from api.factories import BENCH_PREFIX, WORDS
+from api.models import Author, Book
+from api.views import BookListView
+
+PAGE_SIZE = 50
+
+
+def book_list_cases(authors):
+    """Book list requests covering each advertised filter, search and ordering."""
+    factory = APIRequestFactory()
+    view = BookListView.as_view()
+    prolific = list(
+        authors.annotate(total=Count('books')).order_by('-total').values_list('pk', flat=True)[:20]
+    )
+    names = list(authors.order_by('id').values_list('name', flat=True)[:20])
+    years = list(range(1990, 2025))
+
+    def book_list(**params):
+        params.setdefault('page_size', PAGE_SIZE)
+        return lambda i: (factory.get('/api/books/', {
+            key: value(i) if callable(value) else value for key, value in params.items()
+        }), {})
+
+    return [
+        Case('book-list', view, book_list()),
+        Case('book-list-by-year', view, book_list(publication_year=lambda i: years[i % len(years)])),
+        Case('book-list-year-range', view, book_list(
+            publication_year__gte=lambda i: years[i % len(years)] - 5,
+            publication_year__lte=lambda i: years[i % len(years)],
+        )),
+        Case('book-list-by-author', view, book_list(author=lambda i: prolific[i % len(prolific)])),
+        Case('book-list-by-author-year', view, book_list(
+            author=lambda i: prolific[i % len(prolific)], ordering='-publication_year',
+        )),
+        # Title substring search scans the table; the prefix mode is the indexed path.
+        Case('book-list-search', view, book_list(
+            search=lambda i: WORDS[i % len(WORDS)], search_mode='prefix',
+        )),
+        Case('book-list-author-search', view, book_list(
+            search=lambda i: names[i % len(names)], search_mode='prefix',
+        )),
+        Case('book-list-ordered', view, book_list(ordering='-publication_year')),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the book list endpoint with its filters, search and ordering '
+        'against the seeded corpus and write p50/p95/p99 latencies and query '
+        'counts to a JSON file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', nargs='+', help='Run only these cases.')
+        parser.add_argument(
+            '--output',
+            default=str(Path(getattr(settings, 'BASE_DIR', Path.cwd())) / 'benchmarks' / 'results'),
+            help='Directory for the JSON results.'
+        )
+        parser.add_argument('--compare', help='Earlier results file to check for regressions.')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 growth (0.2 = 20%%).')
+
+    def handle(self, *args, **options):
+        authors = Author.objects.filter(name__startswith=BENCH_PREFIX)
+        if not authors.exists():
+            raise CommandError('No benchmark data found; run seed_benchmark_data first.')
+
+        results = run_suite(
+            book_list_cases(authors),
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            only=options['only'],
+            log=lambda result: self.stdout.write(
+                f"{result['name']:<24} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                f"p99={result['p99_ms']}ms queries={result['queries_median']}"
+            ),
+        )
+        dataset = {'authors': authors.count(), 'books': Book.objects.count()}
+        path = save_results(results, options['output'], dataset)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+        if options['compare']:
+            regressions = compare_results(options['compare'], results, options['tolerance'])
+            for line in regressions:
+                self.stdout.write(self.style.WARNING(f'Regression: {line}'))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}.')
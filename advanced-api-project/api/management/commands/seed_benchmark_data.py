@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api import factories
+
+
+class Command(BaseCommand):
+    help = 'Generate a synthetic corpus of authors and books for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(factories.SCALES), default='small')
+        parser.add_argument('--authors', type=int, help='Override the number of authors for the scale.')
+        parser.add_argument('--books', type=int)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated data first.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f'Deleted {factories.clear()} rows of earlier benchmark data.')
+
+        params = factories.seed(
+            scale=options['scale'],
+            seed=options['seed'],
+            log=self.stdout.write,
+            authors=options['authors'],
+            books=options['books'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded: ' + ', '.join(f'{key}={value}' for key, value in params.items())
+        ))
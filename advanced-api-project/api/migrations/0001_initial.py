@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:19
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Author',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+            ],
+            options={
+                'indexes': [models.Index(django.db.models.functions.text.Lower('name'), name='author_name_lower_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Book',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('publication_year', models.IntegerField()),
+                ('author', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='books', to='api.author')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['title'], name='book_title_idx'), models.Index(fields=['publication_year', 'title'], name='book_year_title_idx'), models.Index(fields=['author', 'title'], name='book_author_title_idx'), models.Index(fields=['author', 'publication_year'], name='book_author_year_idx'), models.Index(django.db.models.functions.text.Lower('title'), name='book_title_lower_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+"""
+PostgreSQL-only search indexes, kept out of Model.Meta so the migrations
+are the same on every database.
+
+Outside the C locale, PostgreSQL only uses ``text_pattern_ops`` indexes for
+``LIKE 'abc%'``, so the LOWER() prefix indexes from 0001 are rebuilt under
+the same names with that operator class. The trigram GIN indexes serve the
+``UPPER(col::text) LIKE`` that ``icontains`` generates when
+``BOOK_SEARCH_TRIGRAM`` is on; they need the ``pg_trgm`` extension.
+"""
+from django.db import migrations
+
+
+class PostgresRunSQL(migrations.RunSQL):
+    """``RunSQL`` that does nothing on other databases."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+def pattern_ops_index(table, column, name):
+    return PostgresRunSQL(
+        sql=[
+            f'DROP INDEX IF EXISTS "{name}"',
+            f'CREATE INDEX "{name}" ON "{table}" (LOWER("{column}") text_pattern_ops)',
+        ],
+        reverse_sql=[
+            f'DROP INDEX IF EXISTS "{name}"',
+            f'CREATE INDEX "{name}" ON "{table}" (LOWER("{column}"))',
+        ],
+    )
+
+
+def trigram_index(table, column, name):
+    return PostgresRunSQL(
+        sql=f'CREATE INDEX "{name}" ON "{table}" USING gin (UPPER("{column}"::text) gin_trgm_ops)',
+        reverse_sql=f'DROP INDEX IF EXISTS "{name}"',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        pattern_ops_index('api_author', 'name', 'author_name_lower_idx'),
+        pattern_ops_index('api_book', 'title', 'book_title_lower_idx'),
+        PostgresRunSQL(
+            sql='CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        trigram_index('api_author', 'name', 'author_name_trgm_idx'),
+        trigram_index('api_book', 'title', 'book_title_trgm_idx'),
+    ]
@@ -1,4 +1,17 @@
 from django.db import models
+from django.db.models.functions import Lower
+
+from perfkit.conditional import track_collection
+
+
+# Indexes declared here are the same on every database, so makemigrations
+# gives one schema. On PostgreSQL, api/migrations/0002_postgres_search_indexes
+# rebuilds the LOWER() indexes with text_pattern_ops and adds the trigram
+# indexes for BOOK_SEARCH_TRIGRAM (see api.search).
+def prefix_index(field, name):
+    """Index on LOWER(field) that serves ``LOWER(field) LIKE 'abc%'``."""
+    return models.Index(Lower(field), name=name)
+
 
 """
 Author Model
@@ -6,10 +19,16 @@ Author Model
 Represents a writer who can have multiple books.
 Only contains one field: name.
 The relationship: One Author → Many Books (via ForeignKey)
+Indexed on LOWER(name) for case-insensitive prefix search.
 """
 class Author(models.Model):
     name = models.CharField(max_length=255)
 
+    class Meta:
+        indexes = [
+            prefix_index('name', 'author_name_lower_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -23,21 +42,36 @@ Fields:
 - publication_year: year published
 - author: foreign key linking book to its author
 This establishes a one-to-many relationship.
+Indexes match the filters and orderings BookListView advertises:
+- title: exact title filter and the default ordering
+- (publication_year, title): year filters and ranges, ordering by year
+- (author, title) and (author, publication_year): one author's books in
+  either order
+- LOWER(title): case-insensitive prefix search
 """
 class Book(models.Model):
     title = models.CharField(max_length=255)
     publication_year = models.IntegerField()
-    author = models.ForeignKey(Author, related_name='books', on_delete=models.CASCADE)
+    # The (author, ...) indexes below cover author lookups; a separate one
+    # would only slow down inserts.
+    author = models.ForeignKey(Author, related_name='books', on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['title'], name='book_title_idx'),
+            models.Index(fields=['publication_year', 'title'], name='book_year_title_idx'),
+            models.Index(fields=['author', 'title'], name='book_author_title_idx'),
+            models.Index(fields=['author', 'publication_year'], name='book_author_year_idx'),
+            prefix_index('title', 'book_title_lower_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.publication_year})"
-class Author(models.Model):
-    name = models.CharField(max_length=100)
-    bio = models.TextField()
 
-class Book(models.Model):
-    title = models.CharField(max_length=200)
-    description = models.TextField()
-    publish_date = models.DateField()
-    author = models.ForeignKey(Author, on_delete=models.CASCADE)
 
+# Book and author views answer conditional GETs from write stamps (see
+# perfkit.conditional). Deletes are tracked too, so the admin, the shell
+# and the author -> books cascade all bump the stamps; Django loads the
+# deleted rows first to send post_delete.
+track_collection(Author)
+track_collection(Book)
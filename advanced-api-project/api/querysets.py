@@ -0,0 +1,39 @@
+"""
+Querysets for the author endpoints.
+
+Author lists show a preview of each author's shelf: the newest
+``AUTHOR_BOOKS_PREVIEW`` books, loaded for the whole page in one
+windowed prefetch query, plus a ``book_count`` annotation. The rest of a
+shelf is one link away on the book list (see ``AuthorSerializer``).
+Exports load every book instead, a chunk of authors at a time.
+"""
+from django.conf import settings
+from django.db.models import Count, Prefetch
+
+from .models import Author, Book
+
+AUTHOR_BOOKS_PREVIEW = getattr(settings, 'AUTHOR_BOOKS_PREVIEW', 5)
+
+# Newest first; the "more books" link asks the book list for the same order.
+BOOK_ORDERING = ('-publication_year', 'id')
+
+
+def author_queryset(preview=None):
+    """Authors with ``book_count`` and their newest books in ``books_preview``."""
+    preview = AUTHOR_BOOKS_PREVIEW if preview is None else preview
+    books = Book.objects.order_by(*BOOK_ORDERING)[:preview]
+    return (
+        Author.objects.annotate(book_count=Count('books'))
+        .prefetch_related(Prefetch('books', queryset=books, to_attr='books_preview'))
+        .order_by('name', 'id')
+    )
+
+
+def author_export_queryset():
+    """Authors with every book, for streaming exports."""
+    return (
+        Author.objects.prefetch_related(
+            Prefetch('books', queryset=Book.objects.order_by(*BOOK_ORDERING))
+        )
+        .order_by('id')
+    )
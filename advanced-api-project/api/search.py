@@ -0,0 +1,56 @@
+"""
+Search for the book list.
+
+``?search=`` matches the title anywhere, as DRF's ``SearchFilter`` does
+with ``icontains``, or the start of the author's name. Author names are
+matched as a case-insensitive prefix, ``LOWER(name) LIKE 'jane r%'``,
+which the ``Lower()`` index on Author serves (rebuilt with
+``text_pattern_ops`` on PostgreSQL by migration 0002).
+
+A substring match on the title cannot use a B-tree index. Clients that
+only need the start of the title send ``?search_mode=prefix`` and get the
+same index-backed prefix match on the title.
+
+With ``BOOK_SEARCH_TRIGRAM = True`` on PostgreSQL, the trigram GIN
+indexes (also from migration 0002, with ``pg_trgm``) serve substring
+matches instead, and the filter keeps DRF's ``icontains`` behaviour.
+"""
+from django.conf import settings
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
+from rest_framework import filters
+
+from .models import Author
+
+BOOK_SEARCH_TRIGRAM = getattr(settings, 'BOOK_SEARCH_TRIGRAM', False)
+
+SEARCH_MODE_PARAM = 'search_mode'
+PREFIX_MODE = 'prefix'
+
+
+def prefix_q(field, prefix):
+    """``Q`` on alias ``field`` (a ``Lower()`` column) for values starting with ``prefix``."""
+    return Q(**{f'{field}__startswith': Lower(Value(prefix))})
+
+
+class BookSearchFilter(filters.SearchFilter):
+    search_description = (
+        'Part of the title or the beginning of the author name. '
+        'With search_mode=prefix, the beginning of the title.'
+    )
+
+    def filter_queryset(self, request, queryset, view):
+        if BOOK_SEARCH_TRIGRAM:
+            return super().filter_queryset(request, queryset, view)
+        search = ' '.join(self.get_search_terms(request))
+        if not search:
+            return queryset
+        authors = Author.objects.alias(name_lower=Lower('name')).filter(
+            prefix_q('name_lower', search)
+        )
+        if request.query_params.get(SEARCH_MODE_PARAM) == PREFIX_MODE:
+            queryset = queryset.alias(title_lower=Lower('title'))
+            title = prefix_q('title_lower', search)
+        else:
+            title = Q(title__icontains=search)
+        return queryset.filter(title | Q(author__in=authors.values('pk')))
@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from django.urls import reverse
 from datetime import datetime
+from urllib.parse import urlencode
+
+from perfkit.sparse_fields import SparseFieldsetMixin
 from .models import Author, Book
 
 """
@@ -7,8 +11,9 @@ BookSerializer
 --------------
 Serializes all fields from Book model.
 Includes custom validation to ensure the publication year is not in the future.
+Supports sparse fieldsets; ?expand=author nests the author's id and name.
 """
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     # Custom validation (publication year must NOT be in the future)
     def validate_publication_year(self, value):
@@ -20,6 +25,9 @@ class BookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = ['id', 'title', 'publication_year', 'author']
+        expandable_fields = {
+            'author': ('api.serializers.AuthorSerializer', {'fields': 'id,name'}),
+        }
 
 
 """
@@ -27,13 +35,40 @@ AuthorSerializer
 ----------------
 Serializes the author model with:
 - name field
-- nested list of books (using BookSerializer)
-Uses the related_name='books' from the Book model.
+- book_count, annotated by api.querysets.author_queryset
+- a bounded list of the author's newest books (using BookSerializer)
+- books_more: a link to the author's full shelf on the book list, or null
+  when every book is already listed
+Expects authors from author_queryset, which prefetches the books into
+books_preview in one query for the whole page.
+Sparse fieldsets reach the nested books too, e.g. ?fields=name,books.title.
 """
-class AuthorSerializer(serializers.ModelSerializer):
-    books = BookSerializer(many=True, read_only=True)  # Nested serializer
+class AuthorSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    books = BookSerializer(many=True, read_only=True, source='books_preview')  # Nested serializer
+    book_count = serializers.IntegerField(read_only=True)
+    books_more = serializers.SerializerMethodField()
 
     class Meta:
         model = Author
-        fields = ['id', 'name', 'books']
+        fields = ['id', 'name', 'book_count', 'books', 'books_more']
+
+    def get_books_more(self, author):
+        shown = len(getattr(author, 'books_preview', ()))
+        if author.book_count <= shown:
+            return None
+        url = reverse('book-list') + '?' + urlencode({'author': author.pk, 'ordering': '-publication_year'})
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
 
+"""
+AuthorExportSerializer
+----------------------
+An author with every book, for streaming exports
+(see api.querysets.author_export_queryset).
+"""
+class AuthorExportSerializer(AuthorSerializer):
+    books = BookSerializer(many=True, read_only=True)
+
+    class Meta(AuthorSerializer.Meta):
+        fields = ['id', 'name', 'books']
@@ -1,12 +1,35 @@
+import base64
+import csv
+import gc
+import gzip
+import io
+import json
+import weakref
+from decimal import Decimal
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth.models import User
 
+from perfkit.bulk_writes import BULK_MAX_BATCH_SIZE
+from perfkit.fast_serializers import (
+    CompiledCache, FastJSONRenderer, NotCompilable, compile_serializer,
+)
+from perfkit.instrumentation import QueryBudgetExceeded, QueryBudgetTestMixin
+from .exports import read_columnar
+from .ingest import import_books, insert_books
 from .models import Author, Book
+from .querysets import AUTHOR_BOOKS_PREVIEW
+from .serializers import BookSerializer
 
 
-class BookAPITests(APITestCase):
+class BookAPITests(QueryBudgetTestMixin, APITestCase):
 
     # ----------------------
     # Helper setup
@@ -28,6 +51,11 @@ class BookAPITests(APITestCase):
         self.list_url = reverse("book-list")
         self.detail_url = reverse("book-detail", args=[self.book.id])
 
+    def login(self, username="testuser", password="password123"):
+        """Send HTTP Basic credentials, the project's authentication scheme."""
+        token = base64.b64encode(f"{username}:{password}".encode()).decode()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Basic {token}")
+
     # ----------------------
     # Read Tests (No Auth Required)
     # ----------------------
@@ -56,7 +84,7 @@ class BookAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_create_book_authenticated(self):
-        self.client.login(username="testuser", password="password123")
+        self.login()
 
         data = {
             "title": "New Book",
@@ -77,7 +105,7 @@ class BookAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_update_book_authenticated(self):
-        self.client.login(username="testuser", password="password123")
+        self.login()
 
         data = {
             "title": "Updated Book",
@@ -97,7 +125,7 @@ class BookAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_delete_authenticated(self):
-        self.client.login(username="testuser", password="password123")
+        self.login()
 
         response = self.client.delete(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
@@ -124,6 +152,55 @@ class BookAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(len(response.data) >= 1)
 
+    def test_search_author_name_prefix(self):
+        other = Author.objects.create(name="Jane Roe")
+        Book.objects.create(title="Another Book", publication_year=2001, author=other)
+
+        response = self.client.get(self.list_url + "?search=jane r")
+        self.assertEqual([book["title"] for book in response.data], ["Another Book"])
+
+        response = self.client.get(self.list_url + "?search=Roe")
+        self.assertEqual(response.data, [])
+
+    def test_search_title_substring(self):
+        Book.objects.create(title="The Roe Deer", publication_year=2001, author=self.author)
+
+        response = self.client.get(self.list_url + "?search=roe d")
+        self.assertEqual([book["title"] for book in response.data], ["The Roe Deer"])
+
+        response = self.client.get(self.list_url + "?search=roe&search_mode=prefix")
+        self.assertEqual(response.data, [])
+
+        response = self.client.get(self.list_url + "?search=the r&search_mode=prefix")
+        self.assertEqual([book["title"] for book in response.data], ["The Roe Deer"])
+
+    def test_search_prefix_is_literal(self):
+        Book.objects.create(title="100% Done", publication_year=2001, author=self.author)
+        Book.objects.create(title="1000 Nights", publication_year=2001, author=self.author)
+
+        response = self.client.get(self.list_url + "?search=100%25&search_mode=prefix")
+        self.assertEqual([book["title"] for book in response.data], ["100% Done"])
+
+    def test_filter_publication_year_range(self):
+        for year in (1990, 2005, 2015):
+            Book.objects.create(title=f"Book {year}", publication_year=year, author=self.author)
+
+        response = self.client.get(
+            self.list_url + "?publication_year__gte=2000&publication_year__lte=2010&ordering=publication_year"
+        )
+        self.assertEqual([book["publication_year"] for book in response.data], [2005])
+
+    def test_cursor_pages(self):
+        for year in range(2000, 2005):
+            Book.objects.create(title=f"Book {year}", publication_year=year, author=self.author)
+
+        response = self.client.get(self.list_url + "?page_size=4")
+        self.assertEqual(len(response.data["results"]), 4)
+        response = self.client.get(response.data["next"])
+        self.assertEqual(
+            [book["title"] for book in response.data["results"]], ["Book 2004", "Test Book"]
+        )
+
     # ----------------------
     # Ordering Tests
     # ----------------------
@@ -131,3 +208,435 @@ class BookAPITests(APITestCase):
         response = self.client.get(self.list_url + "?ordering=title")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    # ----------------------
+    # Query Budget Tests
+    # ----------------------
+    def test_list_books_query_budget(self):
+        other = Author.objects.create(name="Jane Roe")
+        for year in range(2000, 2010):
+            Book.objects.create(title=f"Book {year}", publication_year=year, author=other)
+
+        with self.assertMaxQueries(2):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(QUERY_BUDGETS_ENFORCE=True)
+    def test_views_within_declared_budgets(self):
+        self.assertEqual(self.client.get(self.list_url).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_200_OK)
+
+    @override_settings(QUERY_BUDGETS_ENFORCE=True, QUERY_BUDGETS={"book-list": 0})
+    def test_over_budget_view_fails(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.list_url)
+
+    @override_settings(QUERY_BUDGETS_ENFORCE=True, QUERY_BUDGETS={"book-list": 0})
+    def test_budgets_apply_to_reads_only(self):
+        self.login()
+        response = self.client.post(
+            self.list_url, {"title": "New Book", "publication_year": 2023, "author": self.author.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    # ----------------------
+    # Sparse Fieldset Tests
+    # ----------------------
+    def test_sparse_fields(self):
+        response = self.client.get(self.list_url + "?fields=id,title")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data[0]), {"id", "title"})
+
+        response = self.client.get(self.list_url + "?exclude=author")
+        self.assertNotIn("author", response.data[0])
+
+    def test_expand_author(self):
+        with self.assertMaxQueries(1):
+            response = self.client.get(self.list_url + "?fields=title&expand=author")
+        self.assertEqual(
+            response.data[0],
+            {"title": "Test Book", "author": {"id": self.author.id, "name": "John Doe"}},
+        )
+
+
+class AuthorAPITests(QueryBudgetTestMixin, APITestCase):
+
+    def setUp(self):
+        self.prolific = Author.objects.create(name="Prolific Author")
+        for year in range(2000, 2000 + AUTHOR_BOOKS_PREVIEW + 3):
+            Book.objects.create(title=f"Book {year}", publication_year=year, author=self.prolific)
+        self.occasional = Author.objects.create(name="Occasional Author")
+        Book.objects.create(title="Only Book", publication_year=1999, author=self.occasional)
+        for index in range(10):
+            author = Author.objects.create(name=f"Author {index}")
+            Book.objects.create(title=f"Title {index}", publication_year=2001, author=author)
+
+    def test_list_is_bounded(self):
+        with self.assertMaxQueries(3):
+            response = self.client.get(reverse("author-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        authors = {author["name"]: author for author in response.data["results"]}
+
+        prolific = authors["Prolific Author"]
+        self.assertEqual(prolific["book_count"], AUTHOR_BOOKS_PREVIEW + 3)
+        self.assertEqual(len(prolific["books"]), AUTHOR_BOOKS_PREVIEW)
+        self.assertEqual(prolific["books"][0]["publication_year"], 2000 + AUTHOR_BOOKS_PREVIEW + 2)
+        self.assertIn(f"author={self.prolific.id}", prolific["books_more"])
+
+        occasional = authors["Occasional Author"]
+        self.assertEqual(occasional["book_count"], 1)
+        self.assertIsNone(occasional["books_more"])
+
+    def test_list_without_books_skips_prefetch(self):
+        with self.assertMaxQueries(2):
+            response = self.client.get(reverse("author-list") + "?fields=id,name,book_count")
+        self.assertEqual(set(response.data["results"][0]), {"id", "name", "book_count"})
+
+    def test_detail(self):
+        response = self.client.get(reverse("author-detail", args=[self.prolific.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["books"]), AUTHOR_BOOKS_PREVIEW)
+
+    def test_export_streams_every_book(self):
+        response = self.client.get(reverse("author-export"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        authors = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(len(authors), Author.objects.count())
+        prolific = next(author for author in authors if author["id"] == self.prolific.id)
+        self.assertEqual(len(prolific["books"]), AUTHOR_BOOKS_PREVIEW + 3)
+
+    def export(self, name, **params):
+        response = self.client.get(reverse("catalog-export", args=name.split(".")), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content)
+
+    def test_catalog_export_formats(self):
+        books = list(Book.objects.order_by("id").values_list("id", "title", "publication_year", "author_id"))
+
+        rows = list(csv.DictReader(io.StringIO(self.export("books.csv").decode())))
+        self.assertEqual(
+            [(int(r["id"]), r["title"], int(r["publication_year"]), int(r["author"])) for r in rows], books
+        )
+
+        lines = self.export("books.jsonl").splitlines()
+        self.assertEqual(json.loads(lines[0])["author_name"], "Prolific Author")
+        self.assertEqual(len(lines), len(books))
+
+        blocks = list(read_columnar(io.BytesIO(self.export("books.columnar"))))
+        self.assertEqual(sum((block["id"] for block in blocks), []), [book[0] for book in books])
+        self.assertEqual(sum((block["title"] for block in blocks), []), [book[1] for book in books])
+
+    def test_catalog_export_gzip(self):
+        data = gzip.decompress(self.export("authors.jsonl", gzip="1"))
+        self.assertEqual(len(data.splitlines()), Author.objects.count())
+
+    def test_catalog_export_unknown_table(self):
+        response = self.client.get(reverse("catalog-export", args=["users", "csv"]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+
+def fail_after(calls, func):
+    """Side effect running ``func`` ``calls`` times, then raising a DatabaseError."""
+    remaining = [calls]
+
+    def side_effect(*args):
+        if not remaining[0]:
+            raise DatabaseError("disk full")
+        remaining[0] -= 1
+        return func(*args)
+    return side_effect
+
+
+class BookImportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="importer", password="pass1234")
+        self.author = Author.objects.create(name="Known Author")
+
+    def test_import_resolves_and_creates_authors(self):
+        rows = (
+            "title,publication_year,author_name,author\n"
+            "First,2001,Known Author,\n"
+            "Second,2002,New Author,\n"
+            "Third,2003,New Author,\n"
+            f"Fourth,2004,,{self.author.id}\n"
+        )
+        result, errors = import_books(io.StringIO(rows), "csv", chunk_size=2)
+        self.assertEqual((result.imported, result.rejected, result.authors_created), (4, 0, 1))
+        self.assertEqual(Author.objects.filter(name="New Author").count(), 1)
+        self.assertEqual(self.author.books.count(), 2)
+
+    def test_import_reports_invalid_rows(self):
+        rows = "\n".join([
+            json.dumps({"title": "Good", "publication_year": 1999, "author": self.author.id}),
+            json.dumps({"title": "", "publication_year": 1999, "author": self.author.id}),
+            json.dumps({"title": "Future", "publication_year": 9999, "author_name": "Nobody"}),
+            json.dumps({"title": "Orphan", "publication_year": 1999, "author": 0}),
+            "not json",
+        ])
+        result, errors = import_books(io.StringIO(rows), "jsonl")
+        self.assertEqual((result.imported, result.rejected), (1, 4))
+        self.assertEqual([error.field for error in errors], ["title", "publication_year", "author", "row"])
+        # Rows that fail validation never create their authors.
+        self.assertFalse(Author.objects.filter(name="Nobody").exists())
+
+    def test_import_resumes_after_start_row(self):
+        rows = "title,publication_year,author\n" + "".join(
+            f"Book {index},2000,{self.author.id}\n" for index in range(5)
+        )
+        result, _ = import_books(io.StringIO(rows), "csv", start_row=3)
+        self.assertEqual((result.rows, result.imported), (5, 2))
+        self.assertEqual(sorted(Book.objects.values_list("title", flat=True)), ["Book 3", "Book 4"])
+
+    def test_import_endpoint(self):
+        upload = SimpleUploadedFile("books.csv", b"title,publication_year,author_name\nUploaded,2010,Known Author\n")
+        self.assertEqual(
+            self.client.post(reverse("book-import"), {"file": upload}).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        self.client.force_authenticate(self.user)
+        upload.seek(0)
+        response = self.client.post(reverse("book-import"), {"file": upload})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["imported"], 1)
+        self.assertTrue(self.author.books.filter(title="Uploaded").exists())
+
+    def test_import_endpoint_reports_committed_rows_on_failure(self):
+        content = "title,publication_year,author\n" + "".join(
+            f"Book {index},2000,{self.author.id}\n" for index in range(5)
+        )
+        self.client.force_authenticate(self.user)
+        with mock.patch("api.ingest.IMPORT_CHUNK_SIZE", 2), \
+                mock.patch("api.ingest.insert_books", side_effect=fail_after(1, insert_books)), \
+                self.assertLogs("api.views", "ERROR") as logs:
+            response = self.client.post(
+                reverse("book-import"), {"file": SimpleUploadedFile("books.csv", content.encode())}
+            )
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual((response.data["rows"], response.data["imported"]), (2, 2))
+        self.assertEqual(response.data["failed"], {
+            "message": "A database error stopped the import after 2 committed rows.",
+            "start_row": 2,
+        })
+        self.assertIn("disk full", logs.output[0])
+
+        response = self.client.post(
+            reverse("book-import") + "?start_row=2",
+            {"file": SimpleUploadedFile("books.csv", content.encode())},
+        )
+        self.assertEqual((response.data["rows"], response.data["imported"]), (5, 3))
+        self.assertEqual(self.author.books.count(), 5)
+
+    def test_import_endpoint_rejects_unreadable_files(self):
+        self.client.force_authenticate(self.user)
+        upload = SimpleUploadedFile("books.csv.gz", b"not gzip data")
+        response = self.client.post(reverse("book-import"), {"file": upload})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["rows"], 0)
+        self.assertIn("failed", response.data)
+
+
+class BookBulkWriteTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="bulk", password="pass1234")
+        self.client.force_authenticate(self.user)
+        self.author = Author.objects.create(name="Bulk Author")
+        self.books = [
+            Book.objects.create(title=f"Book {index}", publication_year=2000 + index, author=self.author)
+            for index in range(3)
+        ]
+        self.url = reverse("book-bulk")
+
+    def test_bulk_create(self):
+        items = [
+            {"title": f"New {index}", "publication_year": 2010, "author": self.author.id}
+            for index in range(5)
+        ]
+        with self.assertNumQueries(4):  # savepoint, author lookup, insert, release
+            response = self.client.post(reverse("book-list"), items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([r["status"] for r in response.data["results"]], [201] * 5)
+        self.assertEqual(Book.objects.filter(title__startswith="New").count(), 5)
+
+    def test_bulk_create_is_all_or_nothing(self):
+        items = [
+            {"title": "Valid", "publication_year": 2010, "author": self.author.id},
+            {"title": "Future", "publication_year": 9999, "author": self.author.id},
+            {"title": "Orphan", "publication_year": 2010, "author": 0},
+        ]
+        response = self.client.post(self.url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([r["status"] for r in response.data["results"]], [424, 400, 400])
+        self.assertIn("author", response.data["results"][2]["errors"])
+        self.assertFalse(Book.objects.filter(title="Valid").exists())
+
+    def test_bulk_partial_update(self):
+        items = [{"id": book.id, "title": f"Renamed {book.id}"} for book in self.books]
+        response = self.client.patch(self.url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for book in self.books:
+            book.refresh_from_db()
+            self.assertEqual(book.title, f"Renamed {book.id}")
+
+        response = self.client.patch(self.url, [{"id": self.books[0].id, "title": "X"}, {"id": 0}], format="json")
+        self.assertEqual([r["status"] for r in response.data["results"]], [424, 404])
+
+    def test_bulk_delete(self):
+        ids = [book.id for book in self.books[:2]]
+        response = self.client.delete(self.url, ids, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["status"] for r in response.data["results"]], [204, 204])
+        self.assertEqual(list(Book.objects.values_list("id", flat=True)), [self.books[2].id])
+
+    def test_batch_size_limit(self):
+        response = self.client.delete(self.url, list(range(1, BULK_MAX_BATCH_SIZE + 2)), format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalGetTests(APITestCase):
+    """ETag / Last-Modified validators are checked before anything is serialized."""
+
+    def setUp(self):
+        self.author = Author.objects.create(name="Cached Author")
+        self.book = Book.objects.create(title="Cached", publication_year=2001, author=self.author)
+        self.detail_url = reverse("book-detail", args=[self.book.id])
+
+    def test_unchanged_book_is_not_modified(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        with self.assertNumQueries(1):  # the version columns only
+            response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_writes_change_etags(self):
+        list_etag = self.client.get(reverse("book-list"))["ETag"]
+        detail_etag = self.client.get(self.detail_url)["ETag"]
+        self.assertEqual(
+            self.client.get(reverse("book-list"), HTTP_IF_NONE_MATCH=list_etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        # A separate client: ETags are per user.
+        writer = APIClient()
+        writer.force_authenticate(User.objects.create_user(username="etag", password="pass1234"))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = writer.patch(
+                reverse("book-bulk"), [{"id": self.book.id, "title": "Renamed"}], format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(reverse("book-list"), HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "Renamed")
+
+    def test_deletes_outside_the_api_change_etags(self):
+        list_etag = self.client.get(reverse("book-list"))["ETag"]
+        authors_etag = self.client.get(reverse("author-list"))["ETag"]
+        # As from the admin or a shell: the author's books go with it by cascade.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.delete()
+        response = self.client.get(reverse("book-list"), HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], list_etag)
+        self.assertEqual(response.data, [])
+        response = self.client.get(reverse("author-list"), HTTP_IF_NONE_MATCH=authors_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_process_local_cache_skips_stamps(self):
+        self.assertFalse(self.client.get(reverse("book-list")).has_header("ETag"))
+        response = self.client.get(self.detail_url)
+        self.assertFalse(response.has_header("Last-Modified"))
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        author_url = reverse("author-detail", args=[self.author.id])
+        self.assertFalse(self.client.get(author_url).has_header("ETag"))
+
+
+class FastSerializerParityTests(APITestCase):
+    """The compiled list path must render the same bytes as the regular serializers."""
+
+    def setUp(self):
+        self.list_url = reverse("book-list")
+        authors = [
+            Author.objects.create(name="John Doe"),
+            Author.objects.create(name='Zoë "Quoted" Ünïcode'),
+        ]
+        titles = ["Plain", "Line\u2028Separator", "Tab\tand\nnewline", "日本語", "", "Back\\slash"]
+        for index, title in enumerate(titles):
+            Book.objects.create(title=title, publication_year=1990 + index, author=authors[index % 2])
+
+    def assertSameBytes(self, query):
+        fast = self.client.get(self.list_url + query)
+        with override_settings(FAST_LIST_SERIALIZERS=False):
+            regular = self.client.get(self.list_url + query)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, regular.content, query)
+
+    def test_list_parity(self):
+        for query in [
+            "",
+            "?fields=id,title",
+            "?exclude=author",
+            "?ordering=-publication_year",
+            "?search=Zoë",
+            "?publication_year=1991",
+            "?expand=author",
+            "?fields=title&expand=author",
+        ]:
+            with self.subTest(query=query):
+                self.assertSameBytes(query)
+
+    def test_list_matches_json_renderer(self):
+        response = self.client.get(self.list_url)
+        expected = JSONRenderer().render(
+            BookSerializer(Book.objects.order_by("title"), many=True).data
+        )
+        self.assertEqual(response.content, expected)
+
+    def test_compiled_rows_match_serializer(self):
+        queryset = Book.objects.order_by("id")
+        compiled = compile_serializer(BookSerializer(), queryset)
+        self.assertEqual(
+            compiled(compiled.values(queryset)),
+            BookSerializer(queryset, many=True).data,
+        )
+
+    def test_nested_serializer_is_not_compiled(self):
+        with self.assertRaises(NotCompilable):
+            compile_serializer(BookSerializer(expand="author"), Book.objects.all())
+
+    def test_compiled_cache_is_bounded(self):
+        cache = CompiledCache(2)
+        with mock.patch("perfkit.fast_serializers.compiled_cache", cache):
+            for fields in ["id", "title", "id,title", "title,author"]:
+                compile_serializer(BookSerializer(fields=fields), Book.objects.all())
+        self.assertEqual(len(cache), 2)
+
+    def test_compiled_serializer_keeps_no_serializer_alive(self):
+        serializer = BookSerializer(context={"request": object()})
+        ref = weakref.ref(serializer)
+        compiled = compile_serializer(serializer, Book.objects.all())
+        del serializer
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertEqual(len(compiled(compiled.values(Book.objects.all()))), 6)
+
+    def test_renderer_parity(self):
+        data = {
+            "text": 'é "quoted" \\ \u2028\u2029 \x00\x1f 😀',
+            "numbers": [0, -1, 2 ** 62, 0.1, 1.5, Decimal("12.50")],
+            "flags": [True, False, None],
+            "nested": [{"a": []}, {}],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), JSONRenderer().render(None))
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
@@ -4,14 +4,26 @@ from .views import (
     BookDetailView,
     BookCreateView,
     BookUpdateView,
-    BookDeleteView
+    BookDeleteView,
+    BookBulkView,
+    AuthorListView,
+    AuthorDetailView,
+    AuthorExportView,
+    CatalogExportView,
+    BookImportView,
 )
 
 urlpatterns = [
     path('books/', BookListView.as_view(), name='book-list'),
     path('books/<int:pk>/', BookDetailView.as_view(), name='book-detail'),
+    path('books/bulk/', BookBulkView.as_view(), name='book-bulk'),
+    path('books/import/', BookImportView.as_view(), name='book-import'),
     path('books/create/', BookCreateView.as_view(), name='book-create'),
     path('books/<int:pk>/update/', BookUpdateView.as_view(), name='book-update'),
     path('books/<int:pk>/delete/', BookDeleteView.as_view(), name='book-delete'),
+    path('authors/', AuthorListView.as_view(), name='author-list'),
+    path('authors/export/', AuthorExportView.as_view(), name='author-export'),
+    path('authors/<int:pk>/', AuthorDetailView.as_view(), name='author-detail'),
+    path('export/<slug:table>.<slug:export_format>', CatalogExportView.as_view(), name='catalog-export'),
 ]
 
@@ -1,9 +1,10 @@
 # api/serializers.py
 
 from rest_framework import serializers
+from perfkit.sparse_fields import SparseFieldsetMixin
 from .models import Book
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = ['id', 'title', 'author']  # Include all fields from the Book model
@@ -0,0 +1,139 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from perfkit.bulk_writes import BULK_MAX_BATCH_SIZE
+
+from .models import Book
+from .serializers import BookSerializer
+
+
+class BookAPITests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="password123")
+        self.client.force_authenticate(self.user)
+        self.book = Book.objects.create(title="Dune", author="Frank Herbert")
+        self.list_url = reverse("book-list")
+        self.all_url = reverse("book_all-list")
+        self.detail_url = reverse("book_all-detail", args=[self.book.id])
+
+    def test_list_requires_auth(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_list_books(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [{"id": self.book.id, "title": "Dune", "author": "Frank Herbert"}])
+
+    # ----------------------
+    # Sparse Fieldset Tests
+    # ----------------------
+    def test_sparse_fields(self):
+        response = self.client.get(self.list_url + "?fields=id,title")
+        self.assertEqual(response.data, [{"id": self.book.id, "title": "Dune"}])
+
+        response = self.client.get(self.all_url + "?exclude=author")
+        self.assertEqual(response.data, [{"id": self.book.id, "title": "Dune"}])
+
+        response = self.client.get(self.detail_url + "?fields=author")
+        self.assertEqual(response.data, {"author": "Frank Herbert"})
+
+    def test_sparse_fields_narrow_the_query(self):
+        with self.assertNumQueries(1) as context:
+            self.client.get(self.list_url + "?fields=id,title")
+        self.assertNotIn('"author"', context.captured_queries[0]["sql"])
+
+    def test_writes_see_every_field(self):
+        response = self.client.patch(self.detail_url + "?fields=id", {"title": "Dune Messiah"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["author"], "Frank Herbert")
+
+    # ----------------------
+    # Compiled List Tests
+    # ----------------------
+    def test_list_skips_model_serialization(self):
+        with mock.patch.object(BookSerializer, "to_representation", side_effect=AssertionError):
+            for url in [self.list_url, self.all_url, self.list_url + "?fields=title"]:
+                with self.subTest(url=url):
+                    self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_compiled_list_matches_serializer(self):
+        Book.objects.create(title='Line\u2028"Quoted"', author="Zoë")
+        for url in [self.list_url, self.all_url, self.list_url + "?exclude=id"]:
+            with self.subTest(url=url):
+                fast = self.client.get(url)
+                with override_settings(FAST_LIST_SERIALIZERS=False):
+                    regular = self.client.get(url)
+                self.assertEqual(fast.content, regular.content)
+
+
+class BookBulkWriteTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="bulk", password="pass1234")
+        self.client.force_authenticate(self.user)
+        self.books = [Book.objects.create(title=f"Book {index}", author="Author") for index in range(3)]
+        self.url = reverse("book_all-bulk")
+
+    def statuses(self, response):
+        return [result["status"] for result in response.data["results"]]
+
+    def test_bulk_create(self):
+        items = [{"title": f"New {index}", "author": "Author"} for index in range(5)]
+        with self.assertNumQueries(3):  # savepoint, insert, release
+            response = self.client.post(reverse("book_all-list"), items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.statuses(response), [201] * 5)
+        self.assertEqual(Book.objects.filter(title__startswith="New").count(), 5)
+
+    def test_bulk_create_is_all_or_nothing(self):
+        items = [{"title": "Valid", "author": "Author"}, {"title": "", "author": "Author"}]
+        response = self.client.post(self.url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.statuses(response), [424, 400])
+        self.assertIn("title", response.data["results"][1]["errors"])
+        self.assertFalse(Book.objects.filter(title="Valid").exists())
+
+    def test_bulk_partial_update(self):
+        items = [{"id": book.id, "title": f"Renamed {book.id}"} for book in self.books]
+        response = self.client.patch(self.url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for book in self.books:
+            book.refresh_from_db()
+            self.assertEqual((book.title, book.author), (f"Renamed {book.id}", "Author"))
+
+    def test_bulk_partial_update_is_all_or_nothing(self):
+        items = [{"id": self.books[0].id, "title": "Renamed"}, {"id": 0, "title": "Missing"}]
+        response = self.client.patch(self.url, items, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.statuses(response), [424, 404])
+        self.books[0].refresh_from_db()
+        self.assertEqual(self.books[0].title, "Book 0")
+
+    def test_bulk_delete(self):
+        ids = [book.id for book in self.books[:2]]
+        response = self.client.delete(self.url, ids, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.statuses(response), [204, 204])
+        self.assertEqual(list(Book.objects.values_list("id", flat=True)), [self.books[2].id])
+
+    def test_bulk_delete_is_all_or_nothing(self):
+        response = self.client.delete(self.url, [self.books[0].id, "x"], format="json")
+        self.assertEqual(self.statuses(response), [424, 400])
+        self.assertEqual(Book.objects.count(), 3)
+
+    def test_bulk_requires_auth(self):
+        self.client.force_authenticate(None)
+        response = self.client.delete(self.url, [self.books[0].id], format="json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_batch_size_limit(self):
+        response = self.client.delete(self.url, list(range(1, BULK_MAX_BATCH_SIZE + 2)), format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
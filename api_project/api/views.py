@@ -1,22 +1,36 @@
 # api/views.py
 
 from rest_framework import generics, viewsets
+from rest_framework.decorators import action
+from perfkit.bulk_writes import BulkWriteMixin
+from perfkit.fast_serializers import FastListMixin
+from perfkit.sparse_fields import SparseFieldsetViewMixin
 from .models import Book
 from .serializers import BookSerializer
 
 # Keep the existing ListAPIView for backward compatibility
-class BookList(generics.ListAPIView):
+class BookList(SparseFieldsetViewMixin, FastListMixin, generics.ListAPIView):
     """
     API endpoint that allows books to be viewed (read-only).
+    Accepts ?fields= and ?exclude= to trim the response.
+    Rows are read with values_list() and serialized by a compiled serializer.
     """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
 
 # New ViewSet for full CRUD operations
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(SparseFieldsetViewMixin, FastListMixin, BulkWriteMixin, viewsets.ModelViewSet):
     """
     A ViewSet for viewing and editing Book instances.
     Provides all CRUD operations: list, create, retrieve, update, destroy.
+    Reads accept ?fields= and ?exclude= to trim the response.
+    create also takes a list of books, and books_all/bulk/ takes batches:
+    POST to create, PATCH partial updates with ids, DELETE a list of ids.
+    Each batch is validated as a whole and written in one transaction.
     """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        return self.bulk_write(request)
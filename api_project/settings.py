@@ -1,5 +1,13 @@
 # api_project/settings.py
 
+import sys
+from pathlib import Path
+
+# Performance helpers shared by the projects in this repository (lib/perfkit).
+SHARED_LIB_DIR = Path(__file__).resolve().parents[1] / 'lib'
+if str(SHARED_LIB_DIR) not in sys.path:
+    sys.path.append(str(SHARED_LIB_DIR))
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -21,4 +29,12 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',  # Default to require authentication
     ],
+    # orjson-backed JSON, byte-compatible with JSONRenderer (see lib/perfkit/fast_serializers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'perfkit.fast_serializers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
+
+# List endpoints read rows through compiled serializers where they can.
+FAST_LIST_SERIALIZERS = True
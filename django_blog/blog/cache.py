@@ -0,0 +1,326 @@
+"""
+Caching for the public blog pages.
+
+Cached entries are keyed by version stamps for the objects they show
+(``post:<pk>``, ``tag:<slug>`` and the global ``posts`` and ``tags``
+lists). The Post, Comment, Tag and Category signals in ``blog.models`` bump
+the matching stamps, so stale entries are never read again and simply
+expire. No key scanning or pattern deletes are needed.
+
+Stampede protection: each entry carries a soft expiry shorter than its cache
+timeout. The first reader past the soft expiry takes a short lock and
+recomputes while everyone else keeps serving the stale copy. On a cold miss,
+readers that lose the lock wait briefly for the winner before computing
+themselves.
+
+Stamps live in the ``BLOG_STAMP_CACHE`` cache (by default the page cache,
+``BLOG_CACHE_ALIAS``), which must be shared by every worker process. A
+per-process ``LocMemCache`` would only see the writes made in its own
+process, so with one the pages are neither cached nor given validators.
+
+Conditional GETs: pages send an ETag derived from the same key, so a
+browser or proxy revalidating with If-None-Match gets a 304 before the
+cache entry is even read. Signed-in users get their own ETag, covering
+their user id and session, and their pages are never shared. Last-Modified
+is the newest ``updated_at`` among the rows the page shows. It is read
+before the page is rendered, so it is never later than the content.
+Removals (deletes, unpublishing) can make it go back in time. Clients send
+If-None-Match with If-Modified-Since, and the ETag then takes precedence,
+so removals are still caught.
+
+A stamp starts at the current time in microseconds and counts up from
+there. If it is evicted, it is recreated from the clock, so it never
+returns to a value that old entries or ETags were keyed by.
+
+Hit/miss counts and timings per cache name are available from ``stats()``.
+"""
+import hashlib
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+CACHE_ALIAS = getattr(settings, 'BLOG_CACHE_ALIAS', 'default')
+STAMP_CACHE_ALIAS = getattr(settings, 'BLOG_STAMP_CACHE', CACHE_ALIAS)
+CACHE_TIMEOUT = getattr(settings, 'BLOG_CACHE_TIMEOUT', 300)
+SOFT_TTL = getattr(settings, 'BLOG_CACHE_SOFT_TTL', 60)
+LOCK_TIMEOUT = getattr(settings, 'BLOG_CACHE_LOCK_TIMEOUT', 10)
+LOCK_WAIT = getattr(settings, 'BLOG_CACHE_LOCK_WAIT', 0.5)
+KEY_PREFIX = 'blog'
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def get_stamp_cache():
+    return caches[STAMP_CACHE_ALIAS]
+
+
+def stamps_shared():
+    """Whether every process sees the same stamps (not a per-process LocMemCache)."""
+    return not isinstance(get_stamp_cache(), LocMemCache)
+
+
+# Version stamps
+
+def _version_key(kind, key=None):
+    return f'{KEY_PREFIX}:v:{kind}' if key is None else f'{KEY_PREFIX}:v:{kind}:{key}'
+
+
+def _initial_version():
+    return time.time_ns() // 1000
+
+
+def get_versions(stamps):
+    """Current version of each ``(kind, key)`` stamp, initialising missing ones."""
+    cache = get_stamp_cache()
+    keys = [_version_key(*stamp) for stamp in stamps]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            initial = _initial_version()
+            cache.add(key, initial, None)
+            found[key] = cache.get(key, initial)
+        versions.append(found[key])
+    return versions
+
+
+def bump(kind, key=None):
+    """Invalidate everything keyed by the ``(kind, key)`` stamp."""
+    cache = get_stamp_cache()
+    version_key = _version_key(kind, key)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        # Stamp not present yet; anything cached under it is unreachable anyway.
+        cache.set(version_key, _initial_version(), None)
+
+
+def invalidate_post(post):
+    bump('post', post.pk)
+    bump('posts')
+
+
+def invalidate_category(category):
+    """A renamed category shows up on every post filed under it."""
+    for post_id in category.posts.values_list('pk', flat=True):
+        bump('post', post_id)
+    bump('posts')
+
+
+def invalidate_tag(tag):
+    bump('tag', tag.slug)
+    bump('tags')
+
+
+# Metrics
+
+class CacheStats:
+    """Per-name hit/miss counters and timings for this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = defaultdict(lambda: {
+            'hits': 0, 'stale_hits': 0, 'misses': 0,
+            'hit_seconds': 0.0, 'miss_seconds': 0.0,
+        })
+
+    def record(self, name, outcome, seconds):
+        with self._lock:
+            entry = self._data[name]
+            entry[outcome] += 1
+            if outcome == 'misses':
+                entry['miss_seconds'] += seconds
+            else:
+                entry['hit_seconds'] += seconds
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for name, entry in self._data.items():
+                hits = entry['hits'] + entry['stale_hits']
+                total = hits + entry['misses']
+                result[name] = {
+                    'hits': entry['hits'],
+                    'stale_hits': entry['stale_hits'],
+                    'misses': entry['misses'],
+                    'hit_rate': hits / total if total else 0.0,
+                    'avg_hit_ms': 1000 * entry['hit_seconds'] / hits if hits else 0.0,
+                    'avg_miss_ms': 1000 * entry['miss_seconds'] / entry['misses'] if entry['misses'] else 0.0,
+                }
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+
+cache_stats = CacheStats()
+
+
+def stats():
+    return cache_stats.snapshot()
+
+
+# Lookup
+
+def make_key(name, stamps, *parts):
+    versions = get_versions(stamps)
+    stamp_part = '.'.join(
+        f'{kind}{"" if key is None else "-" + str(key)}={version}'
+        for (kind, key), version in zip(stamps, versions)
+    )
+    extra = ':'.join(str(part) for part in parts)
+    return f'{KEY_PREFIX}:{name}:{stamp_part}:{extra}'
+
+
+def etag_for(key):
+    return quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+
+
+def get_or_compute(name, stamps, compute, *parts, timeout=CACHE_TIMEOUT, soft_ttl=SOFT_TTL, key=None):
+    """
+    Return the cached value for ``name``/``parts`` under ``stamps``,
+    computing it with ``compute()`` when missing or past its soft expiry.
+
+    ``stamps`` is a list of ``(kind, key)`` pairs, e.g. ``[('post', 3)]``.
+    ``key`` skips rebuilding a key already made with ``make_key``.
+    """
+    cache = get_cache()
+    started = time.monotonic()
+    key = key or make_key(name, stamps, *parts)
+    lock_key = f'{key}:lock'
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() < fresh_until or not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            outcome = 'hits' if time.time() < fresh_until else 'stale_hits'
+            cache_stats.record(name, outcome, time.monotonic() - started)
+            return value
+    elif not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        # Someone else is computing this entry; give them a moment.
+        deadline = time.monotonic() + LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                cache_stats.record(name, 'hits', time.monotonic() - started)
+                return entry[0]
+
+    try:
+        value = compute()
+        cache.set(key, (value, time.time() + soft_ttl), timeout)
+    finally:
+        cache.delete(lock_key)
+    cache_stats.record(name, 'misses', time.monotonic() - started)
+    return value
+
+
+class PublicPageCacheMixin:
+    """
+    Cache the rendered HTML of a class-based view for anonymous GETs and
+    answer conditional GETs for every visitor.
+
+    Views define ``cache_name`` and ``get_cache_stamps()``; the request path
+    and query string are part of the key so every page number is separate.
+    Anonymous responses carry an ETag from that key, and a matching
+    If-None-Match is answered with a 304 without touching the cached page or
+    the database. Signed-in users are served fresh pages marked private,
+    with an ETag of their own. ``get_last_modified()`` gives Last-Modified,
+    by default the newest ``last_modified_field`` in ``get_queryset()``.
+    """
+    cache_name = None
+    last_modified_field = 'updated_at'
+
+    def get_cache_stamps(self):
+        return [('posts', None)]
+
+    def get_last_modified(self):
+        """The newest change among the rows this page shows, or None."""
+        if not self.last_modified_field:
+            return None
+        return self.get_queryset().aggregate(newest=Max(self.last_modified_field))['newest']
+
+    def on_cache_hit(self):
+        """Hook for side effects that must run even when the page is not rendered."""
+
+    def get(self, request, *args, **kwargs):
+        # Flash messages are shown once, so those pages are never cached or revalidated.
+        if len(get_messages(request)) or not stamps_shared():
+            return super().get(request, *args, **kwargs)
+
+        key = make_key(self.cache_name, self.get_cache_stamps(), request.get_full_path())
+        if request.user.is_authenticated:
+            return self.get_private(request, key, *args, **kwargs)
+
+        etag = etag_for(key)
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            self.on_cache_hit()
+            return self.conditional(not_modified, etag)
+
+        rendered = {}
+
+        def render_page():
+            last_modified = self.last_modified_timestamp()
+            response = super(PublicPageCacheMixin, self).get(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            rendered['response'] = response
+            if response.status_code != 200:
+                return None
+            return response.content, response.get('Content-Type'), last_modified
+
+        cached = get_or_compute(self.cache_name, None, render_page, key=key)
+        if 'response' in rendered:
+            response = rendered['response']
+            if response.status_code != 200:
+                return response
+            return self.conditional(response, etag, cached[2])
+        if cached is None:
+            return super().get(request, *args, **kwargs)
+        self.on_cache_hit()
+        content, content_type, last_modified = cached
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(content, content_type=content_type)
+        return self.conditional(response, etag, last_modified)
+
+    def get_private(self, request, key, *args, **kwargs):
+        """A signed-in user's page: never shared, validated by their own ETag."""
+        session_key = getattr(getattr(request, 'session', None), 'session_key', None)
+        # A new login starts a new session (and CSRF token), so old pages never revalidate.
+        etag = etag_for(f'{key}:user={request.user.pk}:session={session_key}')
+        last_modified = self.last_modified_timestamp()
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            self.on_cache_hit()
+        else:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        patch_cache_control(response, private=True)
+        return self.conditional(response, etag, last_modified)
+
+    def last_modified_timestamp(self):
+        newest = self.get_last_modified()
+        return None if newest is None else int(newest.timestamp())
+
+    def conditional(self, response, etag, last_modified=None):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Signed-in users get their own page under the same URL.
+        patch_vary_headers(response, ('Cookie',))
+        return response
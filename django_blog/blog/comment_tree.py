@@ -0,0 +1,83 @@
+"""
+Threaded comment loading for the post detail page.
+
+All approved comments of a post are fetched in one query with their
+authors joined, and the reply tree is assembled in memory. Each loaded
+comment caches its children, so ``Comment.get_replies()`` and
+``Comment.__str__`` no longer query per comment in templates.
+"""
+from collections import deque
+
+from .models import Comment
+
+
+class CommentTree:
+    """Approved comments of a post arranged as a reply tree."""
+
+    def __init__(self, roots, count, truncated):
+        self.roots = roots
+        # Number of approved comments on the post, as from .count().
+        self.count = count
+        # True when max_depth or max_nodes hid part of the thread.
+        self.truncated = truncated
+
+    def __iter__(self):
+        return iter(self.roots)
+
+    def __len__(self):
+        return len(self.roots)
+
+
+def load_comment_tree(post, max_depth=None, max_nodes=None):
+    """
+    Build the approved comment tree of ``post`` in a single query.
+
+    ``max_depth`` limits nesting (0 keeps only top-level comments) and
+    ``max_nodes`` caps the number of comments placed in the tree. Replies
+    of unapproved comments are not shown, matching ``get_replies()``.
+    """
+    comments = list(
+        Comment.objects.filter(post=post, is_approved=True)
+        .select_related('author')
+        .order_by('-created_at')
+    )
+
+    by_id = {}
+    children = {}
+    top_level = []
+    for comment in comments:
+        comment.post = post
+        comment._tree_replies = []
+        comment.depth = 0
+        by_id[comment.pk] = comment
+        if comment.parent_id is None:
+            top_level.append(comment)
+        else:
+            children.setdefault(comment.parent_id, []).append(comment)
+
+    # Breadth-first, so a node budget keeps whole upper levels of the thread.
+    roots = []
+    placed = 0
+    truncated = False
+    queue = deque(top_level)
+    while queue:
+        if max_nodes is not None and placed >= max_nodes:
+            truncated = True
+            break
+        comment = queue.popleft()
+        placed += 1
+        if comment.parent_id is None:
+            roots.append(comment)
+        else:
+            parent = by_id[comment.parent_id]
+            comment.depth = parent.depth + 1
+            comment.parent = parent
+            parent._tree_replies.append(comment)
+
+        replies = children.get(comment.pk, [])
+        if replies and max_depth is not None and comment.depth >= max_depth:
+            truncated = True
+            continue
+        queue.extend(replies)
+
+    return CommentTree(roots, count=len(comments), truncated=truncated)
@@ -0,0 +1,224 @@
+"""
+Synthetic blog corpus for benchmarks.
+
+Generates authors, categories, tags, published posts and threaded comments
+with batched ``bulk_create``, so no signals fire. Tag use and comment
+activity follow a Zipf distribution: a few tags and posts get most of the
+traffic. ``seed`` rebuilds the search index and the related-post table
+afterwards, as the signals would have done.
+
+Generated usernames start with ``BENCH_PREFIX`` and slugs with ``bench-``,
+so ``clear()`` can remove a previous corpus.
+"""
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from .models import Category, Comment, Post, Profile, Tag
+
+BENCH_PREFIX = 'bench_'
+BATCH_SIZE = 5000
+
+SCALES = {
+    'small': {'users': 200, 'tags': 100, 'categories': 10, 'posts': 5000, 'comments': 20000},
+    'medium': {'users': 2000, 'tags': 500, 'categories': 30, 'posts': 50000, 'comments': 300000},
+    'large': {'users': 10000, 'tags': 2000, 'categories': 50, 'posts': 500000, 'comments': 3000000},
+}
+
+WORDS = (
+    'django python template query index cache search ranking comment thread '
+    'tutorial release deploy database postgres sqlite signal model view form '
+    'testing performance profile design travel kitchen garden music weekend'
+).split()
+
+
+def zipf_cum_weights(n, alpha):
+    """Cumulative weights where item ``i`` has weight ``1 / (i + 1) ** alpha``."""
+    return list(itertools.accumulate(1 / (rank + 1) ** alpha for rank in range(n)))
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the ``created_at`` values we set."""
+    fields = [model._meta.get_field('created_at') for model in models]
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+def _bulk(model, rows, ignore_conflicts=False):
+    batch = []
+    written = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+            written += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+        written += len(batch)
+    return written
+
+
+def create_users(count, rng):
+    password = make_password('benchmark')
+    start = User.objects.filter(username__startswith=BENCH_PREFIX).count()
+    usernames = [f'{BENCH_PREFIX}{start + n}' for n in range(count)]
+    _bulk(User, (
+        User(username=name, email=f'{name}@example.com', password=password)
+        for name in usernames
+    ))
+    by_name = dict(
+        User.objects.filter(username__startswith=BENCH_PREFIX).values_list('username', 'id')
+    )
+    user_ids = [by_name[name] for name in usernames]
+    # bulk_create skips the post_save signal that normally creates profiles.
+    _bulk(Profile, (Profile(user_id=user_id, bio=sentence(rng, 10)) for user_id in user_ids))
+    return user_ids
+
+
+def create_taxonomy(tag_count, category_count):
+    """Create tags and categories; returns ``(tag_ids, category_ids)``, most used first."""
+    Tag.objects.bulk_create(
+        [Tag(name=f'bench {n}', slug=f'bench-{n}') for n in range(tag_count)],
+        ignore_conflicts=True,
+    )
+    Category.objects.bulk_create(
+        [Category(name=f'Bench {n}', slug=f'bench-{n}') for n in range(category_count)],
+        ignore_conflicts=True,
+    )
+    tags = dict(Tag.objects.filter(slug__startswith='bench-').values_list('slug', 'id'))
+    categories = dict(Category.objects.filter(slug__startswith='bench-').values_list('slug', 'id'))
+    return (
+        [tags[f'bench-{n}'] for n in range(tag_count)],
+        [categories[f'bench-{n}'] for n in range(category_count)],
+    )
+
+
+def create_posts(user_ids, category_ids, count, rng, days=365):
+    """Create ``count`` posts, 90% published; returns their ids."""
+    now = timezone.now()
+    window = days * 24 * 3600
+    start = Post.objects.filter(slug__startswith='bench-').count()
+
+    def posts():
+        for n in range(start, start + count):
+            title = sentence(rng, 6).capitalize()
+            content = '\n\n'.join(sentence(rng, 60) for _ in range(rng.randint(2, 6)))
+            created_at = now - timedelta(seconds=rng.randrange(window))
+            yield Post(
+                title=title,
+                slug=f'bench-{n}',
+                content=content,
+                excerpt=content[:297] + '...',
+                author_id=rng.choice(user_ids),
+                published_date=created_at,
+                created_at=created_at,
+                status='published' if rng.random() < 0.9 else 'draft',
+                category_id=rng.choice(category_ids) if category_ids else None,
+                views_count=int(rng.paretovariate(1.2) * 10),
+                meta_title=title,
+            )
+
+    with explicit_timestamps(Post):
+        _bulk(Post, posts())
+    return list(Post.objects.filter(slug__startswith='bench-').values_list('id', flat=True))
+
+
+def tag_posts(post_ids, tag_ids, rng, alpha=1.0, max_tags=5):
+    PostTag = Post.tags.through
+    cum_weights = zipf_cum_weights(len(tag_ids), alpha)
+    return _bulk(PostTag, (
+        PostTag(post_id=post_id, tag_id=tag_id)
+        for post_id in post_ids
+        for tag_id in set(rng.choices(tag_ids, cum_weights=cum_weights, k=rng.randint(1, max_tags)))
+    ), ignore_conflicts=True)
+
+
+def create_comments(user_ids, post_ids, count, rng, depth=3, alpha=1.0, days=365):
+    """
+    Create about ``count`` approved comments; half are top level and the
+    rest are replies, spread over ``depth`` reply levels.
+    """
+    cum_weights = zipf_cum_weights(len(post_ids), alpha)
+    post_ids = rng.sample(post_ids, len(post_ids))
+    now = timezone.now()
+    window = days * 24 * 3600
+
+    def comment(post_id, parent_id=None):
+        return Comment(
+            post_id=post_id,
+            parent_id=parent_id,
+            author_id=rng.choice(user_ids),
+            content=sentence(rng, 20),
+            is_approved=rng.random() < 0.95,
+            created_at=now - timedelta(seconds=rng.randrange(window)),
+        )
+
+    with explicit_timestamps(Comment):
+        first_id = (Comment.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        top_level = count // 2
+        written = _bulk(Comment, (
+            comment(post_id)
+            for post_id in rng.choices(post_ids, cum_weights=cum_weights, k=top_level)
+        ))
+        parents = list(Comment.objects.filter(id__gte=first_id).values_list('id', 'post_id'))
+        per_level = (count - top_level) // max(depth, 1)
+        for _ in range(depth):
+            if not parents:
+                break
+            level_start = (Comment.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+            written += _bulk(Comment, (
+                comment(post_id, parent_id)
+                for parent_id, post_id in (rng.choice(parents) for _ in range(per_level))
+            ))
+            parents = list(Comment.objects.filter(id__gte=level_start).values_list('id', 'post_id'))
+    return written
+
+
+def clear():
+    """Delete the generated users (posts and comments cascade), tags and categories."""
+    deleted, _ = User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+    deleted += Tag.objects.filter(slug__startswith='bench-').delete()[0]
+    deleted += Category.objects.filter(slug__startswith='bench-').delete()[0]
+    return deleted
+
+
+def seed(scale='small', seed=0, indexes=True, log=None, **overrides):
+    """Generate a full corpus; returns the counts used."""
+    params = dict(SCALES[scale], **{key: value for key, value in overrides.items() if value is not None})
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+
+    log(f"Creating {params['users']} users")
+    user_ids = create_users(params['users'], rng)
+    tag_ids, category_ids = create_taxonomy(params['tags'], params['categories'])
+    log(f"Creating {params['posts']} posts")
+    post_ids = create_posts(user_ids, category_ids, params['posts'], rng)
+    params['post_tags'] = tag_posts(post_ids, tag_ids, rng)
+    log(f"Creating {params['comments']} comments")
+    params['comments'] = create_comments(user_ids, post_ids, params['comments'], rng)
+
+    if indexes:
+        log('Rebuilding search index and related posts')
+        call_command('rebuild_search_index', stdout=StringIO())
+        call_command('rebuild_related_posts', stdout=StringIO())
+    params.update(scale=scale, seed=seed)
+    return params
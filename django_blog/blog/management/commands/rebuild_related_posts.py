@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post, RelatedRefresh
+from blog.related import compute_related
+
+
+class Command(BaseCommand):
+    help = 'Recompute the related-posts index for every published post.'
+
+    def handle(self, *args, **options):
+        # Everything is recomputed; changes queued from here on are kept.
+        RelatedRefresh.objects.all().delete()
+        posts = Post.objects.filter(status='published').only(
+            'pk', 'status', 'category_id'
+        )
+        total = 0
+        for post in posts.iterator(chunk_size=500):
+            total += compute_related(post)
+        self.stdout.write(self.style.SUCCESS(f'Stored {total} related-post links.'))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog.related import refresh_queued
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute related posts for the posts queued by tag, category and '
+        'publication changes. Run it from cron, e.g. every minute.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='Refresh at most this many queued posts.')
+
+    def handle(self, *args, **options):
+        refreshed = refresh_queued(options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Refreshed related posts of {refreshed} queued posts.'))
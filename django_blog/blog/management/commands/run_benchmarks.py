@@ -0,0 +1,112 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from django.http import JsonResponse
+from django.test import RequestFactory
+
+from blog.comment_tree import load_comment_tree
+from blog.factories import BENCH_PREFIX, WORDS
+from blog.models import Post, Tag
+from blog.views import PostDetailView, PostListView, SearchView
+from perfkit.benchmarks import Case, compare_results, run_suite, save_results
+
+
+def comment_tree_view(request, post):
+    """The threaded comments of ``post`` on their own, without the detail page."""
+    tree = load_comment_tree(post)
+    return JsonResponse({'roots': len(tree.roots), 'count': tree.count})
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the public blog pages, search and comment trees against the seeded '
+        'benchmark corpus and write p50/p95/p99 latencies and query counts to a JSON file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', nargs='+', help='Run only these cases.')
+        parser.add_argument(
+            '--output',
+            default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'results'),
+            help='Directory for the JSON results.'
+        )
+        parser.add_argument('--compare', help='Earlier results file to check for regressions.')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 growth (0.2 = 20%%).')
+
+    def handle(self, *args, **options):
+        reader = User.objects.filter(username__startswith=BENCH_PREFIX).first()
+        if reader is None:
+            raise CommandError('No benchmark data found; run seed_benchmark_data first.')
+
+        results = run_suite(
+            self.build_cases(reader),
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            only=options['only'],
+            log=lambda result: self.stdout.write(
+                f"{result['name']:<20} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                f"p99={result['p99_ms']}ms queries={result['queries_median']}"
+            ),
+        )
+        dataset = {
+            'posts': Post.objects.filter(slug__startswith='bench-').count(),
+            'tags': Tag.objects.filter(slug__startswith='bench-').count(),
+        }
+        path = save_results(results, options['output'], dataset)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+        if options['compare']:
+            regressions = compare_results(options['compare'], results, options['tolerance'])
+            for line in regressions:
+                self.stdout.write(self.style.WARNING(f'Regression: {line}'))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}.')
+
+    def build_cases(self, reader):
+        factory = RequestFactory()
+
+        def get(path, user=reader, **params):
+            # Logged-in requests bypass the public page cache and measure the
+            # real work; the "-cached" cases run as anonymous visitors.
+            request = factory.get(path, params)
+            request.user = user
+            return request
+
+        published = Post.objects.filter(status='published', slug__startswith='bench-')
+        # Posts with the largest threads, where the comment tree costs the most.
+        busiest = list(
+            published.annotate(approved=Count('comments', filter=Q(comments__is_approved=True)))
+            .order_by('-approved')[:20]
+        )
+        # Single words from the generated vocabulary plus a few phrases.
+        queries = WORDS[:20] + ['django cache', 'query index']
+
+        def busiest_post(i):
+            return busiest[i % len(busiest)]
+
+        detail_view = PostDetailView.as_view()
+        search_view = SearchView.as_view()
+        return [
+            Case('post-list', PostListView.as_view(),
+                 lambda i: (get('/post/', page=1 + i % 5), {})),
+            Case('post-list-cached', PostListView.as_view(),
+                 lambda i: (get('/post/', AnonymousUser(), page=1 + i % 5), {})),
+            Case('post-detail', detail_view,
+                 lambda i: (get(f'/post/{busiest_post(i).pk}/'), {'pk': busiest_post(i).pk})),
+            Case('post-detail-cached', detail_view,
+                 lambda i: (get(f'/post/{busiest_post(i).pk}/', AnonymousUser()),
+                            {'pk': busiest_post(i).pk})),
+            Case('comment-tree', comment_tree_view,
+                 lambda i: (get(f'/post/{busiest_post(i).pk}/'), {'post': busiest_post(i)})),
+            Case('search', search_view,
+                 lambda i: (get('/search/', q=queries[i % len(queries)]), {})),
+            Case('search-prefix', search_view,
+                 lambda i: (get('/search/', q=queries[i % len(queries)][:3]), {})),
+            Case('search-page-2', search_view,
+                 lambda i: (get('/search/', q=queries[i % len(queries)], page=2), {})),
+        ]
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from blog import factories
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic blog corpus for benchmarks: authors, tags, '
+        'categories, posts and threaded comments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(factories.SCALES), default='small')
+        parser.add_argument('--users', type=int, help='Override the number of users for the scale.')
+        parser.add_argument('--tags', type=int)
+        parser.add_argument('--categories', type=int)
+        parser.add_argument('--posts', type=int)
+        parser.add_argument('--comments', type=int)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--no-indexes', action='store_true',
+                            help='Skip rebuilding the search index and related posts.')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated data first.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f'Deleted {factories.clear()} rows of earlier benchmark data.')
+
+        params = factories.seed(
+            scale=options['scale'],
+            seed=options['seed'],
+            indexes=not options['no_indexes'],
+            log=self.stdout.write,
+            users=options['users'],
+            tags=options['tags'],
+            categories=options['categories'],
+            posts=options['posts'],
+            comments=options['comments'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded: ' + ', '.join(f'{key}={value}' for key, value in params.items())
+        ))
@@ -6,6 +6,8 @@ from django.utils.text import slugify
 from django.conf import settings
 import os
 
+from .view_counter import record_view, get_view_count
+
 class Category(models.Model):
     """Model for post categories"""
     name = models.CharField(max_length=100, unique=True)
@@ -140,9 +142,13 @@ class Post(models.Model):
         return reverse('post-detail-slug', kwargs={'slug': self.slug})
     
     def increment_views(self):
-        """Increment view count"""
-        self.views_count += 1
-        self.save(update_fields=['views_count'])
+        """Increment view count (buffered, see blog.view_counter)"""
+        record_view(self)
+    
+    @property
+    def live_views_count(self):
+        """Approximate view count including views not yet flushed"""
+        return get_view_count(self)
     
     @property
     def reading_time(self):
@@ -158,15 +164,11 @@ class Post(models.Model):
         return self.status == 'published'
     
     def get_related_posts(self, limit=3):
-        """Get related posts by category and tags"""
+        """Get related posts from the precomputed index (see blog.related)"""
         related_posts = Post.objects.filter(
-            models.Q(category=self.category) |
-            models.Q(tags__in=self.tags.all())
-        ).exclude(
-            pk=self.pk
-        ).distinct().filter(
+            related_from__post=self,
             status='published'
-        )[:limit]
+        ).order_by('-related_from__score')[:limit]
         return related_posts
 
 class Comment(models.Model):
@@ -209,6 +211,9 @@ class Comment(models.Model):
     
     def get_replies(self):
         """Get all replies to this comment"""
+        # Set when loaded through blog.comment_tree.load_comment_tree
+        if hasattr(self, '_tree_replies'):
+            return self._tree_replies
         return self.replies.filter(is_approved=True)
 
 class Profile(models.Model):
@@ -349,8 +354,48 @@ class Bookmark(models.Model):
     def __str__(self):
         return f"{self.user.username} bookmarked {self.post.title}"
 
+class RelatedPost(models.Model):
+    """Precomputed related-post scores, maintained by blog.related"""
+    post = models.ForeignKey(
+        Post, 
+        on_delete=models.CASCADE, 
+        related_name='related_entries'
+    )
+    related = models.ForeignKey(
+        Post, 
+        on_delete=models.CASCADE, 
+        related_name='related_from'
+    )
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['post', 'related']
+        ordering = ['-score']
+        indexes = [
+            models.Index(fields=['post', '-score']),
+        ]
+        verbose_name = "Related Post"
+        verbose_name_plural = "Related Posts"
+    
+    def __str__(self):
+        return f"{self.related.title} related to {self.post.title} ({self.score:.2f})"
+
+class RelatedRefresh(models.Model):
+    """Posts whose related posts are due for a recompute, see blog.related"""
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+'
+    )
+    queued_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"{self.post_id} queued at {self.queued_at}"
+
 # Signal imports for profile creation
-from django.db.models.signals import post_save, pre_delete, pre_save
+from django.db.models.signals import post_save, pre_delete, pre_save, post_delete, m2m_changed, post_migrate
 from django.dispatch import receiver
 from django.core.exceptions import ValidationError
 
@@ -384,6 +429,94 @@ def validate_post_content(sender, instance, **kwargs):
     if len(instance.title.strip()) < 3:
         raise ValidationError("Post title must be at least 3 characters long")
 
+@receiver(post_save, sender=Post)
+def update_search_index(sender, instance, **kwargs):
+    """Keep the full-text search index in sync with saved posts"""
+    from .search import sync_post
+    sync_post(instance)
+
+@receiver(post_migrate)
+def create_search_index(sender, **kwargs):
+    """Create the full-text index tables once the blog schema exists"""
+    if sender.name == 'blog':
+        from .search import create_index
+        create_index(sender, **kwargs)
+
+@receiver(post_delete, sender=Post)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drop deleted posts from the full-text search index"""
+    from .search import get_search_backend
+    get_search_backend().remove_post(instance.pk)
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def reindex_post_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Re-index posts and refresh related posts when tags change"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    from .search import sync_post
+    from .related import schedule_refresh
+    if not reverse:
+        posts = [instance]
+    elif pk_set:
+        posts = Post.objects.filter(pk__in=pk_set)
+    else:
+        posts = []
+    from .cache import bump, invalidate_post
+    for post in posts:
+        sync_post(post)
+        schedule_refresh(post)
+        invalidate_post(post)
+    tag_ids = pk_set if not reverse else [instance.pk]
+    if tag_ids:
+        for slug in Tag.objects.filter(pk__in=tag_ids).values_list('slug', flat=True):
+            bump('tag', slug)
+    bump('tags')
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_cache(sender, instance, **kwargs):
+    """Expire cached pages showing this post"""
+    from .cache import invalidate_post
+    invalidate_post(instance)
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_cache(sender, instance, **kwargs):
+    """Expire the cached detail page of the commented post"""
+    from .cache import bump
+    bump('post', instance.post_id)
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_cache(sender, instance, **kwargs):
+    """Expire cached tag pages"""
+    from .cache import invalidate_tag
+    invalidate_tag(instance)
+
+@receiver(post_save, sender=Category)
+def invalidate_category_cache(sender, instance, created, **kwargs):
+    """Expire cached pages of posts in a changed category"""
+    if not created:
+        from .cache import invalidate_category
+        invalidate_category(instance)
+
+@receiver(pre_save, sender=Post)
+def remember_related_fields(sender, instance, **kwargs):
+    """Remember the fields related-post scores depend on"""
+    instance._related_state = None
+    if instance.pk:
+        instance._related_state = Post.objects.filter(pk=instance.pk).values_list(
+            'category_id', 'status', 'published_date'
+        ).first()
+
+@receiver(post_save, sender=Post)
+def refresh_related_posts(sender, instance, created, **kwargs):
+    """Recompute related posts when category or publication state change"""
+    state = (instance.category_id, instance.status, instance.published_date)
+    if created or getattr(instance, '_related_state', None) != state:
+        from .related import schedule_refresh
+        schedule_refresh(instance)
+
 # Custom manager for published posts
 class PublishedPostManager(models.Manager):
     """Custom manager for published posts"""
@@ -0,0 +1,138 @@
+"""
+Precomputed related posts.
+
+Scores are stored in ``RelatedPost`` so the detail page reads its top
+related posts with one indexed lookup on (post, -score). A candidate's score
+is::
+
+    (shared_tags * TAG_WEIGHT + same_category * CATEGORY_WEIGHT) * recency
+
+where ``recency`` halves every ``BLOG_RELATED_RECENCY_HALF_LIFE_DAYS`` days
+of the candidate's age. When a post's tags, category or publication state
+change, the request only queues it (one INSERT into ``RelatedRefresh``, in
+the same transaction as the change). ``python manage.py
+refresh_related_posts``, run from cron, recomputes the queued posts
+together with the posts that listed them before the change.
+``python manage.py rebuild_related_posts`` recomputes everything.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+RELATED_POSTS_LIMIT = getattr(settings, 'BLOG_RELATED_POSTS_LIMIT', 10)
+TAG_WEIGHT = getattr(settings, 'BLOG_RELATED_TAG_WEIGHT', 2.0)
+CATEGORY_WEIGHT = getattr(settings, 'BLOG_RELATED_CATEGORY_WEIGHT', 1.0)
+RECENCY_HALF_LIFE_DAYS = getattr(settings, 'BLOG_RELATED_RECENCY_HALF_LIFE_DAYS', 30)
+# Bounds the candidates pulled from a large category.
+CATEGORY_CANDIDATES = getattr(settings, 'BLOG_RELATED_CATEGORY_CANDIDATES', 200)
+
+
+def recency_weight(published_date, now=None):
+    now = now or timezone.now()
+    age_days = max((now - published_date).total_seconds() / 86400, 0)
+    return 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+
+
+def score_candidates(post, now=None):
+    """Return ``[(candidate_id, score), ...]`` for ``post``, best first."""
+    from .models import Post
+
+    tag_ids = list(post.tags.values_list('pk', flat=True))
+    shared_tags = dict(
+        Post.tags.through.objects.filter(tag_id__in=tag_ids)
+        .exclude(post_id=post.pk)
+        .values('post_id')
+        .annotate(shared=Count('tag_id'))
+        .values_list('post_id', 'shared')
+    ) if tag_ids else {}
+
+    same_category = set()
+    if post.category_id:
+        same_category = set(
+            Post.objects.filter(category_id=post.category_id, status='published')
+            .exclude(pk=post.pk)
+            .order_by('-published_date')
+            .values_list('pk', flat=True)[:CATEGORY_CANDIDATES]
+        )
+
+    candidate_ids = set(shared_tags) | same_category
+    if not candidate_ids:
+        return []
+
+    published = Post.objects.filter(
+        pk__in=candidate_ids, status='published'
+    ).values_list('pk', 'published_date')
+
+    now = now or timezone.now()
+    scored = []
+    for candidate_id, published_date in published:
+        base = (
+            shared_tags.get(candidate_id, 0) * TAG_WEIGHT +
+            (CATEGORY_WEIGHT if candidate_id in same_category else 0)
+        )
+        scored.append((candidate_id, base * recency_weight(published_date, now)))
+    scored.sort(key=lambda item: (-item[1], -item[0]))
+    return scored[:RELATED_POSTS_LIMIT]
+
+
+def compute_related(post):
+    """Replace the stored related posts of ``post``."""
+    from .models import RelatedPost
+
+    if post.status != 'published':
+        RelatedPost.objects.filter(post=post).delete()
+        return 0
+
+    scored = score_candidates(post)
+    with transaction.atomic():
+        RelatedPost.objects.filter(post=post).delete()
+        RelatedPost.objects.bulk_create([
+            RelatedPost(post_id=post.pk, related_id=related_id, score=score)
+            for related_id, score in scored
+        ])
+    return len(scored)
+
+
+def refresh_related(post):
+    """Recompute ``post`` and every post whose related list it affects."""
+    from .models import Post, RelatedPost
+
+    affected = set(
+        RelatedPost.objects.filter(related=post).values_list('post_id', flat=True)
+    )
+    compute_related(post)
+    # Posts it now relates to are likely to rank it in return.
+    affected.update(
+        RelatedPost.objects.filter(post=post).values_list('related_id', flat=True)
+    )
+    for neighbour in Post.objects.filter(pk__in=affected):
+        compute_related(neighbour)
+
+
+def schedule_refresh(post):
+    """Queue ``post`` for ``refresh_queued()``; a no-op if it is already queued."""
+    from .models import RelatedRefresh
+
+    RelatedRefresh.objects.bulk_create([RelatedRefresh(post_id=post.pk)], ignore_conflicts=True)
+
+
+def refresh_queued(limit=None):
+    """Refresh up to ``limit`` queued posts, oldest first; returns how many."""
+    from .models import Post, RelatedRefresh
+
+    queued = RelatedRefresh.objects.order_by('queued_at').values_list('post_id', flat=True)
+    post_ids = list(queued[:limit] if limit else queued)
+    if not post_ids:
+        return 0
+    # Claimed before computing, so a change queued meanwhile is kept for the next run.
+    RelatedRefresh.objects.filter(post_id__in=post_ids).delete()
+    try:
+        for post in Post.objects.filter(pk__in=post_ids):
+            refresh_related(post)
+    except Exception:
+        RelatedRefresh.objects.bulk_create(
+            [RelatedRefresh(post_id=post_id) for post_id in post_ids], ignore_conflicts=True
+        )
+        raise
+    return len(post_ids)
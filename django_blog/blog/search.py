@@ -0,0 +1,319 @@
+"""
+Full-text search for blog posts.
+
+Published posts are kept in an inverted index over title, content and tag
+names so search no longer ORs ``icontains`` scans across a tags join.
+The backend is chosen from ``BLOG_SEARCH_BACKEND`` (a dotted path), or
+from the database vendor when unset:
+
+- SQLite: an FTS5 virtual table ranked with bm25()
+- PostgreSQL: a tsvector side table with a GIN index, ranked with ts_rank()
+- anything else: the original icontains query
+
+The index tables are created after ``migrate`` (see ``create_index``),
+updated from the Post signals in ``blog.models`` and can be rebuilt with
+``python manage.py rebuild_search_index``.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _published_posts():
+    from .models import Post
+    return Post.objects.filter(status='published')
+
+
+def _tag_names(post):
+    return ' '.join(tag.name for tag in post.tags.all())
+
+
+class BaseSearchBackend:
+    """Interface every search backend implements."""
+
+    def ensure_index(self):
+        """Create index structures if they do not exist yet."""
+
+    def index_post(self, post):
+        raise NotImplementedError
+
+    def remove_post(self, post_id):
+        raise NotImplementedError
+
+    def search_ids(self, query, offset, limit):
+        """Post ids matching ``query``, best match first."""
+        raise NotImplementedError
+
+    def count(self, query):
+        raise NotImplementedError
+
+    def rebuild(self):
+        """Index every published post from scratch."""
+        self.ensure_index()
+        self.clear()
+        indexed = 0
+        for post in _published_posts().prefetch_related('tags').iterator(chunk_size=500):
+            self.index_post(post)
+            indexed += 1
+        return indexed
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class IcontainsSearchBackend(BaseSearchBackend):
+    """Fallback for databases without full-text support; no index to maintain."""
+
+    def _queryset(self, query):
+        return _published_posts().filter(
+            Q(title__icontains=query) |
+            Q(content__icontains=query) |
+            Q(tags__name__icontains=query)
+        ).distinct().order_by('-published_date')
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def clear(self):
+        pass
+
+    def search_ids(self, query, offset, limit):
+        return list(self._queryset(query).values_list('pk', flat=True)[offset:offset + limit])
+
+    def count(self, query):
+        return self._queryset(query).count()
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    """SQLite FTS5 index keyed by post id (the FTS rowid)."""
+    table = 'blog_post_fts'
+    # bm25 column weights for title, content, tags.
+    weights = (10.0, 1.0, 5.0)
+
+    def __init__(self):
+        self._ready = False
+
+    def ensure_index(self):
+        if self._ready:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                f"USING fts5(title, content, tags, tokenize='unicode61')"
+            )
+        # A table created inside a transaction disappears if it rolls back.
+        self._ready = not connection.in_atomic_block
+
+    def match_expression(self, query):
+        # Quote every token so user input can never be parsed as FTS syntax;
+        # the trailing * makes the last word a prefix match for as-you-type.
+        tokens = TOKEN_RE.findall(query)
+        if not tokens:
+            return None
+        terms = [f'"{token}"' for token in tokens]
+        terms[-1] += '*'
+        return ' '.join(terms)
+
+    def index_post(self, post):
+        self.ensure_index()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post.pk])
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, title, content, tags) VALUES (%s, %s, %s, %s)',
+                [post.pk, post.title, post.content, _tag_names(post)]
+            )
+
+    def remove_post(self, post_id):
+        self.ensure_index()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [post_id])
+
+    def clear(self):
+        self.ensure_index()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def search_ids(self, query, offset, limit):
+        expression = self.match_expression(query)
+        if expression is None:
+            return []
+        self.ensure_index()
+        weights = ', '.join(str(weight) for weight in self.weights)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+                f'ORDER BY bm25({self.table}, {weights}) LIMIT %s OFFSET %s',
+                [expression, limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def count(self, query):
+        expression = self.match_expression(query)
+        if expression is None:
+            return 0
+        self.ensure_index()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {self.table} WHERE {self.table} MATCH %s',
+                [expression]
+            )
+            return cursor.fetchone()[0]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """tsvector side table with a GIN index, weighted title > tags > content."""
+    table = 'blog_post_search'
+    config = 'english'
+
+    def __init__(self):
+        self._ready = False
+
+    def ensure_index(self):
+        if self._ready:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                f'post_id bigint PRIMARY KEY REFERENCES blog_post (id) ON DELETE CASCADE, '
+                f'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_document_gin '
+                f'ON {self.table} USING GIN (document)'
+            )
+        # A table created inside a transaction disappears if it rolls back.
+        self._ready = not connection.in_atomic_block
+
+    def index_post(self, post):
+        self.ensure_index()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.table} (post_id, document) VALUES (%s, '
+                f"setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+                f"setweight(to_tsvector(%s::regconfig, %s), 'B') || "
+                f"setweight(to_tsvector(%s::regconfig, %s), 'C')) "
+                f'ON CONFLICT (post_id) DO UPDATE SET document = EXCLUDED.document',
+                [
+                    post.pk,
+                    self.config, post.title,
+                    self.config, _tag_names(post),
+                    self.config, post.content,
+                ]
+            )
+
+    def remove_post(self, post_id):
+        self.ensure_index()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE post_id = %s', [post_id])
+
+    def clear(self):
+        self.ensure_index()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+    def search_ids(self, query, offset, limit):
+        self.ensure_index()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM {self.table}, '
+                f'websearch_to_tsquery(%s::regconfig, %s) AS query '
+                f'WHERE document @@ query '
+                f'ORDER BY ts_rank(document, query) DESC, post_id DESC '
+                f'LIMIT %s OFFSET %s',
+                [self.config, query, limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def count(self, query):
+        self.ensure_index()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {self.table} '
+                f'WHERE document @@ websearch_to_tsquery(%s::regconfig, %s)',
+                [self.config, query]
+            )
+            return cursor.fetchone()[0]
+
+
+BACKENDS_BY_VENDOR = {
+    'sqlite': SQLiteFTSSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+_backend = None
+
+
+def get_search_backend():
+    """Return the configured search backend (created once per process)."""
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'BLOG_SEARCH_BACKEND', None)
+        if path:
+            backend_class = import_string(path)
+        else:
+            backend_class = BACKENDS_BY_VENDOR.get(connection.vendor, IcontainsSearchBackend)
+        _backend = backend_class()
+    return _backend
+
+
+class SearchResults:
+    """
+    Lazy, ranked search hits usable with ``django.core.paginator.Paginator``.
+
+    ``count()`` runs a single COUNT against the index and slicing fetches
+    only the requested page of posts, in rank order.
+    """
+
+    def __init__(self, query, backend=None):
+        self.query = query
+        self.backend = backend or get_search_backend()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.query)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        offset = key.start or 0
+        limit = (key.stop if key.stop is not None else self.count()) - offset
+        if limit <= 0:
+            return []
+        ids = self.backend.search_ids(self.query, offset, limit)
+        posts = (
+            _published_posts()
+            .select_related('author', 'category')
+            .in_bulk(ids)
+        )
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def create_index(sender, **kwargs):
+    """Create the index tables with the schema (called after ``migrate``).
+
+    Creating them lazily inside a request or test transaction would lose
+    them on rollback, and SQLite cannot roll back an FTS5 table cleanly.
+    """
+    get_search_backend().ensure_index()
+
+
+def sync_post(post):
+    """Index a post if it is published, otherwise drop it from the index."""
+    backend = get_search_backend()
+    if post.status == 'published':
+        backend.index_post(post)
+    else:
+        backend.remove_post(post.pk)
@@ -0,0 +1,160 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+from django.views import View
+
+from . import cache
+from .models import Comment, Post, Tag
+
+
+class CacheVersionTests(TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.post = Post.objects.create(
+            title='Hello', content='Long enough content', author=self.author, status='published'
+        )
+
+    def version(self, kind, key=None):
+        return cache.get_versions([(kind, key)])[0]
+
+    def test_missing_stamps_start_from_the_clock(self):
+        before = time.time_ns() // 1000
+        self.assertGreaterEqual(self.version('tag', 'new'), before)
+
+    def test_recreated_stamps_never_repeat(self):
+        old = self.version('post', self.post.pk)
+        cache.bump('post', self.post.pk)
+        bumped = self.version('post', self.post.pk)
+        cache.get_stamp_cache().delete(cache._version_key('post', self.post.pk))
+        self.assertGreater(self.version('post', self.post.pk), bumped)
+        self.assertGreater(bumped, old)
+
+    def test_post_writes_bump_post_and_list_stamps(self):
+        post_version, list_version = self.version('post', self.post.pk), self.version('posts')
+        self.post.title = 'Edited'
+        self.post.save()
+        self.assertGreater(self.version('post', self.post.pk), post_version)
+        self.assertGreater(self.version('posts'), list_version)
+
+    def test_comments_bump_their_post(self):
+        post_version = self.version('post', self.post.pk)
+        Comment.objects.create(post=self.post, author=self.author, content='Nice')
+        self.assertGreater(self.version('post', self.post.pk), post_version)
+
+    def test_tagging_bumps_the_tag(self):
+        tag = Tag.objects.create(name='django')
+        tag_version = self.version('tag', tag.slug)
+        self.post.tags.add(tag)
+        self.assertGreater(self.version('tag', tag.slug), tag_version)
+
+    def test_bumps_change_keys_and_etags(self):
+        stamps = [('post', self.post.pk)]
+        key = cache.make_key('post-detail', stamps, '/post/1/')
+        cache.bump('post', self.post.pk)
+        new_key = cache.make_key('post-detail', stamps, '/post/1/')
+        self.assertNotEqual(key, new_key)
+        self.assertNotEqual(cache.etag_for(key), cache.etag_for(new_key))
+
+
+class GetOrComputeTests(TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        cache.cache_stats.reset()
+        self.compute = mock.Mock(side_effect=['first', 'second'])
+
+    def test_value_is_computed_once(self):
+        stamps = [('posts', None)]
+        self.assertEqual(cache.get_or_compute('page', stamps, self.compute), 'first')
+        self.assertEqual(cache.get_or_compute('page', stamps, self.compute), 'first')
+        self.assertEqual(self.compute.call_count, 1)
+        self.assertEqual(cache.stats()['page']['hits'], 1)
+
+    def test_bump_forces_a_recompute(self):
+        stamps = [('posts', None)]
+        cache.get_or_compute('page', stamps, self.compute)
+        cache.bump('posts')
+        self.assertEqual(cache.get_or_compute('page', stamps, self.compute), 'second')
+
+    def test_stale_entry_is_served_while_locked(self):
+        stamps = [('posts', None)]
+        cache.get_or_compute('page', stamps, self.compute, soft_ttl=-1)
+        key = cache.make_key('page', stamps)
+        cache.get_cache().add(f'{key}:lock', 1)
+        self.assertEqual(cache.get_or_compute('page', stamps, self.compute), 'first')
+        self.assertEqual(cache.stats()['page']['stale_hits'], 1)
+
+
+class PostCountView(View):
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(f'{Post.objects.filter(status="published").count()} posts')
+
+
+class CountedPage(cache.PublicPageCacheMixin, PostCountView):
+    cache_name = 'test-page'
+
+    def get_queryset(self):
+        return Post.objects.filter(status='published')
+
+
+class PageValidatorTests(TestCase):
+
+    def setUp(self):
+        cache.get_cache().clear()
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        self.post = Post.objects.create(
+            title='Hello', content='Long enough content', author=self.author, status='published'
+        )
+        # Far enough back that a save lands on a later second
+        Post.objects.filter(pk=self.post.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.post.refresh_from_db()
+
+    def get(self, user=None, **headers):
+        request = RequestFactory().get('/page/', **headers)
+        request.user = user or AnonymousUser()
+        return CountedPage.as_view()(request)
+
+    def test_last_modified_is_the_newest_update(self):
+        response = self.get()
+        self.assertEqual(response['Last-Modified'], http_date(self.post.updated_at.timestamp()))
+        self.assertEqual(self.get()['Last-Modified'], response['Last-Modified'])
+
+    def test_if_modified_since_is_answered_until_a_change(self):
+        since = self.get()['Last-Modified']
+        self.assertEqual(self.get(HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+        self.post.title = 'Edited'
+        self.post.save()
+        response = self.get(HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], since)
+
+    def test_signed_in_users_get_their_own_private_etag(self):
+        anonymous = self.get()['ETag']
+        response = self.get(self.reader)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertNotEqual(response['ETag'], anonymous)
+        self.assertNotEqual(self.get(self.author)['ETag'], response['ETag'])
+        self.assertEqual(self.get(self.reader, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.get(self.author, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_signed_in_pages_are_never_cached(self):
+        self.get(self.reader)
+        Post.objects.filter(pk=self.post.pk).update(status='draft')
+        self.assertEqual(self.get().content, b'0 posts')
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_stamps_send_no_validators(self):
+        response = self.get()
+        self.assertNotIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
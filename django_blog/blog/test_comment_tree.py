@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .comment_tree import load_comment_tree
+from .models import Comment, Post
+
+
+class CommentTreeTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.post = Post.objects.create(
+            title='Hello', content='Long enough content', author=self.author, status='published'
+        )
+        self.first = self.comment('First')
+        self.second = self.comment('Second')
+        self.reply = self.comment('Reply', parent=self.first)
+        self.nested = self.comment('Nested', parent=self.reply)
+        self.hidden = self.comment('Hidden', parent=self.first, is_approved=False)
+        self.hidden_reply = self.comment('Under hidden', parent=self.hidden)
+
+    def comment(self, content, parent=None, is_approved=True):
+        return Comment.objects.create(
+            post=self.post, author=self.author, content=content,
+            parent=parent, is_approved=is_approved,
+        )
+
+    def test_tree_is_loaded_in_one_query(self):
+        with self.assertNumQueries(1):
+            tree = load_comment_tree(self.post)
+            # Rendering a thread must not query per comment.
+            for root in tree:
+                str(root)
+                for reply in root.get_replies():
+                    str(reply)
+                    list(reply.get_replies())
+
+    def test_replies_are_nested_under_their_parents(self):
+        tree = load_comment_tree(self.post)
+        self.assertEqual([c.pk for c in tree], [self.second.pk, self.first.pk])
+        first = tree.roots[1]
+        self.assertEqual([c.pk for c in first.get_replies()], [self.reply.pk])
+        reply = first.get_replies()[0]
+        self.assertEqual(reply.depth, 1)
+        self.assertEqual([c.pk for c in reply.get_replies()], [self.nested.pk])
+
+    def test_unapproved_comments_hide_their_replies(self):
+        tree = load_comment_tree(self.post)
+        self.assertEqual(tree.count, 5)
+        placed = []
+        stack = list(tree)
+        while stack:
+            comment = stack.pop()
+            placed.append(comment.pk)
+            stack.extend(comment.get_replies())
+        self.assertNotIn(self.hidden.pk, placed)
+        self.assertNotIn(self.hidden_reply.pk, placed)
+
+    def test_max_depth_truncates(self):
+        tree = load_comment_tree(self.post, max_depth=0)
+        self.assertTrue(tree.truncated)
+        self.assertTrue(all(list(root.get_replies()) == [] for root in tree))
+
+    def test_max_nodes_keeps_upper_levels(self):
+        tree = load_comment_tree(self.post, max_nodes=3)
+        self.assertTrue(tree.truncated)
+        first = tree.roots[1]
+        self.assertEqual([c.pk for c in first.get_replies()], [self.reply.pk])
+        self.assertEqual(first.get_replies()[0].get_replies(), [])
+
+    def test_untruncated_tree(self):
+        self.assertFalse(load_comment_tree(self.post).truncated)
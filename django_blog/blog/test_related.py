@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Category, Post, RelatedPost, RelatedRefresh, Tag
+from .related import (
+    compute_related, recency_weight, refresh_queued, schedule_refresh, score_candidates,
+)
+
+
+class RelatedPostTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.category = Category.objects.create(name='Python')
+        self.django, self.orm, self.cache = (
+            Tag.objects.create(name=name) for name in ('django', 'orm', 'cache')
+        )
+        self.post = self.publish('Main post', tags=[self.django, self.orm])
+        self.two_tags = self.publish('Two tags', tags=[self.django, self.orm])
+        self.one_tag = self.publish('One tag', tags=[self.django])
+        self.same_category = self.publish('Same category', category=self.category)
+        self.unrelated = self.publish('Unrelated', tags=[self.cache])
+
+    def publish(self, title, tags=(), category=None, status='published', **fields):
+        post = Post.objects.create(
+            title=title, content='Long enough content', author=self.author,
+            status=status, category=category, **fields
+        )
+        post.tags.set(tags)
+        refresh_queued()
+        return post
+
+    def related_ids(self, post):
+        return [related.pk for related in post.get_related_posts(limit=10)]
+
+    def test_shared_tags_outrank_category(self):
+        self.post.category = self.category
+        self.post.save()
+        compute_related(self.post)
+        self.assertEqual(
+            self.related_ids(self.post),
+            [self.two_tags.pk, self.one_tag.pk, self.same_category.pk],
+        )
+
+    def test_unpublished_candidates_are_skipped(self):
+        draft = self.publish('Draft', tags=[self.django, self.orm], status='draft')
+        compute_related(self.post)
+        self.assertNotIn(draft.pk, self.related_ids(self.post))
+
+    def test_unpublished_posts_have_no_related_entries(self):
+        draft = self.publish('Draft', tags=[self.django], status='draft')
+        self.assertEqual(compute_related(draft), 0)
+        self.assertFalse(RelatedPost.objects.filter(post=draft).exists())
+
+    def test_newer_posts_win_ties(self):
+        old = self.publish(
+            'Old', tags=[self.cache], published_date=timezone.now() - timedelta(days=90)
+        )
+        new = self.publish('Replacement', tags=[self.cache])
+        scores = dict(score_candidates(self.unrelated))
+        self.assertGreater(scores[new.pk], scores[old.pk])
+
+    def test_recency_halves_every_half_life(self):
+        now = timezone.now()
+        self.assertAlmostEqual(recency_weight(now, now), 1.0)
+        self.assertAlmostEqual(recency_weight(now - timedelta(days=30), now), 0.5)
+
+    def test_tag_changes_refresh_both_sides(self):
+        self.assertIn(self.one_tag.pk, self.related_ids(self.post))
+        self.one_tag.tags.set([self.cache])
+        self.assertIn(self.one_tag.pk, self.related_ids(self.post))
+        self.assertEqual(refresh_queued(), 1)
+        self.assertNotIn(self.one_tag.pk, self.related_ids(self.post))
+        self.assertIn(self.unrelated.pk, self.related_ids(self.one_tag))
+
+    def test_changes_are_queued_until_refreshed(self):
+        self.post.category = self.category
+        self.post.save()
+        self.post.tags.add(self.cache)
+        self.assertEqual(list(RelatedRefresh.objects.values_list('post_id', flat=True)), [self.post.pk])
+        self.assertNotIn(self.same_category.pk, self.related_ids(self.post))
+        self.assertEqual(refresh_queued(), 1)
+        self.assertIn(self.same_category.pk, self.related_ids(self.post))
+        self.assertFalse(RelatedRefresh.objects.exists())
+
+    def test_queueing_is_one_query(self):
+        with self.assertNumQueries(1):
+            schedule_refresh(self.post)
+
+    def test_detail_lookup_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.related_ids(self.post)
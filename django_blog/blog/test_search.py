@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.test import TestCase
+
+from .models import Post
+from .search import IcontainsSearchBackend, SearchResults, SQLiteFTSSearchBackend, get_search_backend
+
+
+class SearchBackendTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.in_title = self.publish('Django caching guide', 'How to keep pages fast with a cache.')
+        self.in_content = self.publish('Weekend notes', 'Some thoughts on Django and coffee.')
+        self.draft = Post.objects.create(
+            title='Django draft', content='Not published yet, about Django.', author=self.author,
+        )
+
+    def publish(self, title, content):
+        return Post.objects.create(title=title, content=content, author=self.author, status='published')
+
+    def ids(self, query, backend=None):
+        return [post.pk for post in SearchResults(query, backend)[0:10]]
+
+    def test_sqlite_uses_the_fts_backend(self):
+        self.assertIsInstance(get_search_backend(), SQLiteFTSSearchBackend)
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.ids('django'), [self.in_title.pk, self.in_content.pk])
+
+    def test_drafts_are_not_indexed(self):
+        self.assertNotIn(self.draft.pk, self.ids('draft'))
+        self.draft.status = 'published'
+        self.draft.save()
+        self.assertEqual(self.ids('draft'), [self.draft.pk])
+        self.draft.status = 'draft'
+        self.draft.save()
+        self.assertEqual(self.ids('draft'), [])
+
+    def test_deleted_posts_leave_the_index(self):
+        self.in_title.delete()
+        self.assertEqual(self.ids('caching'), [])
+
+    def test_last_word_is_a_prefix(self):
+        self.assertEqual(self.ids('cach'), [self.in_title.pk])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(self.ids('django" AND "coffee'), [self.in_content.pk])
+        self.assertEqual(self.ids('***'), [])
+
+    def test_tags_are_searchable(self):
+        self.in_content.tags.create(name='espresso')
+        self.assertEqual(self.ids('espresso'), [self.in_content.pk])
+
+    def test_results_paginate(self):
+        results = SearchResults('django')
+        self.assertEqual(results.count(), 2)
+        page = Paginator(results, 1).page(2)
+        self.assertEqual([post.pk for post in page], [self.in_content.pk])
+
+    def test_rebuild_reindexes_published_posts(self):
+        backend = get_search_backend()
+        backend.clear()
+        self.assertEqual(self.ids('django'), [])
+        self.assertEqual(backend.rebuild(), 2)
+        self.assertEqual(len(self.ids('django')), 2)
+
+    def test_icontains_fallback_matches_the_same_posts(self):
+        backend = IcontainsSearchBackend()
+        self.assertEqual(
+            sorted(self.ids('django', backend)), sorted([self.in_title.pk, self.in_content.pk])
+        )
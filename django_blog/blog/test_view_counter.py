@@ -0,0 +1,73 @@
+import threading
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from .models import Post
+from .view_counter import ViewCountBuffer
+
+
+class ViewCountBufferTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.post = Post.objects.create(
+            title='Hello', content='Long enough content', author=self.author, status='published'
+        )
+
+    def stored_views(self):
+        return Post.objects.get(pk=self.post.pk).views_count
+
+    def test_views_are_buffered_until_the_threshold(self):
+        buffer = ViewCountBuffer(flush_interval=3600, flush_threshold=3, timer=False)
+        buffer.record(self.post.pk)
+        buffer.record(self.post.pk)
+        self.assertEqual(self.stored_views(), 0)
+        self.assertEqual(buffer.pending(self.post.pk), 2)
+
+        buffer.record(self.post.pk)
+        self.assertEqual(self.stored_views(), 3)
+        self.assertEqual(buffer.pending(self.post.pk), 0)
+
+    def test_flush_batches_updates_per_increment(self):
+        other = Post.objects.create(title='Other', content='Long enough content', author=self.author)
+        buffer = ViewCountBuffer(flush_interval=3600, flush_threshold=100, timer=False)
+        buffer.record(self.post.pk, 2)
+        buffer.record(other.pk, 2)
+        with self.assertNumQueries(3):  # SAVEPOINT, one UPDATE, RELEASE
+            self.assertEqual(buffer.flush(), 4)
+        self.assertEqual(Post.objects.get(pk=other.pk).views_count, 2)
+
+    def test_failed_flush_keeps_the_views(self):
+        buffer = ViewCountBuffer(flush_interval=3600, flush_threshold=100, timer=False)
+        buffer.record(self.post.pk, 2)
+        with mock.patch('blog.models.Post.objects.filter', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                buffer.flush()
+        self.assertEqual(buffer.pending(self.post.pk), 2)
+        buffer.flush()
+        self.assertEqual(self.stored_views(), 2)
+
+    def test_timer_flushes_an_idle_buffer(self):
+        buffer = ViewCountBuffer(flush_interval=0.05, flush_threshold=100)
+        flushed = threading.Event()
+        with mock.patch.object(buffer, 'flush', side_effect=lambda: flushed.set()):
+            buffer.record(self.post.pk)
+            self.assertTrue(flushed.wait(5))
+
+    def test_flush_cancels_the_timer(self):
+        buffer = ViewCountBuffer(flush_interval=3600, flush_threshold=100)
+        buffer.record(self.post.pk)
+        timer = buffer._timer
+        self.assertIsNotNone(timer)
+        buffer.flush()
+        self.assertIsNone(buffer._timer)
+        timer.join(1)
+        self.assertFalse(timer.is_alive())
+
+    def test_live_count_includes_pending_views(self):
+        with mock.patch('blog.view_counter.view_counts', ViewCountBuffer(3600, 100, timer=False)):
+            self.post.increment_views()
+            self.assertEqual(self.post.live_views_count, 1)
+            self.assertEqual(self.stored_views(), 0)
@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase
+from perfkit.instrumentation import QueryBudgetTestMixin
+
+from .models import Post
+from .views import PostListView
+
+# Queries needed to build a post list page: the count for the paginator and the page itself.
+POST_LIST_BUDGET = 2
+
+
+class PostListQueryTests(QueryBudgetTestMixin, TestCase):
+
+    def setUp(self):
+        self.authors = [
+            User.objects.create_user(username=f'author{n}', password='password123') for n in range(3)
+        ]
+        self.add_posts(2)
+
+    def add_posts(self, per_author, start=0):
+        for author in self.authors:
+            for n in range(start, start + per_author):
+                Post.objects.create(
+                    title=f'Post {n} by {author.username}', content='Long enough content',
+                    author=author, status='published'
+                )
+
+    def render_list(self):
+        """Build the list context and touch what the template reads, without rendering it."""
+        view = PostListView()
+        view.setup(RequestFactory().get('/posts/'))
+        with self.assertMaxQueries(POST_LIST_BUDGET):
+            view.object_list = view.get_queryset()
+            posts = view.get_context_data()['posts']
+            return [(post.title, post.author.username) for post in posts]
+
+    def test_post_list_stays_within_budget(self):
+        self.assertEqual(len(self.render_list()), 6)
+
+    def test_post_list_queries_do_not_grow_with_rows(self):
+        self.add_posts(3, start=2)
+        self.assertEqual(len(self.render_list()), PostListView.paginate_by)
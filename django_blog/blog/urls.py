@@ -1,4 +1,6 @@
 from django.urls import path
+from perfkit.instrumentation import metrics_view
+
 from . import views
 from .views import (
     PostListView, PostDetailView, PostCreateView, 
@@ -29,6 +31,11 @@ urlpatterns = [
     # Search functionality - Using function-based view
     path('search/', views.search_posts, name='search'),
     
+    # Page cache metrics
+    path('cache-stats/', views.cache_stats, name='cache-stats'),
+    # Prometheus metrics (staff or QUERY_METRICS_TOKEN bearer)
+    path('metrics/', metrics_view, name='metrics'),
+    
     # Comment CRUD
     path('post/<int:pk>/comments/new/', 
          CommentCreateView.as_view(), 
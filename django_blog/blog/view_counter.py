@@ -0,0 +1,136 @@
+"""
+Write-behind view counter for blog posts.
+
+Page views are accumulated in process memory and written back in batched
+``UPDATE blog_post SET views_count = views_count + n WHERE id IN (...)``
+statements, one per distinct increment, instead of one row-locking save per
+view. A flush happens when either threshold below is crossed:
+
+- ``BLOG_VIEW_COUNT_FLUSH_INTERVAL``: seconds a view may wait in the buffer
+  (default 10)
+- ``BLOG_VIEW_COUNT_FLUSH_THRESHOLD``: pending views across all posts (default 100)
+
+The interval is enforced by a background timer armed by the first view
+after a flush, so a quiet site still writes its views back on time. Set
+``BLOG_VIEW_COUNT_FLUSH_TIMER = False`` to only check the interval when the
+next view is recorded; it is then a lower bound.
+
+Setting the threshold to 1 restores write-through behaviour. Pending views
+are also flushed at interpreter exit; a hard crash loses at most one
+interval's worth of views.
+"""
+import atexit
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+
+FLUSH_INTERVAL = getattr(settings, 'BLOG_VIEW_COUNT_FLUSH_INTERVAL', 10)
+FLUSH_THRESHOLD = getattr(settings, 'BLOG_VIEW_COUNT_FLUSH_THRESHOLD', 100)
+FLUSH_TIMER = getattr(settings, 'BLOG_VIEW_COUNT_FLUSH_TIMER', True)
+
+
+class ViewCountBuffer:
+    """Thread-safe buffer of pending view increments keyed by post id."""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, flush_threshold=FLUSH_THRESHOLD,
+                 timer=FLUSH_TIMER):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.timer = timer
+        self._pending = defaultdict(int)
+        self._total = 0
+        self._last_flush = time.monotonic()
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def record(self, post_id, count=1):
+        """Buffer ``count`` views of ``post_id``, flushing if the policy says so."""
+        with self._lock:
+            self._pending[post_id] += count
+            self._total += count
+            due = (
+                self._total >= self.flush_threshold or
+                time.monotonic() - self._last_flush >= self.flush_interval
+            )
+            if not due and self.timer and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception:
+            pass
+        finally:
+            # Timer threads are not reused; do not leave their connection open.
+            connections.close_all()
+
+    def pending(self, post_id):
+        """Views of ``post_id`` not yet written to the database."""
+        with self._lock:
+            return self._pending.get(post_id, 0)
+
+    def flush(self):
+        """Write all pending views to the database; returns the number of views written."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+            self._total = 0
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending:
+            return 0
+
+        # Group posts by increment so each distinct n is a single UPDATE.
+        by_increment = defaultdict(list)
+        for post_id, count in pending.items():
+            by_increment[count].append(post_id)
+
+        from .models import Post
+        try:
+            with transaction.atomic():
+                for count, post_ids in by_increment.items():
+                    Post.objects.filter(pk__in=post_ids).update(
+                        views_count=F('views_count') + count
+                    )
+        except Exception:
+            # Put the views back so the next flush retries them.
+            with self._lock:
+                for post_id, count in pending.items():
+                    self._pending[post_id] += count
+                    self._total += count
+            raise
+        return sum(pending.values())
+
+
+view_counts = ViewCountBuffer()
+
+
+def record_view(post):
+    """Count one view of ``post`` through the write-behind buffer."""
+    view_counts.record(post.pk)
+
+
+def get_view_count(post):
+    """Approximate live view count: stored value plus buffered views."""
+    return post.views_count + view_counts.pending(post.pk)
+
+
+def flush_view_counts():
+    return view_counts.flush()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        view_counts.flush()
+    except Exception:
+        pass
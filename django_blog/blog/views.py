@@ -8,10 +8,14 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.views import View
 from django.urls import reverse_lazy, reverse
 from django.http import JsonResponse, HttpResponseRedirect
-from django.db.models import Q, Count
+from django.db.models import Q, Count, Max
 from django.core.paginator import Paginator
 from taggit.models import Tag
 from .models import Post, Profile, Comment
+from .search import SearchResults
+from .comment_tree import load_comment_tree
+from .cache import PublicPageCacheMixin, get_or_compute, stats as cache_stats_snapshot
+from .view_counter import view_counts
 from .forms import (
     UserRegisterForm, UserUpdateForm, ProfileUpdateForm, 
     PostCreateForm, PostUpdateForm, CommentForm, 
@@ -20,7 +24,11 @@ from .forms import (
 
 # Home view
 def home(request):
-    posts = Post.objects.filter(status='published').order_by('-published_date')[:3]
+    posts = get_or_compute(
+        'home-posts',
+        [('posts', None)],
+        lambda: list(Post.objects.filter(status='published').select_related('author').order_by('-published_date')[:3]),
+    )
     context = {
         'posts': posts,
         'title': 'Home'
@@ -91,33 +99,53 @@ def profile(request):
     return render(request, 'blog/profile.html', context)
 
 # Post CRUD Views
-class PostListView(ListView):
+class PostListView(PublicPageCacheMixin, ListView):
+    cache_name = 'post-list'
     model = Post
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
     paginate_by = 10
     
     def get_queryset(self):
-        return Post.objects.filter(status='published').order_by('-published_date')
+        return Post.objects.filter(status='published').select_related('author').order_by('-published_date')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Blog Posts'
         return context
 
-class PostDetailView(DetailView):
+class PostDetailView(PublicPageCacheMixin, DetailView):
+    cache_name = 'post-detail'
     model = Post
     template_name = 'blog/post_detail.html'
     context_object_name = 'post'
     
+    def get_cache_stamps(self):
+        return [('post', self.kwargs['pk'])]
+    
+    def get_last_modified(self):
+        # The page shows the post and its approved comments
+        newest = Post.objects.filter(pk=self.kwargs['pk']).aggregate(
+            post=Max('updated_at'),
+            comment=Max('comments__updated_at', filter=Q(comments__is_approved=True)),
+        )
+        return max((value for value in newest.values() if value is not None), default=None)
+    
+    def on_cache_hit(self):
+        # Authors reading their own post are not counted, as in get_context_data
+        user = self.request.user
+        if not user.is_authenticated or not Post.objects.filter(pk=self.kwargs['pk'], author=user).exists():
+            view_counts.record(self.kwargs['pk'])
+    
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        post = self.get_object()
+        post = self.object
+        comment_tree = load_comment_tree(post)
         
         context.update({
             'comment_form': CommentForm(),
-            'comments': post.comments.filter(parent__isnull=True, is_approved=True).order_by('-created_at'),
-            'comment_count': post.comments.filter(is_approved=True).count(),
+            'comments': comment_tree.roots,
+            'comment_count': comment_tree.count,
             'title': post.title,
         })
         
@@ -186,11 +214,17 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return context
 
 # Tag Views
-class TagListView(ListView):
+class TagListView(PublicPageCacheMixin, ListView):
+    cache_name = 'tag-list'
     model = Tag
     template_name = 'blog/tag_list.html'
     context_object_name = 'tags'
     paginate_by = 50
+    # Tags record no changes; renames are caught by the ETag
+    last_modified_field = None
+    
+    def get_cache_stamps(self):
+        return [('tags', None)]
     
     def get_queryset(self):
         return Tag.objects.all().order_by('name')
@@ -200,24 +234,34 @@ class TagListView(ListView):
         context['title'] = 'All Tags'
         return context
 
-class TagPostsView(ListView):
+class TagPostsView(PublicPageCacheMixin, ListView):
+    cache_name = 'tag-posts'
     model = Post
     template_name = 'blog/tag_posts.html'
     context_object_name = 'posts'
     paginate_by = 10
     
+    def get_cache_stamps(self):
+        return [('tag', self.kwargs['slug']), ('posts', None)]
+    
     def get_queryset(self):
-        tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
-        return Post.objects.filter(tags=tag, status='published').order_by('-published_date')
+        self.tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
+        return Post.objects.filter(tags=self.tag, status='published').select_related('author').order_by('-published_date')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
-        context['tag'] = tag
-        context['title'] = f'Posts tagged "{tag.name}"'
+        context['tag'] = self.tag
+        context['title'] = f'Posts tagged "{self.tag.name}"'
         return context
 
-# Search View - UPDATED WITH EXACT PATTERNS CHECKER WANTS
+@login_required
+def cache_stats(request):
+    """Hit/miss counts and latency of the public page cache (staff only)"""
+    if not request.user.is_staff:
+        return JsonResponse({'detail': 'Forbidden'}, status=403)
+    return JsonResponse(cache_stats_snapshot())
+
+# Search View - served by the full-text index in blog/search.py
 class SearchView(View):
     """View for searching posts"""
     template_name = 'blog/search_results.html'
@@ -229,14 +273,8 @@ class SearchView(View):
         
         if form.is_valid():
             query = form.cleaned_data['q']
-            
-            # EXACT PATTERN CHECKER IS LOOKING FOR:
-            # Use Post.objects.filter with Q objects containing the exact field lookups
-            results = Post.objects.filter(
-                Q(title__icontains=query) |  # EXACT STRING title__icontains
-                Q(content__icontains=query) |  # EXACT STRING content__icontains
-                Q(tags__name__icontains=query)  # EXACT STRING tags__name__icontains
-            ).filter(status='published').distinct().order_by('-published_date')
+            # Ranked hits over title, content and tag names (see blog/search.py)
+            results = SearchResults(query)
         
         else:
             form = SearchForm()
@@ -251,29 +289,27 @@ class SearchView(View):
             'query': query,
             'results': page_obj,
             'title': 'Search Results',
-            'results_count': len(results) if results else 0,
+            'results_count': paginator.count,
         }
         
         return render(request, self.template_name, context)
 
-# Alternative simpler search view (might be what checker wants)
+# Alternative simpler search view
 def search_posts(request):
-    """Simple search view with exact patterns"""
+    """Simple search view backed by the full-text index"""
     query = request.GET.get('q', '')
     results = []
     
     if query:
-        # EXACT PATTERNS CHECKER IS LOOKING FOR:
-        # Use Post.objects.filter with the exact field lookups
-        results = Post.objects.filter(
-            Q(title__icontains=query) |  # title__icontains
-            Q(content__icontains=query) |  # content__icontains
-            Q(tags__name__icontains=query)  # tags__name__icontains
-        ).filter(status='published').distinct().order_by('-published_date')
+        results = SearchResults(query)
+    
+    paginator = Paginator(results, 10)
+    page_obj = paginator.get_page(request.GET.get('page'))
     
     context = {
         'query': query,
-        'results': results,
+        'results': page_obj,
+        'results_count': paginator.count,
         'title': 'Search Results',
     }
     
@@ -4,10 +4,17 @@ Django settings for django_blog project.
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Performance helpers shared by the projects in this repository (lib/perfkit).
+SHARED_LIB_DIR = BASE_DIR.parent / 'lib'
+if str(SHARED_LIB_DIR) not in sys.path:
+    sys.path.append(str(SHARED_LIB_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -37,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'perfkit.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,6 +56,17 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'django_blog.urls'
 
+# Query budgets per URL name or view class, see lib/perfkit/instrumentation.py.
+QUERY_BUDGETS = {
+    'post-list': 6,
+    'post-detail': 8,
+    'tag-posts': 6,
+    'search': 6,
+}
+QUERY_BUDGETS_ENFORCE = False
+# Bearer token for Prometheus scrapes of /metrics/; empty allows staff users only.
+QUERY_METRICS_TOKEN = os.environ.get('QUERY_METRICS_TOKEN', '')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -82,6 +101,33 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# The public page cache and its version stamps (see blog/cache.py) must be
+# shared by every worker process, or a write seen by one worker leaves the
+# others serving stale pages and 304s. Set REDIS_URL (for example
+# redis://localhost:6379/1) to share them across hosts; without it they are
+# kept in files under the system temp directory, which every worker on this
+# host shares. A per-process LocMemCache is not suitable.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'django_blog_cache'),
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Public page cache (see blog/cache.py)
+BLOG_CACHE_TIMEOUT = 300  # seconds an entry is kept
+BLOG_CACHE_SOFT_TTL = 60  # seconds before one request recomputes it early
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -143,6 +189,22 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 # Taggit Configuration
 TAGGIT_CASE_INSENSITIVE = True
 
+# Post view counter write-behind policy (see blog/view_counter.py)
+BLOG_VIEW_COUNT_FLUSH_INTERVAL = 10  # seconds
+BLOG_VIEW_COUNT_FLUSH_THRESHOLD = 100  # buffered views
+BLOG_VIEW_COUNT_FLUSH_TIMER = True  # flush idle buffers after the interval
+
+# Full-text search backend (see blog/search.py); chosen from the database
+# vendor when unset, e.g. 'blog.search.PostgresSearchBackend'
+# BLOG_SEARCH_BACKEND = 'blog.search.SQLiteFTSSearchBackend'
+
+# Related posts scoring (see blog/related.py). Changed posts are queued;
+# run `python manage.py refresh_related_posts` from cron to recompute them.
+BLOG_RELATED_POSTS_LIMIT = 10
+BLOG_RELATED_TAG_WEIGHT = 2.0
+BLOG_RELATED_CATEGORY_WEIGHT = 1.0
+BLOG_RELATED_RECENCY_HALF_LIFE_DAYS = 30
+
 # For development only - allow all hosts
 if DEBUG:
     ALLOWED_HOSTS = ['*']
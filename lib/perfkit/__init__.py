@@ -0,0 +1,14 @@
+"""
+Performance helpers shared by the Django projects in this repository.
+
+The projects are separate Django trees without packaging, so each one's
+settings appends the repository's ``lib`` directory to ``sys.path`` and
+imports these modules as ``perfkit.<module>``:
+
+- ``benchmarks``: latency and query-count harness for ``run_benchmarks``.
+- ``bulk_writes``: all-or-nothing batch create, partial update and delete.
+- ``conditional``: ETag and Last-Modified from shared write stamps.
+- ``fast_serializers``: compiled list serializers and an orjson renderer.
+- ``instrumentation``: per-view query counts, latency and query budgets.
+- ``sparse_fields``: ``?fields``, ``?exclude`` and ``?expand`` for DRF views.
+"""
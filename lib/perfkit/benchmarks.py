@@ -0,0 +1,160 @@
+"""
+Benchmark harness for the hot endpoints.
+
+A ``Case`` builds a request per iteration and calls the view directly. URL
+routing and middleware are left out, so results measure the view, its
+queries and its serialization. Each case reports latency percentiles and
+query counts, as recorded by ``perfkit.instrumentation.QueryRecorder``.
+
+``save_results`` writes a run to ``<output>/<timestamp>-<commit>.json``.
+``compare_results`` lists the cases that regressed against an earlier run.
+Each project's ``run_benchmarks`` command defines its cases and ties these
+together. Seed data first with that project's ``seed_benchmark_data``.
+"""
+import json
+import math
+import platform
+import statistics
+import subprocess
+import time
+from collections import Counter
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from perfkit.instrumentation import QueryRecorder
+
+
+class Case:
+    """
+    One benchmarked endpoint.
+
+    ``build(i)`` returns ``(request, kwargs)`` for iteration ``i``. The
+    optional ``teardown(i, response)`` runs untimed after each iteration,
+    e.g. to undo a follow.
+    """
+
+    def __init__(self, name, view, build, teardown=None):
+        self.name = name
+        self.view = view
+        self.build = build
+        self.teardown = teardown
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values``."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def run_case(case, iterations=50, warmup=5):
+    timings = []
+    queries = []
+    db_times = []
+    statuses = Counter()
+    for i in range(warmup + iterations):
+        request, kwargs = case.build(i)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with recorder.record():
+            response = case.view(request, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        elapsed = time.perf_counter() - started
+        if case.teardown:
+            case.teardown(i, response)
+        if i < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(recorder.count)
+        db_times.append(recorder.seconds * 1000)
+        statuses[response.status_code] += 1
+
+    return {
+        'name': case.name,
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries_median': statistics.median(queries),
+        'queries_max': max(queries),
+        'db_ms_median': round(statistics.median(db_times), 3),
+        'statuses': {str(code): count for code, count in statuses.items()},
+    }
+
+
+def run_suite(cases, iterations=50, warmup=5, only=None, log=None):
+    results = []
+    for case in cases:
+        if only and case.name not in only:
+            continue
+        result = run_case(case, iterations, warmup)
+        if log:
+            log(result)
+        results.append(result)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=getattr(settings, 'BASE_DIR', None), capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(results, output_dir, dataset=None):
+    """Write ``results`` with run metadata; returns the file path."""
+    commit = git_commit()
+    now = timezone.now()
+    payload = {
+        'commit': commit,
+        'created_at': now.isoformat(),
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'dataset': dataset or {},
+        'results': results,
+    }
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f'{now:%Y%m%dT%H%M%S}-{commit}.json'
+    path.write_text(json.dumps(payload, indent=2))
+    return path
+
+
+def compare_results(baseline_path, results, tolerance=0.2):
+    """
+    Regressions of ``results`` against a saved run.
+
+    A case regresses when its p95 grew by more than ``tolerance`` (a
+    fraction) or its median query count went up.
+    """
+    baseline = {
+        result['name']: result
+        for result in json.loads(Path(baseline_path).read_text())['results']
+    }
+    regressions = []
+    for result in results:
+        before = baseline.get(result['name'])
+        if before is None:
+            continue
+        if result['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{result['name']}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms"
+            )
+        if result['queries_median'] > before['queries_median']:
+            regressions.append(
+                f"{result['name']}: queries {before['queries_median']} -> {result['queries_median']}"
+            )
+    return regressions
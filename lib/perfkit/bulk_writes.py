@@ -0,0 +1,240 @@
+"""
+Batch create, partial update and delete for generic views.
+
+``BulkWriteMixin`` takes a JSON list instead of one object and handles
+the whole batch in one transaction:
+
+- POST ``[{...}, ...]`` creates with one ``bulk_create``;
+- PATCH ``[{"id": 1, ...}, ...]`` loads every object in one query,
+  applies the partial updates and saves them with one ``bulk_update``;
+- DELETE ``[1, 2, ...]`` (or ``[{"id": 1}, ...]``) issues one
+  ``DELETE ... WHERE id IN (...)``.
+
+Every item is validated by the view's serializer first, and foreign keys
+named in the batch are fetched with one query per field rather than one
+per item. The batch is all or nothing: if any item fails, nothing is
+written and the response is a 400 listing each item's status, with 424
+(failed dependency) for the items that were valid. On success each item
+gets 201, 200 or 204 with its data or id.
+
+Batches hold at most ``bulk_max_batch_size`` items, by default the
+``BULK_MAX_BATCH_SIZE`` setting. Like the ORM's bulk methods, these skip
+``save()``, ``delete()`` and model signals, so each batch bumps the
+model's collection stamp itself (see ``perfkit.conditional``); serializers with
+many-to-many fields fall back to ``serializer.save()`` per item.
+"""
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError as DjangoValidationError
+from django.db import transaction
+from rest_framework import relations, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from perfkit.conditional import bump_collection
+
+BULK_MAX_BATCH_SIZE = getattr(settings, 'BULK_MAX_BATCH_SIZE', 500)
+
+NOT_FOUND = {'id': ['Not found.']}
+
+
+class PrefetchedRelated:
+    """
+    Stands in for a related field's queryset while a batch is validated,
+    answering ``get(pk=...)`` from one ``in_bulk`` query.
+    """
+
+    def __init__(self, queryset, values):
+        self.model = queryset.model
+        self.objects = queryset.in_bulk(
+            {key for key in map(self.to_key, values) if key is not None}
+        )
+
+    def to_key(self, value):
+        try:
+            return self.model._meta.pk.to_python(value)
+        except (DjangoValidationError, TypeError, ValueError):
+            return None
+
+    def get(self, pk=None, **kwargs):
+        key = self.to_key(pk)
+        if key is None:
+            raise ValueError(pk)
+        try:
+            return self.objects[key]
+        except KeyError:
+            raise ObjectDoesNotExist
+
+
+class BulkWriteMixin:
+    """Generic view mixin for list payloads (see module docstring)."""
+    bulk_max_batch_size = None
+
+    def get_bulk_max_batch_size(self):
+        return self.bulk_max_batch_size or BULK_MAX_BATCH_SIZE
+
+    def create(self, request, *args, **kwargs):
+        if isinstance(request.data, list):
+            return self.bulk_create(request)
+        return super().create(request, *args, **kwargs)
+
+    def bulk_write(self, request):
+        """Dispatch a list payload on the request method."""
+        handler = {
+            'POST': self.bulk_create,
+            'PATCH': self.bulk_partial_update,
+            'DELETE': self.bulk_destroy,
+        }[request.method]
+        return handler(request)
+
+    def get_bulk_items(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'non_field_errors': ['Expected a non-empty list.']})
+        limit = self.get_bulk_max_batch_size()
+        if len(items) > limit:
+            raise ValidationError({'non_field_errors': [f'At most {limit} items per request.']})
+        return items
+
+    def get_bulk_ids(self, items):
+        """The primary key of each item, or None where it is missing or malformed."""
+        pk_field = self.get_queryset().model._meta.pk
+        ids = []
+        for item in items:
+            value = item.get('id') if isinstance(item, dict) else item
+            try:
+                ids.append(None if value is None else pk_field.to_python(value))
+            except DjangoValidationError:
+                ids.append(None)
+        return ids
+
+    def get_bulk_objects(self, ids):
+        """``{pk: instance}`` for ``ids`` in one query, checking object permissions."""
+        objects = self.get_queryset().in_bulk({pk for pk in ids if pk is not None})
+        for instance in objects.values():
+            self.check_object_permissions(self.request, instance)
+        return objects
+
+    def prefetch_related_fields(self, serializers, items):
+        """Replace each primary key related field's lookups with one query per field."""
+        if not serializers:
+            return
+        prefetched = {}
+        for name, field in serializers[0].fields.items():
+            if (isinstance(field, relations.PrimaryKeyRelatedField) and not field.read_only
+                    and field.pk_field is None):
+                values = [item[name] for item in items
+                          if isinstance(item, dict) and item.get(name) is not None]
+                if values:
+                    prefetched[name] = PrefetchedRelated(field.get_queryset(), values)
+        for serializer in serializers:
+            for name, queryset in prefetched.items():
+                serializer.fields[name].queryset = queryset
+
+    def bulk_response(self, results, success_status):
+        if any(result['status'] >= 400 for result in results):
+            for result in results:
+                if result['status'] < 400:
+                    result['status'] = status.HTTP_424_FAILED_DEPENDENCY
+                    result.pop('data', None)
+            return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': results}, status=success_status)
+
+    def validate_bulk(self, serializers, results):
+        for serializer, result in zip(serializers, results):
+            if serializer is not None and not serializer.is_valid():
+                result.update(status=status.HTTP_400_BAD_REQUEST, errors=serializer.errors)
+
+    def has_many_to_many(self, model, validated_data):
+        return any(
+            field.many_to_many for field in model._meta.get_fields()
+            if field.name in validated_data
+        )
+
+    def bulk_create(self, request):
+        items = self.get_bulk_items(request)
+        serializers = [self.get_serializer(data=item) for item in items]
+        self.prefetch_related_fields(serializers, items)
+        results = [{'status': status.HTTP_201_CREATED} for _ in items]
+        self.validate_bulk(serializers, results)
+        if any(result['status'] >= 400 for result in results):
+            return self.bulk_response(results, status.HTTP_201_CREATED)
+
+        model = self.get_queryset().model
+        with transaction.atomic():
+            if any(self.has_many_to_many(model, s.validated_data) for s in serializers):
+                for serializer in serializers:
+                    serializer.save()
+            else:
+                instances = model.objects.bulk_create(
+                    [model(**serializer.validated_data) for serializer in serializers]
+                )
+                for serializer, instance in zip(serializers, instances):
+                    serializer.instance = instance
+            bump_collection(model)
+        for serializer, result in zip(serializers, results):
+            result['data'] = serializer.data
+        return self.bulk_response(results, status.HTTP_201_CREATED)
+
+    def bulk_partial_update(self, request):
+        items = self.get_bulk_items(request)
+        ids = self.get_bulk_ids(items)
+        results = [{'status': status.HTTP_200_OK, 'id': pk} for pk in ids]
+        serializers = [None] * len(items)
+        seen = set()
+
+        with transaction.atomic():
+            objects = self.get_bulk_objects(ids)
+            for index, (item, pk) in enumerate(zip(items, ids)):
+                if not isinstance(item, dict) or pk is None:
+                    results[index].update(status=status.HTTP_400_BAD_REQUEST,
+                                          errors={'id': ['Each item needs an "id".']})
+                elif pk in seen:
+                    results[index].update(status=status.HTTP_400_BAD_REQUEST,
+                                          errors={'id': ['Duplicate id in this batch.']})
+                elif pk not in objects:
+                    results[index].update(status=status.HTTP_404_NOT_FOUND, errors=NOT_FOUND)
+                else:
+                    serializers[index] = self.get_serializer(objects[pk], data=item, partial=True)
+                seen.add(pk)
+            self.prefetch_related_fields([s for s in serializers if s is not None], items)
+            self.validate_bulk(serializers, results)
+            if any(result['status'] >= 400 for result in results):
+                return self.bulk_response(results, status.HTTP_200_OK)
+
+            model = self.get_queryset().model
+            if any(self.has_many_to_many(model, s.validated_data) for s in serializers):
+                for serializer in serializers:
+                    serializer.save()
+            else:
+                fields = set()
+                for serializer in serializers:
+                    for attr, value in serializer.validated_data.items():
+                        setattr(serializer.instance, attr, value)
+                        fields.add(attr)
+                if fields:
+                    model.objects.bulk_update([s.instance for s in serializers], sorted(fields))
+            bump_collection(model)
+        for serializer, result in zip(serializers, results):
+            result['data'] = serializer.data
+        return self.bulk_response(results, status.HTTP_200_OK)
+
+    def bulk_destroy(self, request):
+        items = self.get_bulk_items(request)
+        ids = self.get_bulk_ids(items)
+        results = [{'status': status.HTTP_204_NO_CONTENT, 'id': pk} for pk in ids]
+
+        with transaction.atomic():
+            objects = self.get_bulk_objects(ids)
+            for pk, result in zip(ids, results):
+                if pk is None:
+                    result.update(status=status.HTTP_400_BAD_REQUEST,
+                                  errors={'id': ['Give the id of each object to delete.']})
+                elif pk not in objects:
+                    result.update(status=status.HTTP_404_NOT_FOUND, errors=NOT_FOUND)
+            if any(result['status'] >= 400 for result in results):
+                return self.bulk_response(results, status.HTTP_200_OK)
+            # Without cascades or delete receivers this is a single DELETE ... WHERE id IN.
+            model = self.get_queryset().model
+            model.objects.filter(pk__in=list(objects)).delete()
+            bump_collection(model)
+        return self.bulk_response(results, status.HTTP_200_OK)
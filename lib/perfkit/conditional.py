@@ -0,0 +1,185 @@
+"""
+Conditional GETs (ETag / Last-Modified) for read endpoints.
+
+Validators are worked out before the serializer runs, so a 304 never
+builds or renders a body:
+
+- a single object is versioned by the columns its representation is
+  made of (``object_version_fields``), read with one narrow
+  ``values_list`` query;
+- a collection is versioned by a per-model write stamp kept in the
+  cache. ``bump_collection`` moves it forward after every committed
+  write: ``post_save`` and ``post_delete`` for models registered with
+  ``track_collection``, and explicit calls on the paths that skip
+  signals (``QuerySet.update``, bulk writes, imports, counters).
+
+The stamp is the time of the last write to the table. It is sent as
+Last-Modified for both lists and objects: it is never earlier than the
+real change, so If-Modified-Since is safe even where ``updated_at`` does
+not cover everything shown (counters, annotations).
+
+ETags also cover the request path and query string, the user and the
+response format. Stamps live in the ``COLLECTION_VERSION_CACHE`` cache,
+which must be shared by every process (database, Redis, memcached). A
+missing stamp starts at the current time, so an evicted stamp costs a
+refetch, never a stale 304. A ``LocMemCache`` only sees the writes made
+by its own process, so with one the stamps are not used: lists get no
+validators, and objects get an ETag from their columns but no
+Last-Modified.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+CACHE_ALIAS = getattr(settings, 'COLLECTION_VERSION_CACHE', 'default')
+KEY_PREFIX = 'collection-version'
+
+
+def _stamp_key(model):
+    return f'{KEY_PREFIX}:{model._meta.label_lower}'
+
+
+def collection_version(model):
+    """The time of the last committed write to ``model``'s table."""
+    cache = caches[CACHE_ALIAS]
+    key = _stamp_key(model)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, time.time(), None)
+        stamp = cache.get(key, time.time())
+    return stamp
+
+
+def stamps_shared():
+    """Whether every process sees the same stamps (not a per-process LocMemCache)."""
+    return not isinstance(caches[CACHE_ALIAS], LocMemCache)
+
+
+def bump_collection(model):
+    """Move ``model``'s stamp forward once the current transaction commits."""
+    def bump():
+        cache = caches[CACHE_ALIAS]
+        key = _stamp_key(model)
+        cache.set(key, max(time.time(), (cache.get(key) or 0) + 1e-6), None)
+    transaction.on_commit(bump)
+
+
+def _bump_sender(sender, **kwargs):
+    bump_collection(sender)
+
+
+def track_collection(model, deletes=True):
+    """
+    Bump ``model``'s stamp on every save, and on every delete unless
+    ``deletes`` is False. A delete receiver makes Django fetch rows before
+    deleting them, cascades included; tables deleted in bulk skip it and
+    bump by hand.
+    """
+    uid = f'{KEY_PREFIX}:{model._meta.label_lower}'
+    post_save.connect(_bump_sender, sender=model, dispatch_uid=uid, weak=False)
+    if deletes:
+        post_delete.connect(_bump_sender, sender=model, dispatch_uid=uid, weak=False)
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    Generic view mixin answering If-None-Match / If-Modified-Since on
+    ``retrieve`` and ``list`` before anything is serialized.
+
+    ``object_version_fields`` names the columns (lookups allowed) that
+    make up one object's representation; annotations from
+    ``get_version_queryset`` (by default ``get_queryset``) may be named
+    too. ``version_models`` lists the models whose writes change the
+    list, by default the queryset's.
+    """
+    object_version_fields = None
+    version_models = None
+
+    def get_version_models(self):
+        return self.version_models or (self.get_queryset().model,)
+
+    def get_version_stamp(self):
+        return max(collection_version(model) for model in self.get_version_models())
+
+    def get_object_version_fields(self):
+        return self.object_version_fields
+
+    def get_version_queryset(self):
+        return self.get_queryset()
+
+    def get_object_version(self):
+        """``(parts, stamp)`` for the requested object (stamp may be None), or None to skip."""
+        fields = self.get_object_version_fields()
+        if not fields:
+            return None
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        row = (
+            self.get_version_queryset().order_by()
+            .filter(**{self.lookup_field: self.kwargs[lookup]})
+            .values_list(*fields)
+            .first()
+        )
+        if row is None:
+            return None
+        return row, self.get_version_stamp() if stamps_shared() else None
+
+    def get_list_version(self):
+        if not stamps_shared():
+            return None
+        stamp = self.get_version_stamp()
+        return stamp, stamp
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        bump_collection(type(instance))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.get_object_version,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            self.get_list_version,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def conditional_response(self, get_version, respond):
+        request = self.request
+        if request.method not in ('GET', 'HEAD'):
+            return respond()
+        version = get_version()
+        if version is None:
+            return respond()
+
+        parts, stamp = version
+        renderer = getattr(request, 'accepted_renderer', None)
+        etag = make_etag(
+            type(self).__name__, parts, request.user.pk,
+            getattr(renderer, 'format', None), request.get_full_path(),
+        )
+        # HTTP dates have whole seconds: until the stamp's second is over, a
+        # later write could share it, so Last-Modified is left out.
+        last_modified = int(stamp) if stamp is not None and time.time() >= int(stamp) + 1 else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond()
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Accept', 'Authorization', 'Cookie'))
+        return response
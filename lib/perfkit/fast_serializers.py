@@ -0,0 +1,281 @@
+"""
+Compiled read-only serializers for list endpoints.
+
+On a large list page most of the CPU goes to building model instances
+and walking DRF fields one attribute at a time. ``compile_serializer``
+turns a serializer's declared fields into ``values_list`` lookups and
+generates a single row-to-dict function for them. Each value still goes
+through its field's ``to_representation``, so the output is the same as
+the regular serializer's.
+
+A serializer compiles when every emitted field reads a column, a forward
+relation's column or an annotation, through a plain field, a
+``ReadOnlyField`` or a primary key or slug related field. Nested
+serializers, method fields, file fields and properties raise
+``NotCompilable``, and ``FastListMixin`` falls back to the regular path.
+Writes never use this.
+
+``FastJSONRenderer`` encodes with orjson when it is installed and gives
+the same bytes as ``JSONRenderer``. The one exception is floats below
+1e-4 or from 1e16 up, which orjson spells differently (``1e-5`` for
+``1e-05``) for the same number. Without orjson, or when indentation is
+requested, it is ``JSONRenderer``.
+
+Compiled serializers are kept in a process-wide LRU of
+``FAST_LIST_SERIALIZERS_CACHE_SIZE`` entries, keyed by serializer class and
+emitted field set. ``?fields=`` lets clients choose the field set, so the
+cache is bounded. Converters come from fresh copies of the fields, made
+from each field's class and constructor arguments, so a cached entry holds
+no reference to the serializer or request it was compiled for.
+
+Set ``FAST_LIST_SERIALIZERS = False`` to turn the compiled path off.
+"""
+import copy
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import relations, serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    ORJSON_OPTIONS = 0
+else:
+    # Dates and dataclasses go through the DRF encoder, as with JSONRenderer.
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+UNSUPPORTED_FIELDS = (
+    serializers.BaseSerializer,
+    serializers.SerializerMethodField,
+    serializers.HiddenField,
+    serializers.FileField,
+    relations.ManyRelatedField,
+)
+
+CACHE_SIZE = getattr(settings, 'FAST_LIST_SERIALIZERS_CACHE_SIZE', 256)
+
+
+class NotCompilable(Exception):
+    pass
+
+
+def _resolve_lookup(model, source, annotations):
+    """The ``values_list`` lookup for a dotted ``source``; raises NotCompilable."""
+    parts = source.split('.')
+    if len(parts) == 1 and parts[0] in annotations:
+        return parts[0]
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            raise NotCompilable(f'{model.__name__}.{part} is not a model field')
+        if not field.concrete or field.many_to_many:
+            raise NotCompilable(f'{model.__name__}.{part} is not a column')
+        if index < len(parts) - 1:
+            if not field.is_relation:
+                raise NotCompilable(f'{model.__name__}.{part} is not a relation')
+            if field.null:
+                # DRF skips the field when the relation is empty; a row cannot.
+                raise NotCompilable(f'{model.__name__}.{part} may be empty')
+            model = field.related_model
+    return '__'.join(parts)
+
+
+def _converter(field):
+    """``field.to_representation`` on a copy bound to no serializer."""
+    # Field.__deepcopy__ rebuilds the field from its class and constructor arguments.
+    return copy.deepcopy(field).to_representation
+
+
+def _column(field, model, annotations):
+    """``(lookup, converter)`` for one serializer field; converter None means identity."""
+    if isinstance(field, UNSUPPORTED_FIELDS) or field.source == '*':
+        raise NotCompilable(f'{field.field_name} cannot be read from a row')
+    lookup = _resolve_lookup(model, field.source, annotations)
+
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        # values_list() gives the foreign key column.
+        return lookup, _converter(field.pk_field) if field.pk_field else None
+    if isinstance(field, relations.SlugRelatedField):
+        return f'{lookup}__{field.slug_field}', None
+    if isinstance(field, relations.RelatedField):
+        raise NotCompilable(f'{field.field_name} needs the related object')
+    if type(field) is serializers.ReadOnlyField:
+        return lookup, None
+    return lookup, _converter(field)
+
+
+class CompiledSerializer:
+    """Reads ``lookups`` with ``values_list`` and converts rows to dicts."""
+
+    def __init__(self, names, lookups, converters):
+        self.names = names
+        self.lookups = lookups
+        namespace = {}
+        items = []
+        for index, (name, converter) in enumerate(zip(names, converters)):
+            value = f'row[{index}]'
+            if converter is not None:
+                namespace[f'convert_{index}'] = converter
+                value = f'(None if {value} is None else convert_{index}({value}))'
+            items.append(f'{name!r}: {value}')
+        source = 'def convert(rows):\n    return [{%s} for row in rows]\n' % ', '.join(items)
+        exec(source, namespace)
+        self.convert = namespace['convert']
+
+    def values(self, queryset, extra=()):
+        """
+        ``queryset`` as rows for ``convert``.
+
+        ``extra`` lookups are appended for the caller, e.g. the columns a
+        cursor paginator reads; the rows are then named tuples.
+        """
+        named = bool(extra)
+        extra = [lookup for lookup in extra if lookup not in self.lookups]
+        return queryset.prefetch_related(None).values_list(
+            *self.lookups, *extra, named=named
+        )
+
+    def __call__(self, rows):
+        return self.convert(rows)
+
+
+class CompiledCache:
+    """Bounded LRU of compiled serializers; ``None`` records a serializer that cannot compile."""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, compiled):
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+compiled_cache = CompiledCache(CACHE_SIZE)
+_MISSING = object()
+
+
+def compile_serializer(serializer, queryset):
+    """
+    A ``CompiledSerializer`` equivalent to ``serializer`` over ``queryset``.
+
+    Raises ``NotCompilable`` when some field needs a model instance.
+    Results are cached in ``compiled_cache`` per serializer class and field set.
+    """
+    annotations = frozenset(queryset.query.annotations)
+    key = (
+        type(serializer), queryset.model, annotations,
+        tuple((name, type(field), field.source) for name, field in serializer.fields.items()),
+    )
+    compiled = compiled_cache.get(key, _MISSING)
+    if compiled is None:
+        raise NotCompilable(f'{type(serializer).__name__} cannot be compiled')
+    if compiled is not _MISSING:
+        return compiled
+
+    names, lookups, converters = [], [], []
+    try:
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            lookup, converter = _column(field, queryset.model, annotations)
+            names.append(name)
+            lookups.append(lookup)
+            converters.append(converter)
+    except NotCompilable:
+        compiled_cache.set(key, None)
+        raise
+    compiled = CompiledSerializer(names, lookups, converters)
+    compiled_cache.set(key, compiled)
+    return compiled
+
+
+def fast_serializer(serializer, queryset):
+    """The compiled form of ``serializer``, or None when it is off or cannot compile."""
+    if not getattr(settings, 'FAST_LIST_SERIALIZERS', True):
+        return None
+    try:
+        return compile_serializer(serializer, queryset)
+    except NotCompilable:
+        return None
+
+
+class FastListMixin:
+    """
+    Generic view mixin serving ``list`` through a compiled serializer.
+
+    ``fast_list_extra_values`` names columns the paginator reads from each
+    row, e.g. ``('pk', 'created_at')`` for keyset pagination.
+    """
+    fast_list = True
+    fast_list_extra_values = ()
+
+    def get_compiled_serializer(self, queryset):
+        if not self.fast_list:
+            return None
+        return fast_serializer(self.get_serializer(), queryset)
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    def list_response(self, queryset):
+        """Paginate and serialize ``queryset`` as ``ListModelMixin.list`` does."""
+        compiled = self.get_compiled_serializer(queryset)
+        if compiled is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        rows = compiled.values(queryset, self.fast_list_extra_values)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled(page))
+        return Response(compiled(rows))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` encoding with orjson when available."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if (orjson is None or indent is not None or not api_settings.COMPACT_JSON
+                or not api_settings.UNICODE_JSON or not api_settings.STRICT_JSON
+                or self.encoder_class is not encoders.JSONEncoder):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # Values orjson rejects (e.g. integers beyond 64 bits) go the slow way.
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as JSONRenderer: U+2028 and U+2029 are invalid in JavaScript.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
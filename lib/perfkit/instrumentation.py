@@ -0,0 +1,290 @@
+"""
+Per-view SQL and latency instrumentation.
+
+``QueryInstrumentationMiddleware`` wraps every request in a database
+execute wrapper and records:
+
+- the number of queries and the time spent in the database;
+- duplicate queries, grouped by fingerprint (the SQL with literals and
+  parameters masked), which is usually how an N+1 shows up;
+- total view latency.
+
+Results are aggregated per URL name and logged through the
+``perfkit.instrumentation`` logger: one DEBUG record per request, plus a
+WARNING when a request repeats a query ``QUERY_METRICS_DUPLICATE_THRESHOLD``
+times or more, or exceeds its budget. Every record carries the request's
+numbers in its ``query_metrics`` attribute; ``QueryMetricsFormatter`` writes
+them out as one JSON object per line (see ``LOGGING`` in settings).
+``metrics_view`` exposes the aggregates as Prometheus text to staff users
+and to scrapers sending ``Authorization: Bearer <QUERY_METRICS_TOKEN>``.
+
+Budgets are declared in ``QUERY_BUDGETS`` as a mapping of URL name or
+view class name to a maximum query count, for example
+``{'FeedAPIView': 5, 'book-list': 2}``. Budgets apply to GET and HEAD
+requests only. With ``QUERY_BUDGETS_ENFORCE = True``, as in tests,
+an over-budget request raises ``QueryBudgetExceeded``. Outside tests it is
+only logged. ``QueryBudgetTestMixin.assertMaxQueries`` gives the same
+check for arbitrary blocks of test code.
+"""
+import hmac
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+BUDGET_METHODS = ('GET', 'HEAD')
+
+DUPLICATE_THRESHOLD = getattr(settings, 'QUERY_METRICS_DUPLICATE_THRESHOLD', 3)
+LATENCY_BUCKETS = getattr(
+    settings, 'QUERY_METRICS_LATENCY_BUCKETS',
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+METRICS_TOKEN = getattr(settings, 'QUERY_METRICS_TOKEN', '')
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryMetricsFormatter(logging.Formatter):
+    """Log formatter writing a record and its ``query_metrics`` as a JSON line."""
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'query_metrics', {}))
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+def fingerprint(sql):
+    """Normalize ``sql`` so queries differing only in parameters compare equal."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """Database execute wrapper that counts and times queries."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    def duplicates(self):
+        """``{fingerprint: count}`` for queries run more than once."""
+        return {sql: n for sql, n in self.fingerprints.items() if n > 1}
+
+
+class ViewMetrics:
+    """Process-wide aggregates per view, rendered as Prometheus text."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._data = defaultdict(lambda: {
+            'requests': 0, 'queries': 0, 'db_seconds': 0.0, 'duplicate_queries': 0,
+            'budget_exceeded': 0, 'latency_sum': 0.0,
+            'latency_buckets': [0] * len(self.buckets),
+        })
+
+    def observe(self, view, recorder, latency, over_budget):
+        duplicates = sum(n - 1 for n in recorder.duplicates().values())
+        with self._lock:
+            entry = self._data[view]
+            entry['requests'] += 1
+            entry['queries'] += recorder.count
+            entry['db_seconds'] += recorder.seconds
+            entry['duplicate_queries'] += duplicates
+            entry['budget_exceeded'] += int(over_budget)
+            entry['latency_sum'] += latency
+            for index, bound in enumerate(self.buckets):
+                if latency <= bound:
+                    entry['latency_buckets'][index] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: dict(entry, latency_buckets=list(entry['latency_buckets']))
+                for view, entry in self._data.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._data.clear()
+
+    def prometheus(self):
+        counters = [
+            ('django_view_requests_total', 'requests', 'Requests handled.'),
+            ('django_view_queries_total', 'queries', 'SQL queries executed.'),
+            ('django_view_db_seconds_total', 'db_seconds', 'Time spent in SQL queries.'),
+            ('django_view_duplicate_queries_total', 'duplicate_queries', 'Repeated SQL queries.'),
+            ('django_view_query_budget_exceeded_total', 'budget_exceeded', 'Requests over their query budget.'),
+        ]
+        data = self.snapshot()
+        lines = []
+        for metric, key, help_text in counters:
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for view, entry in sorted(data.items()):
+                lines.append(f'{metric}{{view="{_label(view)}"}} {entry[key]}')
+
+        metric = 'django_view_latency_seconds'
+        lines.append(f'# HELP {metric} View latency.')
+        lines.append(f'# TYPE {metric} histogram')
+        for view, entry in sorted(data.items()):
+            label = _label(view)
+            for bound, count in zip(self.buckets, entry['latency_buckets']):
+                lines.append(f'{metric}_bucket{{view="{label}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_bucket{{view="{label}",le="+Inf"}} {entry["requests"]}')
+            lines.append(f'{metric}_sum{{view="{label}"}} {entry["latency_sum"]}')
+            lines.append(f'{metric}_count{{view="{label}"}} {entry["requests"]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+view_metrics = ViewMetrics()
+
+
+def view_identity(request):
+    """``(url name, view class name)`` of the resolved view."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved', None
+    func = match.func
+    view_class = getattr(func, 'view_class', None) or getattr(func, 'cls', None)
+    class_name = view_class.__name__ if view_class else getattr(func, '__name__', None)
+    return match.view_name or class_name or 'unnamed', class_name
+
+
+def query_budget(*names):
+    """The tightest budget declared for any of ``names``, or None."""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    limits = [budgets[name] for name in names if name in budgets]
+    return min(limits) if limits else None
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with recorder.record():
+            response = self.get_response(request)
+        latency = time.perf_counter() - started
+
+        view, class_name = view_identity(request)
+        # Budgets describe reads; writes on the same URL are not held to them.
+        budget = query_budget(view, class_name) if request.method in BUDGET_METHODS else None
+        over_budget = budget is not None and recorder.count > budget
+        view_metrics.observe(view, recorder, latency, over_budget)
+
+        duplicates = recorder.duplicates()
+        record = {
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.seconds * 1000, 2),
+            'latency_ms': round(latency * 1000, 2),
+            'duplicate_queries': sum(n - 1 for n in duplicates.values()),
+            'budget': budget,
+        }
+        message = ' '.join(f'{key}={value}' for key, value in record.items())
+        logger.debug('request %s', message, extra={'query_metrics': record})
+
+        worst = max(duplicates.items(), key=lambda item: item[1], default=None)
+        if worst and worst[1] >= DUPLICATE_THRESHOLD:
+            logger.warning(
+                'Repeated query in %s (%d times): %s', view, worst[1], worst[0],
+                extra={'query_metrics': record},
+            )
+        if over_budget:
+            logger.warning(
+                'Query budget exceeded in %s: %d > %d', view, recorder.count, budget,
+                extra={'query_metrics': record},
+            )
+            if getattr(settings, 'QUERY_BUDGETS_ENFORCE', False):
+                raise QueryBudgetExceeded(
+                    f'{view} ran {recorder.count} queries, budget is {budget}.\n'
+                    + _describe(recorder)
+                )
+        return response
+
+
+def _describe(recorder):
+    return '\n'.join(
+        f'{count}x {sql}' for sql, count in recorder.fingerprints.most_common()
+    )
+
+
+def _has_metrics_token(request):
+    scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    if not METRICS_TOKEN or scheme.lower() != 'bearer':
+        return False
+    return hmac.compare_digest(token.strip().encode(), METRICS_TOKEN.encode())
+
+
+def metrics_view(request):
+    """Prometheus text exposition of the per-view metrics (staff or metrics token)."""
+    user = getattr(request, 'user', None)
+    is_staff = bool(user and user.is_authenticated and user.is_staff)
+    if not is_staff and not _has_metrics_token(request):
+        return HttpResponseForbidden()
+    return HttpResponse(view_metrics.prometheus(), content_type='text/plain; version=0.0.4')
+
+
+class QueryBudgetTestMixin:
+    """TestCase helpers for query budgets."""
+
+    @contextmanager
+    def assertMaxQueries(self, limit):
+        recorder = QueryRecorder()
+        with recorder.record():
+            yield recorder
+        if recorder.count > limit:
+            self.fail(
+                f'{recorder.count} queries executed, budget is {limit}.\n' + _describe(recorder)
+            )
@@ -0,0 +1,194 @@
+"""
+Sparse fieldsets for the REST API.
+
+Read endpoints accept three query parameters:
+
+- ``?fields=id,title`` emits only the named fields;
+- ``?exclude=content`` drops the named fields;
+- ``?expand=author`` replaces a field with the nested serializer declared
+  in the serializer's ``Meta.expandable_fields``. An expanded field is
+  emitted even when ``fields`` does not name it.
+
+Dotted names reach into nested serializers, e.g.
+``?expand=author&fields=id,author.username``. Unknown names are ignored.
+
+``SparseFieldsetMixin`` goes on serializers, and ``SparseFieldsetViewMixin``
+on generic views. The view mixin passes the parameters to the serializer
+on safe methods only; writes always see every field. It also narrows the
+queryset to what the pruned serializer reads:
+
+- ``.only()`` of the columns behind the emitted fields;
+- ``select_related`` for forward relations the serializer reads through;
+- ``prefetch_related`` for many-valued relations.
+
+Relations that are not emitted are never loaded, even when the view
+joined them. Foreign key columns and the ordering columns are always
+kept: they are narrow, object permissions compare foreign keys and keyset
+pagination reads the ordering columns. When a field reads something the
+model does not describe, such as a property or a
+``SerializerMethodField``, the columns are left alone.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+SPARSE_PARAMS = ('fields', 'exclude', 'expand')
+
+
+def parse_paths(value):
+    """
+    ``'id,author.name'`` -> ``{'id': [], 'author': ['name']}``.
+
+    Accepts a comma-separated string, an iterable of names or an already
+    parsed mapping. Returns None for an empty value.
+    """
+    if not value:
+        return None
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str):
+        value = value.split(',')
+    paths = {}
+    for item in value:
+        head, _, rest = item.strip().partition('.')
+        if not head:
+            continue
+        nested = paths.setdefault(head, [])
+        if rest:
+            nested.append(rest)
+    return paths or None
+
+
+def sparse_params(request):
+    """The sparse fieldset parameters of ``request`` as serializer kwargs."""
+    if request is None or request.method not in SAFE_METHODS:
+        return {}
+    params = {key: parse_paths(request.query_params.get(key)) for key in SPARSE_PARAMS}
+    return {key: value for key, value in params.items() if value}
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin accepting ``fields``, ``exclude`` and ``expand`` kwargs.
+
+    ``Meta.expandable_fields`` maps a field name to a serializer class (or
+    its dotted path) and the kwargs to build it with, e.g.
+    ``{'author': ('api.serializers.AuthorSerializer', {'fields': 'id,name'})}``.
+    Expanded serializers are always read-only.
+    """
+
+    def __init__(self, *args, fields=None, exclude=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.apply_sparse_fieldset(fields, exclude, expand)
+
+    def apply_sparse_fieldset(self, fields=None, exclude=None, expand=None):
+        fields, exclude, expand = parse_paths(fields), parse_paths(exclude), parse_paths(expand)
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+
+        for name in expand or ():
+            if name in expandable:
+                serializer_class, options = expandable[name]
+                if isinstance(serializer_class, str):
+                    serializer_class = import_string(serializer_class)
+                self.fields[name] = serializer_class(read_only=True, **options)
+
+        if fields is not None:
+            wanted = set(fields) | set(expand or ())
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+        for name, nested in (exclude or {}).items():
+            if not nested:
+                self.fields.pop(name, None)
+
+        for name, field in self.fields.items():
+            target = getattr(field, 'child', field)
+            if isinstance(target, SparseFieldsetMixin):
+                target.apply_sparse_fieldset(
+                    fields=(fields or {}).get(name),
+                    exclude=(exclude or {}).get(name),
+                    expand=(expand or {}).get(name),
+                )
+
+
+def narrow_queryset(queryset, serializer):
+    """Restrict ``queryset`` to what ``serializer`` reads (see module docstring)."""
+    model = queryset.model
+    query = queryset.query
+    columns = {field.name for field in model._meta.concrete_fields if field.is_relation}
+    select_related, prefetch_related = set(), set()
+    exact = True
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            exact = False
+            continue
+        name, _, rest = field.source.partition('.')
+        if name in query.annotations:
+            continue
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            exact = False
+            continue
+        if model_field.many_to_many or model_field.one_to_many or not model_field.concrete:
+            prefetch_related.add(name)
+            continue
+        columns.add(name)
+        if model_field.is_relation and (rest or isinstance(field, serializers.BaseSerializer)):
+            select_related.add(name)
+
+    for ordering in query.order_by:
+        if isinstance(ordering, str):
+            name = ordering.lstrip('-')
+            if '__' not in name and name != '?':
+                columns.add(name)
+
+    if query.select_related is not True:
+        # Drop joins the view added for fields this serializer no longer emits.
+        queryset = queryset.select_related(None)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    if exact:
+        queryset = queryset.only(*columns)
+    return queryset
+
+
+class SparseFieldsetViewMixin:
+    """
+    Generic view mixin for sparse fieldsets.
+
+    Narrowing runs in ``filter_queryset``, after any annotations added in
+    ``get_queryset``, so list, retrieve and ``get_object`` are covered.
+    Custom actions that serialize their own querysets call
+    ``narrow_queryset`` themselves.
+    """
+
+    def get_sparse_fieldset(self):
+        if not hasattr(self, '_sparse_fieldset'):
+            self._sparse_fieldset = sparse_params(self.request)
+        return self._sparse_fieldset
+
+    def get_sparse_field_names(self):
+        """Top-level fields the serializer will emit, or None for all of them."""
+        if not self.get_sparse_fieldset():
+            return None
+        return set(self.get_serializer().fields)
+
+    def get_serializer(self, *args, **kwargs):
+        if issubclass(self.get_serializer_class(), SparseFieldsetMixin):
+            for key, value in self.get_sparse_fieldset().items():
+                kwargs.setdefault(key, value)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        return self.narrow_queryset(super().filter_queryset(queryset))
+
+    def narrow_queryset(self, queryset):
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        return narrow_queryset(queryset, self.get_serializer())
@@ -0,0 +1,243 @@
+"""
+Token authentication without a query per request.
+
+DRF's ``TokenAuthentication`` joins Token and CustomUser on every API
+call. ``CachedTokenAuthentication`` keeps a snapshot of the token and its
+user instead:
+
+- in a per-process LRU of ``TOKEN_AUTH_CACHE_SIZE`` entries, each valid
+  for ``TOKEN_AUTH_CACHE_TTL`` seconds;
+- in the Django cache named by ``TOKEN_AUTH_SHARED_CACHE``, so a process
+  that misses locally still skips the database. Shared entries are keyed
+  by a hash of the token, never the token itself.
+
+Revocation goes through the shared cache too. Each token has a generation
+stamp there; every snapshot records the stamp it was loaded under, and
+every hit, local or shared, reads the current stamp (one cache round trip,
+together with the shared snapshot) and ignores snapshots from an older
+one. The stamp is read before the database lookup, so a lookup that
+overlaps a revocation stores a snapshot that is already outdated. Without
+``TOKEN_AUTH_SHARED_CACHE`` nothing is cached: a per-process cache could
+not see revocations made by other processes.
+
+Every request gets fresh ``CustomUser`` and ``Token`` instances built
+from the snapshot, so views may modify ``request.user`` freely. The
+password hash is not cached, and neither is ``unread_notification_count``,
+which the unread badge must show current; both are left deferred, so
+reading one loads the current value. ``follower_count`` and
+``following_count`` are cached with the rest of the row, as the feed and
+profile views read them on most requests. They change with F() updates
+that send no signals, so they may lag by up to ``TOKEN_AUTH_CACHE_TTL``.
+
+Tokens are revoked when the token is deleted (logout), and whenever the
+user is saved or deleted (password change, deactivation, profile edits).
+The receivers in ``accounts.signals`` revoke them right away and again on
+commit, so requests that read the old row in between are forgotten too.
+Writes with ``QuerySet.update()`` send no signals; call ``invalidate_user``
+after them.
+
+Hit/miss counts are available from ``stats()``.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+CACHE_SIZE = getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10000)
+CACHE_TTL = getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 5)
+SHARED_CACHE = getattr(settings, 'TOKEN_AUTH_SHARED_CACHE', None)
+KEY_PREFIX = 'token-auth'
+
+User = get_user_model()
+
+# Never cached: loaded on first access instead.
+DEFERRED_FIELDS = {'password', 'unread_notification_count'}
+USER_FIELDS = [
+    field.attname for field in User._meta.concrete_fields if field.attname not in DEFERRED_FIELDS
+]
+
+
+class TokenCache:
+    """Bounded LRU of ``token key -> (expires at, user id, snapshot, generation)``."""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {
+            'hits': 0, 'shared_hits': 0, 'misses': 0,
+            'expired': 0, 'evictions': 0, 'invalidations': 0,
+        }
+
+    def get(self, key, generation):
+        """The snapshot of ``key`` if it is fresh and from ``generation``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[3] != generation:
+                del self._entries[key]
+                self._stats['invalidations'] += 1
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self._stats['expired'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[2]
+
+    def set(self, key, user_id, snapshot, generation):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user_id, snapshot, generation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def discard(self, keys=(), user_id=None):
+        """Drop ``keys`` and every entry belonging to ``user_id``."""
+        with self._lock:
+            stale = set(keys)
+            if user_id is not None:
+                stale.update(key for key, entry in self._entries.items() if entry[1] == user_id)
+            for key in stale:
+                if self._entries.pop(key, None) is not None:
+                    self._stats['invalidations'] += 1
+
+    def record(self, outcome):
+        with self._lock:
+            self._stats[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self._stats, size=len(self._entries), max_size=self.size, ttl=self.ttl)
+        lookups = data['hits'] + data['shared_hits'] + data['misses']
+        data['hit_rate'] = (data['hits'] + data['shared_hits']) / lookups if lookups else 0.0
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+token_cache = TokenCache(CACHE_SIZE, CACHE_TTL)
+
+
+def stats():
+    return token_cache.snapshot()
+
+
+def _shared_key(key):
+    return f'{KEY_PREFIX}:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def _generation_key(key):
+    return f'{KEY_PREFIX}:generation:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def _shared_cache():
+    return caches[SHARED_CACHE] if SHARED_CACHE else None
+
+
+def make_snapshot(token):
+    user = token.user
+    return token.created, tuple(getattr(user, name) for name in USER_FIELDS)
+
+
+def from_snapshot(key, snapshot):
+    """Fresh ``(user, token)`` instances for a cached snapshot."""
+    created, values = snapshot
+    user = User.from_db(DEFAULT_DB_ALIAS, USER_FIELDS, values)
+    token = Token.from_db(DEFAULT_DB_ALIAS, ['key', 'user_id', 'created'], [key, user.pk, created])
+    token.user = user
+    return user, token
+
+
+def _discard(keys, user_id=None):
+    token_cache.discard(keys, user_id)
+    shared = _shared_cache()
+    if shared is None or not keys:
+        return
+    shared.delete_many([_shared_key(key) for key in keys])
+    for key in keys:
+        try:
+            shared.incr(_generation_key(key))
+        except ValueError:
+            # No stamp yet; lookups start one from the clock, past any old generation.
+            shared.add(_generation_key(key), time.time_ns())
+
+
+def invalidate_tokens(keys, user_id=None):
+    """Forget cached snapshots for ``keys`` now and when the transaction commits."""
+    keys = list(keys)
+    _discard(keys, user_id)
+    transaction.on_commit(lambda: _discard(keys, user_id))
+
+
+def invalidate_user(user_id):
+    """Forget every cached token of ``user_id``."""
+    keys = Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    invalidate_tokens(keys, user_id)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` answered from cached snapshots (see module docstring)."""
+
+    def authenticate_credentials(self, key):
+        shared = _shared_cache()
+        if shared is None:
+            token_cache.record('misses')
+            return self.load_credentials(key)
+
+        shared_key, generation_key = _shared_key(key), _generation_key(key)
+        cached = shared.get_many([shared_key, generation_key])
+        generation = cached.get(generation_key)
+        if generation is None:
+            # Missing or evicted: a clock value never matches an older snapshot.
+            shared.add(generation_key, time.time_ns())
+            generation = shared.get(generation_key)
+
+        snapshot = token_cache.get(key, generation)
+        if snapshot is not None:
+            return from_snapshot(key, snapshot)
+
+        entry = cached.get(shared_key)
+        if entry is not None and entry[0] == generation:
+            token_cache.record('shared_hits')
+            user, token = from_snapshot(key, entry[1])
+            token_cache.set(key, user.pk, entry[1], generation)
+            return user, token
+
+        token_cache.record('misses')
+        user, token = self.load_credentials(key)
+        if generation is not None:
+            # Tagged with the generation read before the lookup: a revocation
+            # since then has moved it on, so this snapshot is never served.
+            snapshot = make_snapshot(token)
+            token_cache.set(key, token.user_id, snapshot, generation)
+            shared.set(shared_key, (generation, snapshot), CACHE_TTL)
+        return user, token
+
+    def load_credentials(self, key):
+        try:
+            token = Token.objects.select_related('user').defer(
+                *(f'user__{name}' for name in DEFERRED_FIELDS)
+            ).get(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return token.user, token
@@ -0,0 +1,90 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+class CounterFieldsMixin:
+    """Keep ``save()`` from writing denormalized counters back.
+
+    Counters change with F() updates that leave loaded instances stale, so
+    saving an existing row writes every other loaded field and leaves the
+    ``counter_fields`` columns alone. Pass ``update_fields`` to write them
+    explicitly.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not args:
+            skipped = set(self.counter_fields) | self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+def adjust_counter(model, ids, field, delta):
+    """Atomically add ``delta`` to a denormalized counter column.
+
+    Runs a single ``UPDATE ... SET field = field + delta`` over ``ids``;
+    decrements are clamped at zero so drift never goes negative.
+    """
+    if not ids or not delta:
+        return 0
+    if delta > 0:
+        value = F(field) + delta
+    else:
+        value = Greatest(F(field) + delta, 0)
+    return model.objects.filter(id__in=ids).update(**{field: value})
+
+
+def changed_ids(through, action, instance_column, other_column, instance, pk_set):
+    """IDs on the other side of an m2m_changed event that actually change.
+
+    ``post_add`` already receives only the new links. For removals and
+    clears, this runs before the delete and keeps only the links that exist.
+    """
+    if action == 'post_add':
+        return list(pk_set)
+    links = through.objects.filter(**{instance_column: instance})
+    if action == 'pre_remove':
+        links = links.filter(**{f'{other_column}__in': pk_set})
+    return list(links.values_list(f'{other_column}_id', flat=True))
+
+
+def apply_counter_deltas(model, field, deltas):
+    """Apply per-row counter changes, one UPDATE per distinct delta.
+
+    ``deltas`` maps row id to the amount to add (negative to subtract).
+    """
+    by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(pk)
+    updated = 0
+    for delta, ids in by_delta.items():
+        updated += adjust_counter(model, ids, field, delta)
+    return updated
+
+
+def count_subquery(queryset, column):
+    """Correlated ``SELECT COUNT(*)`` grouped on ``column``, 0 when empty."""
+    counts = (
+        queryset.filter(**{column: OuterRef('pk')})
+        .order_by()
+        .values(column)
+        .annotate(total=Count('*'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def recount(model, ids, field, queryset, column):
+    """Set ``field`` on rows ``ids`` to the number of ``queryset`` rows pointing at them.
+
+    One UPDATE with a correlated COUNT, exact whatever other writers did.
+    """
+    if not ids:
+        return 0
+    return model.objects.filter(id__in=ids).update(**{field: count_subquery(queryset, column)})
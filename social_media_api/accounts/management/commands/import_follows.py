@@ -0,0 +1,102 @@
+import csv
+import json
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.follow_graph import add_edges
+
+User = get_user_model()
+
+
+def read_edges(path, fmt):
+    """Yield ``(follower, followed)`` raw values from a CSV or JSONL file."""
+    with open(path, newline='', encoding='utf-8') as handle:
+        if fmt == 'csv':
+            reader = csv.DictReader(handle)
+            if not reader.fieldnames or not {'follower', 'followed'} <= set(reader.fieldnames):
+                raise CommandError('CSV needs a header with "follower" and "followed" columns.')
+            for row in reader:
+                yield row['follower'].strip(), row['followed'].strip()
+        else:
+            for line_number, line in enumerate(handle, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                    yield str(row['follower']).strip(), str(row['followed']).strip()
+                except (ValueError, KeyError, TypeError):
+                    raise CommandError(f'Invalid JSONL record on line {line_number}.')
+
+
+class Command(BaseCommand):
+    help = (
+        'Import follow edges from a CSV (follower,followed) or JSONL '
+        '({"follower": ..., "followed": ...}) file. Users may be given by id or username.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--by', choices=['id', 'username'], default='id')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--report', help='Write edges that were not created to this CSV file.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+        field = options['by']
+        batch_size = options['batch_size']
+
+        report_file = open(options['report'], 'w', newline='') if options['report'] else None
+        report = csv.writer(report_file) if report_file else None
+        if report:
+            report.writerow(['follower', 'followed', 'status'])
+
+        totals = {'created': 0, 'existing': 0, 'unknown_user': 0, 'self_follow': 0}
+        edges = read_edges(path, fmt)
+        try:
+            while True:
+                batch = list(islice(edges, batch_size))
+                if not batch:
+                    break
+                self.import_batch(batch, field, totals, report)
+        finally:
+            if report_file:
+                report_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Imported follows: ' + ', '.join(f'{key}={value}' for key, value in totals.items())
+        ))
+
+    def import_batch(self, batch, field, totals, report):
+        keys = {value for edge in batch for value in edge}
+        if field == 'id':
+            keys = {int(key) for key in keys if key.isdigit()}
+            lookup = {str(pk): pk for pk in User.objects.filter(id__in=keys).values_list('id', flat=True)}
+        else:
+            lookup = dict(User.objects.filter(username__in=keys).values_list('username', 'id'))
+
+        resolved = {}
+        for follower, followed in batch:
+            follower_id, followed_id = lookup.get(follower), lookup.get(followed)
+            if follower_id is None or followed_id is None:
+                status = 'unknown_user'
+            elif follower_id == followed_id:
+                status = 'self_follow'
+            else:
+                resolved[(follower_id, followed_id)] = (follower, followed)
+                continue
+            totals[status] += 1
+            if report:
+                report.writerow([follower, followed, status])
+
+        created = add_edges(resolved)
+        totals['created'] += len(created)
+        totals['existing'] += len(resolved) - len(created)
+        if report:
+            for edge, raw in resolved.items():
+                if edge not in created:
+                    report.writerow([raw[0], raw[1], 'existing'])
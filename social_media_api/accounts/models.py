@@ -2,7 +2,9 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 
-class CustomUser(AbstractUser):
+from .counters import CounterFieldsMixin
+
+class CustomUser(CounterFieldsMixin, AbstractUser):
     """Custom User model with additional fields for social media."""
     
     bio = models.TextField(max_length=500, blank=True)
@@ -16,16 +18,16 @@ class CustomUser(AbstractUser):
         related_name='following',
         blank=True
     )
+    # Denormalized counters, kept in sync by accounts.signals with F() updates
+    # and repaired by the reconcile_counters management command.
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # Maintained by notification.inbox and the notification pipeline.
+    unread_notification_count = models.PositiveIntegerField(default=0)
+    # Not written by save() on existing users; see CounterFieldsMixin.
+    counter_fields = ('follower_count', 'following_count', 'unread_notification_count')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.username
-    
-    @property
-    def follower_count(self):
-        return self.followers.count()
-    
-    @property
-    def following_count(self):
-        return self.following.count()
@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
+from django.conf import settings
 from rest_framework.authtoken.models import Token
+from perfkit.sparse_fields import SparseFieldsetMixin
 from .models import CustomUser
 
 # Create explicit CharField instances that the checker can find
@@ -73,7 +75,7 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError("Must include credentials.")
         return data
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     follower_count = serializers.IntegerField(read_only=True)
     following_count = serializers.IntegerField(read_only=True)
     
@@ -86,5 +88,15 @@ class UserProfileSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+class BulkFollowSerializer(serializers.Serializer):
+    """Serializer for following or unfollowing many users in one request."""
+    
+    action = serializers.ChoiceField(choices=['follow', 'unfollow'], default='follow')
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=getattr(settings, 'BULK_FOLLOW_MAX_USERS', 100)
+    )
+
 # Add more explicit instances for the checker
 test_create_user = get_user_model().objects.create_user
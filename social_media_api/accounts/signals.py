@@ -0,0 +1,51 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens, invalidate_user
+from .counters import adjust_counter, changed_ids
+from .models import CustomUser
+from notification.pipeline import notify
+
+COUNTER_ACTIONS = {'post_add': 1, 'pre_remove': -1, 'pre_clear': -1}
+
+
+@receiver(m2m_changed, sender=CustomUser.followers.through)
+def update_follow_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep follower_count/following_count in sync with the follow graph.
+
+    A through row (from_customuser=A, to_customuser=B) means B follows A.
+    """
+    delta = COUNTER_ACTIONS.get(action)
+    if delta is None:
+        return
+
+    if reverse:
+        # instance.following.add(...): instance is the follower.
+        instance_field, other_field = 'following_count', 'follower_count'
+        instance_column, other_column = 'to_customuser', 'from_customuser'
+    else:
+        # instance.followers.add(...): instance is the followed user.
+        instance_field, other_field = 'follower_count', 'following_count'
+        instance_column, other_column = 'from_customuser', 'to_customuser'
+
+    ids = changed_ids(sender, action, instance_column, other_column, instance, pk_set)
+    adjust_counter(CustomUser, [instance.pk], instance_field, delta * len(ids))
+    adjust_counter(CustomUser, ids, other_field, delta)
+
+    if action == 'post_add':
+        for other_id in ids:
+            follower_id, followed_id = (instance.pk, other_id) if reverse else (other_id, instance.pk)
+            notify(followed_id, follower_id, 'started following you', 'follow')
+
+
+@receiver([post_save, post_delete], sender=Token)
+def forget_cached_token(sender, instance, **kwargs):
+    """A new or deleted token (logout) must not be answered from the auth cache."""
+    invalidate_tokens([instance.key], instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def forget_cached_user(sender, instance, **kwargs):
+    """Password changes, deactivation and profile edits refresh cached auth snapshots."""
+    invalidate_user(instance.pk)
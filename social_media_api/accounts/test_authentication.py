@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+
+from . import authentication
+from .authentication import CachedTokenAuthentication, _shared_key, token_cache
+
+User = get_user_model()
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        caches['default'].clear()
+        self.user = User.objects.create_user(username='user', password='password123')
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def authenticate(self):
+        return self.auth.authenticate_credentials(self.token.key)
+
+    def assertRejected(self):
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.authenticate()
+
+    def test_cached_requests_skip_the_database(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+            self.assertEqual((user.pk, user.follower_count, token.key), (self.user.pk, 0, self.token.key))
+        self.assertEqual(token_cache.snapshot()['hits'], 1)
+
+    def test_password_and_unread_count_are_loaded_fresh(self):
+        self.authenticate()
+        User.objects.filter(pk=self.user.pk).update(unread_notification_count=4)
+        user, _ = self.authenticate()
+        with self.assertNumQueries(1):
+            self.assertEqual(user.unread_notification_count, 4)
+        self.assertTrue(user.check_password('password123'))
+
+    def test_shared_cache_serves_other_processes(self):
+        self.authenticate()
+        token_cache.clear()
+        with self.assertNumQueries(0):
+            self.authenticate()
+        self.assertEqual(token_cache.snapshot()['shared_hits'], 1)
+
+    def test_logout_revokes_the_token(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            Token.objects.filter(user=self.user).delete()
+        self.assertIsNone(caches['default'].get(_shared_key(self.token.key)))
+        self.assertRejected()
+
+    def test_deactivation_revokes_the_token(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertIsNone(caches['default'].get(_shared_key(self.token.key)))
+        self.assertRejected()
+
+    def test_deleted_user_is_rejected(self):
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertRejected()
+
+    def test_revocation_reaches_other_processes(self):
+        self.authenticate()
+        # Another process logs out: this process's LRU is not told, the shared stamp is.
+        with mock.patch.object(token_cache, 'discard'), self.captureOnCommitCallbacks(execute=True):
+            Token.objects.filter(user=self.user).delete()
+        self.assertRejected()
+
+    def test_lookup_overlapping_a_revocation_is_not_served_again(self):
+        make_snapshot = authentication.make_snapshot
+
+        def revoke_meanwhile(token):
+            authentication._discard([token.key], token.user_id)
+            return make_snapshot(token)
+
+        with mock.patch('accounts.authentication.make_snapshot', side_effect=revoke_meanwhile):
+            self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
+
+    @mock.patch('accounts.authentication.SHARED_CACHE', None)
+    def test_no_shared_cache_means_no_caching(self):
+        self.authenticate()
+        with self.assertNumQueries(1):
+            self.authenticate()
@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from posts.models import FeedEntry, Post
+from .follow_graph import (
+    ALREADY_FOLLOWING, FOLLOWED, NOT_FOLLOWING, NOT_FOUND, SELF, UNFOLLOWED,
+    Follow, add_edges, bulk_follow, remove_edges,
+)
+
+User = get_user_model()
+
+
+class BulkFollowTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='password123')
+        self.targets = [
+            User.objects.create_user(username=f'target{n}', password='password123')
+            for n in range(3)
+        ]
+        self.target_ids = [target.id for target in self.targets]
+
+    def counts(self, user):
+        user.refresh_from_db()
+        return user.follower_count, user.following_count
+
+    def test_follow_is_idempotent(self):
+        first = bulk_follow(self.user, self.target_ids)
+        second = bulk_follow(self.user, self.target_ids)
+
+        self.assertEqual({row['status'] for row in first}, {FOLLOWED})
+        self.assertEqual({row['status'] for row in second}, {ALREADY_FOLLOWING})
+        self.assertEqual(Follow.objects.filter(to_customuser=self.user).count(), 3)
+        self.assertEqual(self.counts(self.user), (0, 3))
+        for target in self.targets:
+            self.assertEqual(self.counts(target), (1, 0))
+
+    def test_statuses_follow_request_order(self):
+        self.user.following.add(self.targets[1])
+        results = bulk_follow(self.user, [self.target_ids[1], 999999, self.user.id, self.target_ids[0]])
+        self.assertEqual(
+            [row['status'] for row in results],
+            [ALREADY_FOLLOWING, NOT_FOUND, SELF, FOLLOWED],
+        )
+        self.assertEqual(self.counts(self.user), (0, 2))
+
+    def test_duplicate_ids_count_once(self):
+        bulk_follow(self.user, [self.target_ids[0]] * 3)
+        self.assertEqual(self.counts(self.user), (0, 1))
+        self.assertEqual(self.counts(self.targets[0]), (1, 0))
+
+    def test_unfollow_is_idempotent(self):
+        bulk_follow(self.user, self.target_ids)
+        first = bulk_follow(self.user, self.target_ids[:2], action='unfollow')
+        second = bulk_follow(self.user, self.target_ids[:2], action='unfollow')
+
+        self.assertEqual({row['status'] for row in first}, {UNFOLLOWED})
+        self.assertEqual({row['status'] for row in second}, {NOT_FOLLOWING})
+        self.assertEqual(self.counts(self.user), (0, 1))
+        self.assertEqual(self.counts(self.targets[0]), (0, 0))
+        self.assertEqual(self.counts(self.targets[2]), (1, 0))
+
+    def test_counters_match_rows_when_an_edge_appears_concurrently(self):
+        # Another writer inserts the edge after it was checked; ignore_conflicts
+        # skips our copy and the counters must still count it once.
+        edge = (self.user.id, self.target_ids[0])
+        Follow.objects.create(from_customuser_id=self.target_ids[0], to_customuser_id=self.user.id)
+        with mock.patch('accounts.follow_graph.existing_edges', return_value=set()):
+            add_edges([edge])
+        self.assertEqual(self.counts(self.user), (0, 1))
+        self.assertEqual(self.counts(self.targets[0]), (1, 0))
+
+    def test_edges_backfill_and_retract_feeds(self):
+        posts = [
+            Post.objects.create(author=target, title='Post', content='Body') for target in self.targets
+        ]
+        other = User.objects.create_user(username='other', password='password123')
+        add_edges({(self.user.id, self.target_ids[0]), (self.user.id, self.target_ids[1]),
+                   (other.id, self.target_ids[2])})
+        self.assertEqual(
+            set(FeedEntry.objects.values_list('owner_id', 'post_id')),
+            {(self.user.id, posts[0].id), (self.user.id, posts[1].id), (other.id, posts[2].id)},
+        )
+        remove_edges({(self.user.id, self.target_ids[0])})
+        self.assertEqual(
+            set(FeedEntry.objects.values_list('owner_id', 'post_id')),
+            {(self.user.id, posts[1].id), (other.id, posts[2].id)},
+        )
+
+    def test_bulk_follow_query_count_does_not_grow_with_targets(self):
+        with self.assertNumQueries(11):
+            bulk_follow(self.user, self.target_ids[:1])
+        bulk_follow(self.user, self.target_ids[:1], action='unfollow')
+        with self.assertNumQueries(11):
+            bulk_follow(self.user, self.target_ids)
@@ -6,9 +6,11 @@ from .views import (
     UserProfileView,
     UserDetailView,
     UserFollowView,
+    BulkFollowView,
     UserFollowingListView,
     UserFollowersListView,
-    UserListView
+    UserListView,
+    AuthCacheStatsView
 )
 
 urlpatterns = [
@@ -16,6 +18,7 @@ urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='register'),
     path('login/', UserLoginView.as_view(), name='login'),
     path('logout/', UserLogoutView.as_view(), name='logout'),
+    path('auth-cache-stats/', AuthCacheStatsView.as_view(), name='auth-cache-stats'),
     
     # Profile endpoints
     path('profile/', UserProfileView.as_view(), name='profile'),
@@ -24,6 +27,7 @@ urlpatterns = [
     # Follow management endpoints
     path('follow/<int:user_id>/', UserFollowView.as_view(), name='follow-user'),
     path('unfollow/<int:user_id>/', UserFollowView.as_view(), name='unfollow-user'),
+    path('follow/bulk/', BulkFollowView.as_view(), name='bulk-follow'),
     path('following/', UserFollowingListView.as_view(), name='following-list'),
     path('followers/', UserFollowersListView.as_view(), name='followers-list'),
     path('users/', UserListView.as_view(), name='user-list'),
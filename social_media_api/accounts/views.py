@@ -13,9 +13,13 @@ from .serializers import (
     UserProfileSerializer,
     UserFollowSerializer,
     UserDetailSerializer,
-    FollowActionSerializer
+    FollowActionSerializer,
+    BulkFollowSerializer
 )
 from .models import CustomUser
+from .authentication import stats as token_cache_stats
+from .follow_graph import bulk_follow
+from posts.feed import backfill_feed, retract_feed
 
 User = get_user_model()
 
@@ -66,6 +70,7 @@ class UserFollowView(GenericAPIView):
             
             # Add to following
             request.user.following.add(target_user)
+            backfill_feed(request.user, target_user)
             
             # Refresh counts
             target_user.refresh_from_db()
@@ -87,6 +92,7 @@ class UserFollowView(GenericAPIView):
             
             # Remove from following
             request.user.following.remove(target_user)
+            retract_feed(request.user, target_user)
             
             # Refresh counts
             target_user.refresh_from_db()
@@ -98,6 +104,31 @@ class UserFollowView(GenericAPIView):
                 'following_count': request.user.following_count
             }, status=status.HTTP_200_OK)
 
+class BulkFollowView(GenericAPIView):
+    """
+    Follow or unfollow many users in one request.
+    Body: {"action": "follow" | "unfollow", "user_ids": [1, 2, ...]}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = BulkFollowSerializer
+    queryset = CustomUser.objects.all()
+    
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        results = bulk_follow(
+            request.user,
+            serializer.validated_data['user_ids'],
+            action=serializer.validated_data['action']
+        )
+        request.user.refresh_from_db(fields=['follower_count', 'following_count'])
+        
+        return Response({
+            'results': results,
+            'following_count': request.user.following_count
+        }, status=status.HTTP_200_OK)
+
 # Additional GenericAPIView examples
 class UserFollowingListView(GenericAPIView):
     """List users that the current user follows."""
@@ -154,6 +185,22 @@ class UserListView(GenericAPIView):
             'users': serializer.data
         })
 
+class UserLogoutView(APIView):
+    """Log out by deleting the API token (which also drops it from the auth cache)."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        Token.objects.filter(user=request.user).delete()
+        logout(request)
+        return Response({'message': 'Successfully logged out.'}, status=status.HTTP_200_OK)
+
+class AuthCacheStatsView(APIView):
+    """Hit rate and size of this process's token authentication cache (admins only)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(token_cache_stats())
+
 # Keep other views (UserRegistrationView, UserLoginView, etc.) as they were before
 # but make sure they also use GenericAPIView if needed
 
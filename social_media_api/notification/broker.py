@@ -0,0 +1,223 @@
+"""
+Publish/subscribe for live notification and feed events.
+
+Events go to channels: ``user:<id>`` for a user's notifications and
+``author:<id>`` for new posts by an author. Every event gets an increasing
+id, and each channel keeps its last ``NOTIFICATIONS_STREAM_REPLAY_SIZE``
+events, so a reconnecting client can resume from its ``Last-Event-ID``.
+
+``InMemoryBroker`` only reaches subscribers in the same process. It is
+enough for a single ASGI worker and for tests. Multi-process deployments
+can point ``NOTIFICATIONS_STREAM_BROKER`` at a class implementing
+``BaseBroker`` on top of a shared backend.
+
+Publishers may run on any thread (request threads, the notification
+pipeline worker). Subscribers are read from the ASGI event loop.
+"""
+import asyncio
+import itertools
+import threading
+from collections import defaultdict, deque, namedtuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+BROKER_CLASS = getattr(
+    settings, 'NOTIFICATIONS_STREAM_BROKER', 'notification.broker.InMemoryBroker'
+)
+REPLAY_SIZE = getattr(settings, 'NOTIFICATIONS_STREAM_REPLAY_SIZE', 100)
+# Undelivered events a subscriber may hold before it is cut off.
+MAX_PENDING = getattr(settings, 'NOTIFICATIONS_STREAM_MAX_PENDING', 500)
+
+Event = namedtuple('Event', ['id', 'channel', 'type', 'data'])
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def author_channel(author_id):
+    return f'author:{author_id}'
+
+
+class Subscription:
+    """Events for a set of channels, buffered until the stream sends them."""
+
+    def __init__(self, broker, channels, max_pending=MAX_PENDING):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.max_pending = max_pending
+        # Set when the subscriber fell too far behind; events were discarded.
+        self.overflowed = False
+        self.closed = False
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._loop = asyncio.get_running_loop()
+        self._ready = asyncio.Event()
+
+    def push(self, event):
+        """Queue ``event``; safe to call from any thread."""
+        with self._lock:
+            if self.closed or self.overflowed:
+                return
+            if len(self._pending) >= self.max_pending:
+                self.overflowed = True
+                self._pending.clear()
+            else:
+                self._pending.append(event)
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # The event loop is gone; nobody will read this subscription again.
+            self.close()
+
+    async def next_batch(self, timeout):
+        """Wait up to ``timeout`` seconds and return the queued events."""
+        if not self._pending and not self.overflowed and not self.closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._ready.clear()
+        return self.drain()
+
+    def drain(self):
+        """Return and forget the queued events without waiting."""
+        with self._lock:
+            batch = list(self._pending)
+            self._pending.clear()
+        return batch
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broker.unsubscribe(self)
+            self._ready.set()
+
+
+class BaseBroker:
+    """Interface for stream brokers."""
+
+    def publish(self, channel, event_type, data):
+        """Deliver an event to ``channel``; returns the new ``Event``."""
+        raise NotImplementedError
+
+    def subscribe(self, channels, last_event_id=None):
+        """
+        Register a subscription for ``channels``.
+
+        Returns ``(subscription, backlog, gap)``: the events after
+        ``last_event_id`` that are still in the replay buffer, and whether some
+        were already dropped from it (the client should refetch over REST).
+        Must be called from the event loop that will read the subscription.
+        """
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def latest_id(self):
+        """Id of the newest published event, used as a long-poll cursor."""
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+
+class InMemoryBroker(BaseBroker):
+    """Process-local broker with a bounded replay buffer per channel."""
+
+    def __init__(self, replay_size=REPLAY_SIZE, max_pending=MAX_PENDING):
+        self.replay_size = replay_size
+        self.max_pending = max_pending
+        self._ids = itertools.count(1)
+        self._latest_id = 0
+        self._lock = threading.Lock()
+        self._history = defaultdict(lambda: deque(maxlen=self.replay_size))
+        # Newest event id dropped from each channel's replay buffer.
+        self._evicted = {}
+        self._subscribers = defaultdict(set)
+        self._stats = {'published': 0, 'delivered': 0, 'overflows': 0}
+
+    def publish(self, channel, event_type, data):
+        with self._lock:
+            event = Event(next(self._ids), channel, event_type, data)
+            self._latest_id = event.id
+            history = self._history[channel]
+            if len(history) == history.maxlen:
+                self._evicted[channel] = history[0].id
+            history.append(event)
+            subscribers = list(self._subscribers.get(channel, ()))
+            self._stats['published'] += 1
+        for subscription in subscribers:
+            was_overflowed = subscription.overflowed
+            subscription.push(event)
+            with self._lock:
+                if subscription.overflowed and not was_overflowed:
+                    self._stats['overflows'] += 1
+                else:
+                    self._stats['delivered'] += 1
+        return event
+
+    def subscribe(self, channels, last_event_id=None):
+        subscription = Subscription(self, channels, self.max_pending)
+        backlog = []
+        gap = False
+        # Registration and replay happen under one lock, so no event is
+        # both replayed and pushed, or neither.
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+                if last_event_id is None:
+                    continue
+                if self._evicted.get(channel, 0) > last_event_id:
+                    gap = True
+                history = self._history.get(channel, ())
+                backlog.extend(event for event in history if event.id > last_event_id)
+        backlog.sort(key=lambda event: event.id)
+        return subscription, backlog, gap
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def latest_id(self):
+        with self._lock:
+            return self._latest_id
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data['subscriptions'] = len({
+                subscription
+                for subscribers in self._subscribers.values()
+                for subscription in subscribers
+            })
+            data['channels_buffered'] = len(self._history)
+        return data
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(BROKER_CLASS)()
+    return _broker
+
+
+def publish(channel, event_type, data):
+    return get_broker().publish(channel, event_type, data)
@@ -0,0 +1,66 @@
+"""
+Notification inbox operations.
+
+Read-state changes are single UPDATE statements, and every change moves the
+per-user ``unread_notification_count`` column by the number of affected
+rows, so the badge endpoint never has to COUNT.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.counters import adjust_counter
+from posts.pagination import keyset_filter
+from .models import Notification
+
+User = get_user_model()
+
+
+def inbox_queryset(user):
+    """Notifications of ``user``, newest first, with actors joined.
+
+    Targets are resolved per page with ``loaders.attach_targets``.
+    """
+    return (
+        Notification.objects.filter(recipient=user)
+        .select_related('actor')
+        .order_by('-created_at', '-id')
+    )
+
+
+def mark_read(user, up_to_id=None):
+    """Mark unread notifications of ``user`` as read.
+
+    With ``up_to_id``, only that notification and the ones below it in
+    inbox order (``-created_at, -id``) are marked. Coalesced likes and
+    comments move an older row back to the top with a new ``created_at``,
+    so they stay unread even if their id is lower.
+    """
+    notifications = Notification.objects.filter(recipient=user, is_read=False)
+    if up_to_id is not None:
+        position = (
+            Notification.objects.filter(recipient=user, pk=up_to_id)
+            .values_list('created_at', 'id')
+            .first()
+        )
+        if position is None:
+            return 0
+        notifications = notifications.filter(Q(pk=up_to_id) | keyset_filter(position, descending=True))
+    with transaction.atomic():
+        updated = notifications.update(is_read=True)
+        adjust_counter(User, [user.pk], 'unread_notification_count', -updated)
+    return updated
+
+
+def prune_read(before, batch_size=1000):
+    """Delete read notifications created before ``before`` in id batches.
+
+    Yields the number deleted per batch so callers can report progress.
+    """
+    stale = Notification.objects.filter(is_read=True, created_at__lt=before)
+    while True:
+        ids = list(stale.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        deleted, _ = Notification.objects.filter(id__in=ids).delete()
+        yield deleted
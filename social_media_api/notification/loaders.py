@@ -0,0 +1,60 @@
+"""
+Batched loading for notification lists.
+
+``Notification.target`` is a GenericForeignKey, so rendering a list resolves
+each target with its own query. ``attach_targets`` groups a page of
+notifications by content type, fetches every target model with one
+``in_bulk`` query, and stores the results in the GenericForeignKey cache.
+ContentTypes come from Django's process-wide ContentType cache. A page
+therefore costs one query per distinct target type, however many rows
+it has.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+
+from .models import Notification
+
+# Relations joined when loading targets so str(target) does not query again.
+TARGET_SELECT_RELATED = getattr(settings, 'NOTIFICATION_TARGET_SELECT_RELATED', {
+    'posts.post': ['author'],
+    'posts.comment': ['author', 'post__author'],
+})
+
+_target_field = Notification._meta.get_field('target')
+
+
+def attach_targets(notifications, recipient=None):
+    """Resolve targets (and optionally the shared recipient) for ``notifications``."""
+    notifications = list(notifications)
+
+    ids_by_type = defaultdict(set)
+    for notification in notifications:
+        if recipient is not None:
+            notification.recipient = recipient
+        if notification.content_type_id is not None and notification.object_id is not None:
+            ids_by_type[notification.content_type_id].add(notification.object_id)
+
+    targets = {}
+    for content_type_id, object_ids in ids_by_type.items():
+        content_type = ContentType.objects.get_for_id(content_type_id)
+        model = content_type.model_class()
+        if model is None:
+            continue
+        manager = model._default_manager
+        related = TARGET_SELECT_RELATED.get(content_type.app_label + '.' + content_type.model)
+        queryset = manager.select_related(*related) if related else manager.all()
+        for pk, obj in queryset.in_bulk(object_ids).items():
+            targets[(content_type_id, pk)] = obj
+
+    for notification in notifications:
+        if notification.content_type_id is None:
+            _target_field.set_cached_value(notification, None)
+            continue
+        notification.content_type = ContentType.objects.get_for_id(notification.content_type_id)
+        _target_field.set_cached_value(
+            notification,
+            targets.get((notification.content_type_id, notification.object_id)),
+        )
+    return notifications
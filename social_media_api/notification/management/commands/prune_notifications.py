@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from notification.inbox import prune_read
+
+
+class Command(BaseCommand):
+    help = 'Delete read notifications older than the retention window, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Keep read notifications this many days.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        total = 0
+        for deleted in prune_read(before, batch_size=options['batch_size']):
+            total += deleted
+        self.stdout.write(self.style.SUCCESS(f'Pruned {total} read notifications.'))
@@ -3,6 +3,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
+from accounts.counters import adjust_counter
+
 User = get_user_model()
 
 NOTIFICATION_TYPES = (
@@ -45,6 +47,9 @@ class Notification(models.Model):
     object_id = models.PositiveIntegerField(null=True, blank=True)
     target = GenericForeignKey('content_type', 'object_id')
     
+    # Number of actors coalesced into this row ("5 people liked your post").
+    actor_count = models.PositiveIntegerField(default=1)
+    
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -57,24 +62,35 @@ class Notification(models.Model):
     def __str__(self):
         return f"{self.verb} - {self.recipient.username}"
 
+    @property
+    def summary(self):
+        """Human readable text, e.g. "alice and 4 others liked your post"."""
+        actor = self.actor.username if self.actor_id else 'Someone'
+        if self.actor_count > 1:
+            others = self.actor_count - 1
+            actor = f"{actor} and {others} other{'s' if others > 1 else ''}"
+        return f"{actor} {self.verb}"
+
     def mark_as_read(self):
         """Mark the notification as read."""
+        if self.is_read:
+            return
+        updated = Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True)
         self.is_read = True
-        self.save()
+        if updated:
+            adjust_counter(User, [self.recipient_id], 'unread_notification_count', -1)
 
     @classmethod
     def create_notification(cls, recipient, actor, verb, notification_type, target=None):
-        """Helper method to create a notification."""
-        notification = cls.objects.create(
+        """Helper method to create a notification synchronously in one INSERT.
+        
+        Prefer notification.pipeline.notify() in request paths.
+        """
+        return cls.objects.create(
             recipient=recipient,
             actor=actor,
             verb=verb,
             notification_type=notification_type,
+            content_type=ContentType.objects.get_for_model(target) if target else None,
+            object_id=target.pk if target else None,
         )
-        
-        if target:
-            notification.content_type = ContentType.objects.get_for_model(target)
-            notification.object_id = target.id
-            notification.save()
-        
-        return notification
@@ -0,0 +1,373 @@
+"""
+Asynchronous notification pipeline.
+
+Request handlers call ``notify()``, which only appends an event to an
+in-process queue. A background worker thread drains the queue in batches
+and writes them, so no broker is required:
+
+- duplicate events in a batch (same recipient, type and target) are
+  coalesced into one row with ``actor_count`` > 1, and likes/comments are
+  merged into an existing unread row for the same target;
+- all new rows of a batch are written with a single ``bulk_create``.
+
+Once a batch commits, each new or merged row is also published to the
+recipient's live stream channel (see ``broker`` and ``stream``).
+
+Throughput, lag and queue depth are available from ``stats()``. Set
+``NOTIFICATIONS_ASYNC = False`` to write inline (e.g. in tests), and call
+``flush()`` to drain the queue synchronously.
+
+The queue and worker thread live in ``BackgroundQueue``, which the feed
+fan-out (``posts.feed``) reuses for the followers a request leaves over.
+"""
+import atexit
+import logging
+import queue
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.counters import apply_counter_deltas
+from .broker import publish, user_channel
+
+logger = logging.getLogger('social_media_api')
+
+ASYNC = getattr(settings, 'NOTIFICATIONS_ASYNC', True)
+BATCH_SIZE = getattr(settings, 'NOTIFICATIONS_BATCH_SIZE', 500)
+# How long the worker waits for more events before writing a partial batch.
+BATCH_WAIT = getattr(settings, 'NOTIFICATIONS_BATCH_WAIT', 0.2)
+MAX_QUEUE_SIZE = getattr(settings, 'NOTIFICATIONS_MAX_QUEUE_SIZE', 100000)
+# Types whose events for the same target merge into one unread notification.
+COALESCE_TYPES = getattr(settings, 'NOTIFICATIONS_COALESCE_TYPES', ('like', 'comment'))
+MENTION_RE = re.compile(r'(?<!\w)@(\w{1,150})')
+
+
+class NotificationEvent:
+    __slots__ = ('recipient_id', 'actor_id', 'verb', 'notification_type',
+                 'content_type_id', 'object_id', 'enqueued_at')
+
+    def __init__(self, recipient_id, actor_id, verb, notification_type,
+                 content_type_id=None, object_id=None):
+        self.recipient_id = recipient_id
+        self.actor_id = actor_id
+        self.verb = verb
+        self.notification_type = notification_type
+        self.content_type_id = content_type_id
+        self.object_id = object_id
+        self.enqueued_at = time.monotonic()
+
+    @property
+    def key(self):
+        if self.notification_type in COALESCE_TYPES and self.object_id is not None:
+            return (self.recipient_id, self.notification_type,
+                    self.content_type_id, self.object_id)
+        # Never coalesced: unique per event.
+        return id(self)
+
+
+class BackgroundQueue:
+    """Bounded in-process queue plus one daemon worker thread.
+
+    The worker hands queued items to ``process()`` in batches of up to
+    ``batch_size``, waiting at most ``batch_wait`` seconds to fill one.
+    Subclasses implement ``process()`` and may count what they do in
+    ``_stats`` with ``_bump()``.
+    """
+    thread_name = 'background-queue'
+
+    def __init__(self, batch_size, batch_wait, max_size):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue(maxsize=max_size)
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._stats = {'enqueued': 0, 'batches': 0, 'dropped': 0, 'errors': 0}
+
+    def is_async(self):
+        """False processes every item inline in ``enqueue()``."""
+        return True
+
+    def process(self, items):
+        raise NotImplementedError
+
+    # Producer side
+
+    def enqueue(self, item):
+        self._bump('enqueued')
+        if not self.is_async():
+            self.process([item])
+            return
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Shedding beats blocking the request; this is logged and counted.
+            self._bump('dropped')
+            self.on_dropped(item)
+
+    def on_dropped(self, item):
+        logger.warning('%s queue full; dropped %r', self.thread_name, item)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name=self.thread_name, daemon=True
+                )
+                self._worker.start()
+
+    # Consumer side
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self.process(batch)
+            except Exception:
+                self._bump('errors')
+                self.on_error(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                close_old_connections()
+
+    def on_error(self, batch):
+        logger.exception('%s failed to process %d items', self.thread_name, len(batch))
+
+    def flush(self):
+        """Synchronously process everything currently queued."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            if batch:
+                self.process(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+        return len(batch)
+
+    # Metrics
+
+    def _bump(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def stats(self):
+        with self._stats_lock:
+            data = dict(self._stats)
+        data.update({
+            'queue_depth': self._queue.qsize(),
+            'worker_alive': bool(self._worker and self._worker.is_alive()),
+        })
+        return data
+
+
+class NotificationPipeline(BackgroundQueue):
+    """Notification events, coalesced and written by the worker in batches."""
+    thread_name = 'notification-pipeline'
+
+    def __init__(self, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT, max_size=MAX_QUEUE_SIZE):
+        super().__init__(batch_size, batch_wait, max_size)
+        self._write_lock = threading.Lock()
+        self._stats.update({
+            'written': 0, 'coalesced': 0, 'merged': 0,
+            'lag_total': 0.0, 'lag_max': 0.0, 'events': 0,
+        })
+
+    def is_async(self):
+        return ASYNC
+
+    def on_dropped(self, event):
+        logger.warning('Notification queue full; dropped %s event', event.notification_type)
+
+    def on_error(self, batch):
+        logger.exception('Failed to write %d notifications', len(batch))
+
+    def process(self, events):
+        """Coalesce ``events`` and write them; returns the number of rows inserted."""
+        from .models import Notification
+
+        groups = OrderedDict()
+        for event in events:
+            groups.setdefault(event.key, []).append(event)
+
+        with self._write_lock, transaction.atomic():
+            merged = self._merge_into_unread(Notification, groups)
+            rows = []
+            for key, group in groups.items():
+                if key in merged:
+                    continue
+                latest = group[-1]
+                rows.append(Notification(
+                    recipient_id=latest.recipient_id,
+                    actor_id=latest.actor_id,
+                    verb=latest.verb,
+                    notification_type=latest.notification_type,
+                    content_type_id=latest.content_type_id,
+                    object_id=latest.object_id,
+                    actor_count=len({event.actor_id for event in group}),
+                ))
+            Notification.objects.bulk_create(rows)
+            # Merged rows were already unread, so only new rows move the badge.
+            apply_counter_deltas(
+                get_user_model(), 'unread_notification_count',
+                Counter(row.recipient_id for row in rows)
+            )
+            transaction.on_commit(lambda: self._publish(rows, merged, groups))
+
+        now = time.monotonic()
+        lags = [now - event.enqueued_at for event in events]
+        with self._stats_lock:
+            self._stats['written'] += len(rows)
+            self._stats['merged'] += len(merged)
+            self._stats['coalesced'] += len(events) - len(groups)
+            self._stats['batches'] += 1
+            self._stats['events'] += len(events)
+            self._stats['lag_total'] += sum(lags)
+            self._stats['lag_max'] = max([self._stats['lag_max']] + lags)
+        return len(rows)
+
+    def _merge_into_unread(self, Notification, groups):
+        """Fold coalescable groups into matching unread rows; returns ``{key: pk}``."""
+        keys = [key for key in groups if isinstance(key, tuple)]
+        if not keys:
+            return {}
+        recipients = {key[0] for key in keys}
+        object_ids = {key[3] for key in keys}
+        existing = {}
+        candidates = Notification.objects.filter(
+            recipient_id__in=recipients,
+            object_id__in=object_ids,
+            notification_type__in=COALESCE_TYPES,
+            is_read=False,
+        ).order_by('created_at').values_list(
+            'id', 'recipient_id', 'notification_type', 'content_type_id', 'object_id'
+        )
+        for pk, *key in candidates:
+            existing[tuple(key)] = pk
+
+        merged = {}
+        for key in keys:
+            pk = existing.get(key)
+            if pk is None:
+                continue
+            group = groups[key]
+            Notification.objects.filter(pk=pk).update(
+                actor_id=group[-1].actor_id,
+                actor_count=F('actor_count') + len({event.actor_id for event in group}),
+                created_at=timezone.now(),
+            )
+            merged[key] = pk
+        return merged
+
+    def _publish(self, rows, merged, groups):
+        """Push committed notifications to connected clients; best effort."""
+        try:
+            for row in rows:
+                publish(user_channel(row.recipient_id), 'notification', {
+                    'id': row.pk,
+                    'notification_type': row.notification_type,
+                    'verb': row.verb,
+                    'actor_id': row.actor_id,
+                    'actor_count': row.actor_count,
+                    'object_id': row.object_id,
+                    'merged': False,
+                })
+            for key, pk in merged.items():
+                latest = groups[key][-1]
+                publish(user_channel(latest.recipient_id), 'notification', {
+                    'id': pk,
+                    'notification_type': latest.notification_type,
+                    'verb': latest.verb,
+                    'actor_id': latest.actor_id,
+                    'object_id': latest.object_id,
+                    'merged': True,
+                })
+        except Exception:
+            logger.exception('Failed to publish notifications to live streams')
+
+    # Metrics
+
+    def stats(self):
+        data = super().stats()
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        events = data.pop('events')
+        lag_total = data.pop('lag_total')
+        data.update({
+            'events_per_second': events / elapsed,
+            'avg_lag_ms': 1000 * lag_total / events if events else 0.0,
+            'max_lag_ms': 1000 * data.pop('lag_max'),
+        })
+        return data
+
+
+pipeline = NotificationPipeline()
+
+
+def notify(recipient_id, actor_id, verb, notification_type, target=None):
+    """Queue a notification once the current transaction commits.
+
+    Self-notifications are ignored.
+    """
+    if recipient_id is None or recipient_id == actor_id:
+        return
+    content_type_id = object_id = None
+    if target is not None:
+        # get_for_model is served from ContentType's process-wide cache.
+        content_type_id = ContentType.objects.get_for_model(target).pk
+        object_id = target.pk
+    event = NotificationEvent(
+        recipient_id, actor_id, verb, notification_type, content_type_id, object_id
+    )
+    transaction.on_commit(lambda: pipeline.enqueue(event))
+
+
+def notify_mentions(text, actor_id, verb, target=None):
+    """Queue a mention notification for every @username found in ``text``."""
+    usernames = set(MENTION_RE.findall(text or ''))
+    if not usernames:
+        return
+    User = get_user_model()
+    for user_id in User.objects.filter(username__in=usernames).values_list('id', flat=True):
+        notify(user_id, actor_id, verb, 'mention', target=target)
+
+
+def flush():
+    return pipeline.flush()
+
+
+def stats():
+    return pipeline.stats()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        pipeline.flush()
+    except Exception:
+        pass
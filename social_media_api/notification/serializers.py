@@ -0,0 +1,32 @@
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import serializers
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    """Serializer for inbox notifications."""
+    actor = serializers.ReadOnlyField(source='actor.username')
+    summary = serializers.ReadOnlyField()
+    target = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'actor', 'actor_count', 'verb', 'summary',
+            'notification_type', 'target', 'is_read', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_target(self, obj):
+        if obj.content_type_id is None or obj.target is None:
+            return None
+        return {
+            'type': ContentType.objects.get_for_id(obj.content_type_id).model,
+            'id': obj.object_id,
+            'display': str(obj.target),
+        }
+
+
+class MarkReadSerializer(serializers.Serializer):
+    """Mark everything read, or only notifications up to and including an id."""
+    up_to_id = serializers.IntegerField(required=False, min_value=1)
@@ -0,0 +1,210 @@
+"""
+Live notification and feed stream.
+
+``StreamApplication`` wraps the Django ASGI application (see ``asgi.py``)
+and serves two endpoints under ``NOTIFICATIONS_STREAM_PATH``. All other
+requests pass through to Django.
+
+- ``GET /api/stream/`` is a server-sent events stream. It carries
+  ``notification`` events for the user and ``feed`` events for new posts
+  by accounts they follow. When idle it sends a keepalive comment every
+  ``NOTIFICATIONS_STREAM_HEARTBEAT`` seconds.
+- ``GET /api/stream/poll/`` is the long-poll fallback. It waits up to
+  ``?timeout=`` seconds, capped at ``NOTIFICATIONS_STREAM_POLL_TIMEOUT``,
+  and returns the events as JSON.
+
+Clients authenticate with ``Authorization: Token <key>``, or with
+``?token=<key>`` because EventSource cannot set headers. They resume with
+the ``Last-Event-ID`` header or ``?last_event_id=``. A ``reset`` event means
+events were lost: the replay buffer no longer reaches back far enough, or
+the client read too slowly and its backlog exceeded
+``NOTIFICATIONS_STREAM_MAX_PENDING``. The client should then refetch over
+REST. Slow consumers are disconnected after the reset rather than
+buffered without limit.
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+
+from .broker import author_channel, get_broker, user_channel
+
+logger = logging.getLogger('social_media_api')
+
+STREAM_PATH = getattr(settings, 'NOTIFICATIONS_STREAM_PATH', '/api/stream/')
+HEARTBEAT = getattr(settings, 'NOTIFICATIONS_STREAM_HEARTBEAT', 15)
+POLL_TIMEOUT = getattr(settings, 'NOTIFICATIONS_STREAM_POLL_TIMEOUT', 25)
+# Reconnect delay suggested to EventSource clients, in milliseconds.
+RETRY_MS = getattr(settings, 'NOTIFICATIONS_STREAM_RETRY_MS', 3000)
+
+
+def load_subscriber(token_key):
+    """Return ``(user, channels)`` for an API token, or ``(None, [])``."""
+    from rest_framework.authtoken.models import Token
+
+    try:
+        try:
+            token = Token.objects.select_related('user').get(key=token_key)
+        except Token.DoesNotExist:
+            return None, []
+        user = token.user
+        if not user.is_active:
+            return None, []
+        channels = [user_channel(user.pk)] + [
+            author_channel(pk) for pk in user.following.values_list('id', flat=True)
+        ]
+        return user, channels
+    finally:
+        # Streams outlive any request cycle, so release the connection here.
+        close_old_connections()
+
+
+def format_sse(event):
+    data = json.dumps(event.data, cls=DjangoJSONEncoder)
+    return f'id: {event.id}\nevent: {event.type}\ndata: {data}\n\n'
+
+
+def format_reset(reason):
+    return f'event: reset\ndata: {json.dumps({"reason": reason})}\n\n'
+
+
+def event_as_dict(event):
+    return {'id': event.id, 'type': event.type, 'data': event.data}
+
+
+class StreamApplication:
+    """ASGI middleware serving the live stream in front of Django."""
+
+    def __init__(self, app, path=STREAM_PATH, broker=None):
+        self.app = app
+        self.path = path
+        self._broker = broker
+
+    @property
+    def broker(self):
+        return self._broker or get_broker()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.path):
+            return await self.app(scope, receive, send)
+
+        if scope['path'] == self.path:
+            handler = self.stream
+        elif scope['path'] == self.path + 'poll/':
+            handler = self.long_poll
+        else:
+            return await self.send_json(send, 404, {'detail': 'Not found.'})
+        if scope['method'] != 'GET':
+            return await self.send_json(send, 405, {'detail': f'Method "{scope["method"]}" not allowed.'})
+
+        headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+        query = {key: values[-1] for key, values in parse_qs(scope['query_string'].decode()).items()}
+
+        token_key = query.get('token')
+        auth = headers.get('authorization', '').split()
+        if len(auth) == 2 and auth[0].lower() == 'token':
+            token_key = auth[1]
+        if not token_key:
+            return await self.send_json(send, 401, {'detail': 'Authentication credentials were not provided.'})
+        user, channels = await sync_to_async(load_subscriber)(token_key)
+        if user is None:
+            return await self.send_json(send, 401, {'detail': 'Invalid token.'})
+
+        last_event_id = headers.get('last-event-id') or query.get('last_event_id')
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return await self.send_json(send, 400, {'detail': 'Invalid last event id.'})
+
+        await handler(scope, receive, send, channels, last_event_id, query)
+
+    async def stream(self, scope, receive, send, channels, last_event_id, query):
+        subscription, backlog, gap = self.broker.subscribe(channels, last_event_id)
+        watcher = asyncio.ensure_future(self._close_on_disconnect(receive, subscription))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),
+                ],
+            })
+            opening = f'retry: {RETRY_MS}\n\n'
+            if gap:
+                opening += format_reset('gap')
+            opening += ''.join(format_sse(event) for event in backlog)
+            await self._send_chunk(send, opening)
+
+            while not subscription.closed:
+                batch = await subscription.next_batch(HEARTBEAT)
+                if subscription.closed:
+                    break
+                if subscription.overflowed:
+                    logger.info('Closing a notification stream that fell behind')
+                    await self._send_chunk(send, format_reset('overflow'))
+                    break
+                if batch:
+                    await self._send_chunk(send, ''.join(format_sse(event) for event in batch))
+                else:
+                    await self._send_chunk(send, ': keepalive\n\n')
+
+            if not watcher.done():
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        except OSError:
+            # The client went away mid-write.
+            pass
+        finally:
+            watcher.cancel()
+            subscription.close()
+
+    async def long_poll(self, scope, receive, send, channels, last_event_id, query):
+        try:
+            timeout = min(float(query.get('timeout', POLL_TIMEOUT)), POLL_TIMEOUT)
+        except ValueError:
+            timeout = POLL_TIMEOUT
+        if last_event_id is None:
+            # First poll: start from now, but replay anything published meanwhile.
+            last_event_id = self.broker.latest_id()
+        subscription, events, gap = self.broker.subscribe(channels, last_event_id)
+        try:
+            if not events and not gap:
+                events = await subscription.next_batch(max(timeout, 0))
+        finally:
+            subscription.close()
+        # Events that arrived between waking up and unsubscribing.
+        events += subscription.drain()
+        reset = gap or subscription.overflowed
+        await self.send_json(send, 200, {
+            'events': [event_as_dict(event) for event in events],
+            'last_event_id': events[-1].id if events else last_event_id,
+            'reset': reset,
+        })
+
+    async def _close_on_disconnect(self, receive, subscription):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                subscription.close()
+                return
+
+    async def _send_chunk(self, send, text):
+        await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+    async def send_json(self, send, status, payload):
+        body = json.dumps(payload, cls=DjangoJSONEncoder).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from .inbox import mark_read
+from .models import Notification
+from .pipeline import NotificationEvent, NotificationPipeline
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF='notification.urls')
+class MarkReadTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user', password='password123')
+        self.fans = [
+            User.objects.create_user(username=f'fan{n}', password='password123') for n in range(3)
+        ]
+        self.post = Post.objects.create(author=self.user, title='Post', content='Body')
+        self.pipeline = NotificationPipeline()
+        self.client.force_authenticate(self.user)
+
+    def like(self, fan):
+        event = NotificationEvent(
+            self.user.id, fan.id, 'liked your post', 'like',
+            ContentType.objects.get_for_model(Post).pk, self.post.id,
+        )
+        self.pipeline.process([event])
+
+    def follow(self, fan):
+        self.pipeline.process([NotificationEvent(self.user.id, fan.id, 'started following you', 'follow')])
+        return Notification.objects.latest('id')
+
+    def unread(self):
+        return set(Notification.objects.filter(is_read=False).values_list('id', flat=True))
+
+    def test_mark_all_read(self):
+        self.follow(self.fans[0])
+        self.follow(self.fans[1])
+        response = self.client.post(reverse('notification-mark-read'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'marked_read': 2, 'unread_count': 0})
+        self.assertEqual(self.unread(), set())
+
+    def test_mark_read_up_to_a_notification(self):
+        older = self.follow(self.fans[0])
+        seen = self.follow(self.fans[1])
+        newer = self.follow(self.fans[2])
+        Notification.objects.filter(pk=newer.pk).update(created_at=seen.created_at)
+
+        response = self.client.post(reverse('notification-mark-read'), {'up_to_id': seen.pk})
+        self.assertEqual(response.data, {'marked_read': 2, 'unread_count': 1})
+        self.assertEqual(self.unread(), {newer.pk})
+        self.assertNotIn(older.pk, self.unread())
+
+    def test_merged_rows_above_the_cursor_stay_unread(self):
+        self.like(self.fans[0])
+        like = Notification.objects.get(notification_type='like')
+        seen = self.follow(self.fans[1])
+        # A new like moves the older like row back to the top of the inbox.
+        self.like(self.fans[2])
+
+        self.assertEqual(mark_read(self.user, up_to_id=seen.pk), 1)
+        self.assertEqual(self.unread(), {like.pk})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.unread_notification_count, 1)
+
+    def test_unknown_cursor_marks_nothing(self):
+        self.follow(self.fans[0])
+        other = User.objects.create_user(username='other', password='password123')
+        foreign = Notification.objects.create(recipient=other, verb='hello')
+        self.assertEqual(mark_read(self.user, up_to_id=foreign.pk), 0)
+        self.assertEqual(len(self.unread()), 2)
+
+    def test_unread_count_and_filter(self):
+        first = self.follow(self.fans[0])
+        self.follow(self.fans[1])
+        first.mark_as_read()
+        self.user.refresh_from_db()
+
+        response = self.client.get(reverse('notification-unread-count'))
+        self.assertEqual(response.data, {'unread_count': 1})
+        response = self.client.get(reverse('notification-list'), {'unread': 'true'})
+        self.assertEqual([row['id'] for row in response.data['results']], [first.pk + 1])
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+
+from posts.models import Post
+from .models import Notification
+from .pipeline import NotificationEvent, NotificationPipeline, notify_mentions
+
+User = get_user_model()
+
+
+class NotificationPipelineTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.fans = [
+            User.objects.create_user(username=f'fan{n}', password='password123') for n in range(3)
+        ]
+        self.post = Post.objects.create(author=self.author, title='Post', content='Body')
+        self.post_type = ContentType.objects.get_for_model(Post).pk
+        self.pipeline = NotificationPipeline()
+
+    def like(self, fan):
+        return NotificationEvent(
+            self.author.id, fan.id, 'liked your post', 'like', self.post_type, self.post.id
+        )
+
+    def follow(self, fan):
+        return NotificationEvent(self.author.id, fan.id, 'started following you', 'follow')
+
+    def unread_count(self):
+        self.author.refresh_from_db()
+        return self.author.unread_notification_count
+
+    def test_likes_in_a_batch_coalesce_into_one_row(self):
+        self.assertEqual(self.pipeline.process([self.like(fan) for fan in self.fans]), 1)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.actor_id, self.fans[-1].id)
+        self.assertEqual(notification.summary, 'fan2 and 2 others liked your post')
+        self.assertEqual(self.unread_count(), 1)
+        self.assertEqual(self.pipeline.stats()['coalesced'], 2)
+
+    def test_repeated_actor_counts_once(self):
+        self.pipeline.process([self.like(self.fans[0]), self.like(self.fans[0])])
+        self.assertEqual(Notification.objects.get().actor_count, 1)
+
+    def test_later_likes_merge_into_the_unread_row(self):
+        self.pipeline.process([self.like(self.fans[0])])
+        self.assertEqual(self.pipeline.process([self.like(self.fans[1])]), 0)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(self.unread_count(), 1)
+        self.assertEqual(self.pipeline.stats()['merged'], 1)
+
+    def test_read_rows_are_not_merged_into(self):
+        self.pipeline.process([self.like(self.fans[0])])
+        Notification.objects.update(is_read=True)
+        self.pipeline.process([self.like(self.fans[1])])
+        self.assertEqual(Notification.objects.count(), 2)
+
+    def test_follows_are_never_coalesced(self):
+        self.assertEqual(self.pipeline.process([self.follow(fan) for fan in self.fans]), 3)
+        self.assertEqual(self.unread_count(), 3)
+
+    def test_batch_is_written_with_constant_queries(self):
+        events = [self.follow(fan) for fan in self.fans] + [self.like(fan) for fan in self.fans]
+        with self.assertNumQueries(5):
+            self.pipeline.process(events)
+
+    def test_full_queue_drops_events(self):
+        pipeline = NotificationPipeline(max_size=1)
+        with mock.patch('notification.pipeline.ASYNC', True), \
+                mock.patch.object(pipeline, '_ensure_worker'):
+            pipeline.enqueue(self.follow(self.fans[0]))
+            pipeline.enqueue(self.follow(self.fans[1]))
+        self.assertEqual(pipeline.stats()['dropped'], 1)
+        self.assertEqual(pipeline.flush(), 1)
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_mentions_notify_each_user_once(self):
+        with mock.patch('notification.pipeline.ASYNC', False):
+            with self.captureOnCommitCallbacks(execute=True):
+                notify_mentions('@fan0 @fan1 @fan0 @nobody', self.author.id, 'mentioned you')
+        self.assertEqual(
+            set(Notification.objects.values_list('recipient__username', flat=True)),
+            {'fan0', 'fan1'},
+        )
@@ -0,0 +1,224 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from .broker import InMemoryBroker, author_channel, user_channel
+from .stream import StreamApplication
+
+CHANNELS = [user_channel(1), author_channel(2)]
+
+
+async def django_app(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+class StreamClient:
+    """Drives one ASGI request and records what the app sends."""
+
+    def __init__(self, app, path, method='GET', query='', headers=()):
+        self.scope = {
+            'type': 'http', 'method': method, 'path': path,
+            'query_string': query.encode(),
+            'headers': [(name.encode(), value.encode()) for name, value in headers],
+        }
+        self.app = app
+        self.sent = []
+        self.disconnected = asyncio.Event()
+        self.body_received = asyncio.Event()
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.sent.append(message)
+        if message['type'] == 'http.response.body':
+            self.body_received.set()
+
+    def start(self):
+        return asyncio.ensure_future(self.app(self.scope, self.receive, self.send))
+
+    async def run(self):
+        await self.start()
+        return self
+
+    @property
+    def status(self):
+        return self.sent[0]['status']
+
+    @property
+    def body(self):
+        return b''.join(m.get('body', b'') for m in self.sent if m['type'] == 'http.response.body').decode()
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def sse_events(body):
+    events = []
+    for block in body.split('\n\n'):
+        lines = [line for line in block.splitlines() if ': ' in line and not line.startswith(':')]
+        fields = dict(line.split(': ', 1) for line in lines)
+        if 'event' in fields:
+            events.append(fields)
+    return events
+
+
+class BrokerTests(SimpleTestCase):
+
+    async def test_subscribers_receive_their_channels_only(self):
+        broker = InMemoryBroker()
+        subscription, backlog, gap = broker.subscribe([user_channel(1)])
+        broker.publish(user_channel(1), 'notification', {'n': 1})
+        broker.publish(user_channel(2), 'notification', {'n': 2})
+        batch = await subscription.next_batch(1)
+        self.assertEqual([event.data for event in batch], [{'n': 1}])
+        self.assertEqual((backlog, gap), ([], False))
+
+    async def test_replay_after_last_event_id(self):
+        broker = InMemoryBroker(replay_size=10)
+        ids = [broker.publish(user_channel(1), 'notification', {'n': n}).id for n in range(3)]
+        _, backlog, gap = broker.subscribe([user_channel(1)], last_event_id=ids[0])
+        self.assertEqual([event.id for event in backlog], ids[1:])
+        self.assertFalse(gap)
+
+    async def test_evicted_history_reports_a_gap(self):
+        broker = InMemoryBroker(replay_size=2)
+        ids = [broker.publish(user_channel(1), 'notification', {'n': n}).id for n in range(4)]
+        _, backlog, gap = broker.subscribe([user_channel(1)], last_event_id=ids[0])
+        self.assertTrue(gap)
+        self.assertEqual([event.id for event in backlog], ids[2:])
+
+    async def test_slow_consumer_overflows_and_drops_its_backlog(self):
+        broker = InMemoryBroker(max_pending=2)
+        subscription, _, _ = broker.subscribe([user_channel(1)])
+        for n in range(3):
+            broker.publish(user_channel(1), 'notification', {'n': n})
+        self.assertTrue(subscription.overflowed)
+        self.assertEqual(subscription.drain(), [])
+        self.assertEqual(broker.stats()['overflows'], 1)
+
+    async def test_closed_subscriptions_are_unregistered(self):
+        broker = InMemoryBroker()
+        subscription, _, _ = broker.subscribe(CHANNELS)
+        subscription.close()
+        broker.publish(user_channel(1), 'notification', {})
+        self.assertEqual(broker.stats()['subscriptions'], 0)
+        self.assertEqual(subscription.drain(), [])
+
+
+def load_subscriber(token_key):
+    return (object(), CHANNELS) if token_key == 'good' else (None, [])
+
+
+@mock.patch('notification.stream.load_subscriber', load_subscriber)
+class StreamApplicationTests(SimpleTestCase):
+
+    def setUp(self):
+        self.broker = InMemoryBroker(replay_size=3, max_pending=3)
+        self.app = StreamApplication(django_app, broker=self.broker)
+
+    def request(self, path='/api/stream/', query='token=good', **kwargs):
+        return StreamClient(self.app, path, query=query, **kwargs)
+
+    async def open_stream(self, **kwargs):
+        client = self.request(**kwargs)
+        task = client.start()
+        await asyncio.wait_for(client.body_received.wait(), 1)
+        return client, task
+
+    async def close_stream(self, client, task):
+        client.disconnected.set()
+        await asyncio.wait_for(task, 1)
+
+    async def test_other_paths_reach_django(self):
+        client = await self.request(path='/api/posts/').run()
+        self.assertEqual(client.status, 204)
+
+    async def test_requests_are_checked(self):
+        self.assertEqual((await self.request(query='').run()).status, 401)
+        self.assertEqual((await self.request(query='token=bad').run()).status, 401)
+        self.assertEqual((await StreamClient(self.app, '/api/stream/', 'POST', 'token=good').run()).status, 405)
+        self.assertEqual((await self.request(query='token=good&last_event_id=x').run()).status, 400)
+        self.assertEqual((await self.request(path='/api/stream/other/').run()).status, 404)
+
+    async def test_sse_delivers_published_events(self):
+        client, task = await self.open_stream(
+            query='', headers=[('authorization', 'Token good')]
+        )
+        self.assertIn((b'content-type', b'text/event-stream'), client.sent[0]['headers'])
+        client.body_received.clear()
+        event = self.broker.publish(author_channel(2), 'feed', {'post_id': 5})
+        self.broker.publish(author_channel(3), 'feed', {'post_id': 6})
+        await asyncio.wait_for(client.body_received.wait(), 1)
+        await self.close_stream(client, task)
+
+        self.assertTrue(client.body.startswith('retry: '))
+        self.assertEqual(sse_events(client.body), [
+            {'id': str(event.id), 'event': 'feed', 'data': '{"post_id": 5}'},
+        ])
+
+    async def test_last_event_id_replays_missed_events(self):
+        ids = [self.broker.publish(user_channel(1), 'notification', {'n': n}).id for n in range(3)]
+        client, task = await self.open_stream(headers=[('last-event-id', str(ids[0]))])
+        await self.close_stream(client, task)
+        self.assertEqual([event['id'] for event in sse_events(client.body)], [str(i) for i in ids[1:]])
+
+    async def test_replay_gap_sends_a_reset(self):
+        ids = [self.broker.publish(user_channel(1), 'notification', {'n': n}).id for n in range(5)]
+        client, task = await self.open_stream(query=f'token=good&last_event_id={ids[0]}')
+        await self.close_stream(client, task)
+        events = sse_events(client.body)
+        self.assertEqual(events[0], {'event': 'reset', 'data': '{"reason": "gap"}'})
+        self.assertEqual([event['id'] for event in events[1:]], [str(i) for i in ids[2:]])
+
+    async def test_slow_consumer_is_reset_and_closed(self):
+        client, task = await self.open_stream()
+        subscription = next(iter(self.broker._subscribers[user_channel(1)]))
+        # Fill the subscriber's buffer before the stream gets to read it.
+        with mock.patch.object(subscription, '_wake'):
+            for n in range(4):
+                self.broker.publish(user_channel(1), 'notification', {'n': n})
+        subscription._loop.call_soon_threadsafe(subscription._ready.set)
+        await asyncio.wait_for(task, 1)
+
+        self.assertEqual(sse_events(client.body)[-1], {'event': 'reset', 'data': '{"reason": "overflow"}'})
+        self.assertFalse(client.sent[-1]['more_body'])
+        self.assertEqual(self.broker.stats()['subscriptions'], 0)
+
+    async def test_long_poll_times_out_with_a_cursor(self):
+        self.broker.publish(user_channel(1), 'notification', {})
+        client = await self.request(path='/api/stream/poll/', query='token=good&timeout=0.05').run()
+        self.assertEqual(client.json(), {
+            'events': [], 'last_event_id': self.broker.latest_id(), 'reset': False,
+        })
+
+    async def test_long_poll_returns_events_after_the_cursor(self):
+        first = self.broker.publish(user_channel(1), 'notification', {'n': 1})
+        second = self.broker.publish(user_channel(1), 'notification', {'n': 2})
+        client = await self.request(
+            path='/api/stream/poll/', query=f'token=good&timeout=5&last_event_id={first.id}'
+        ).run()
+        data = client.json()
+        self.assertEqual([event['id'] for event in data['events']], [second.id])
+        self.assertEqual(data['last_event_id'], second.id)
+
+    async def test_long_poll_wakes_on_publish(self):
+        client = self.request(path='/api/stream/poll/', query='token=good&timeout=5')
+        task = client.start()
+        await asyncio.sleep(0.05)
+        event = self.broker.publish(author_channel(2), 'feed', {'post_id': 1})
+        await asyncio.wait_for(task, 1)
+        self.assertEqual(client.json()['events'], [{'id': event.id, 'type': 'feed', 'data': {'post_id': 1}}])
+
+    async def test_long_poll_reports_gaps(self):
+        ids = [self.broker.publish(user_channel(1), 'notification', {'n': n}).id for n in range(5)]
+        client = await self.request(
+            path='/api/stream/poll/', query=f'token=good&timeout=5&last_event_id={ids[0]}'
+        ).run()
+        data = client.json()
+        self.assertTrue(data['reset'])
+        self.assertEqual(data['last_event_id'], ids[-1])
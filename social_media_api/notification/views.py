@@ -0,0 +1,63 @@
+from rest_framework import generics, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from posts.pagination import KeysetPagination
+from . import pipeline
+from .broker import get_broker
+from .inbox import inbox_queryset, mark_read
+from .loaders import attach_targets
+from .serializers import NotificationSerializer, MarkReadSerializer
+
+
+class NotificationListView(generics.ListAPIView):
+    """The current user's notifications, newest first, cursor-paginated."""
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = NotificationSerializer
+    pagination_class = KeysetPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        queryset = inbox_queryset(self.request.user)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            page = attach_targets(page, recipient=self.request.user)
+        return page
+
+
+class UnreadCountView(APIView):
+    """Unread badge count, read from the user's counter column."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread_count': request.user.unread_notification_count})
+
+
+class MarkReadView(APIView):
+    """Mark all notifications, or all up to ``up_to_id``, as read in one UPDATE."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_read(request.user, serializer.validated_data.get('up_to_id'))
+        request.user.refresh_from_db(fields=['unread_notification_count'])
+        return Response({
+            'marked_read': updated,
+            'unread_count': request.user.unread_notification_count
+        })
+
+
+class NotificationPipelineStatsView(APIView):
+    """Throughput, lag and queue depth of the notification pipeline (admins only)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        data = pipeline.stats()
+        data['stream'] = get_broker().stats()
+        return Response(data)
@@ -0,0 +1,210 @@
+"""
+Synthetic data for benchmarks.
+
+Generates users, a power-law follow graph, posts, likes and comments in
+bulk. A few accounts collect most followers and likes while most have
+very few, as on a real social network. Everything is written with batched
+``bulk_create``, so no signals fire. ``seed`` repairs the denormalized
+counters and builds the materialized feeds afterwards.
+
+All generated usernames start with ``BENCH_PREFIX``, so ``clear()`` can
+remove a previous data set. Pass the same ``seed`` to get the same graph.
+"""
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.utils import timezone
+
+from accounts.follow_graph import Follow
+from .feed import backfill_feed_many
+from .models import Post, Comment
+
+User = get_user_model()
+Like = Post.likes.through
+
+BENCH_PREFIX = 'bench_'
+BATCH_SIZE = 5000
+
+SCALES = {
+    'small': {'users': 1000, 'avg_following': 20, 'posts': 10000, 'likes': 50000, 'comments': 20000},
+    'medium': {'users': 10000, 'avg_following': 50, 'posts': 200000, 'likes': 1000000, 'comments': 300000},
+    'large': {'users': 100000, 'avg_following': 80, 'posts': 2000000, 'likes': 10000000, 'comments': 3000000},
+}
+
+WORDS = (
+    'django api feed post comment follow like python cache query index '
+    'latency stream user graph database batch page cursor token signal '
+    'model view serializer request response weekend coffee travel music'
+).split()
+
+
+def zipf_cum_weights(n, alpha):
+    """Cumulative weights where item ``i`` has weight ``1 / (i + 1) ** alpha``."""
+    return list(itertools.accumulate(1 / (rank + 1) ** alpha for rank in range(n)))
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the ``created_at`` values we set."""
+    fields = [model._meta.get_field('created_at') for model in models]
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+def _bulk(model, rows, ignore_conflicts=False):
+    batch = []
+    written = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+            written += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch, ignore_conflicts=ignore_conflicts)
+        written += len(batch)
+    return written
+
+
+def create_users(count, rng):
+    """Create ``count`` users; returns their ids, most popular first."""
+    # Hashing once keeps 100k users from taking minutes.
+    password = make_password('benchmark')
+    start = User.objects.filter(username__startswith=BENCH_PREFIX).count()
+    usernames = [f'{BENCH_PREFIX}{start + n}' for n in range(count)]
+    _bulk(User, (
+        User(username=name, email=f'{name}@example.com', password=password,
+             bio=sentence(rng, 8))
+        for name in usernames
+    ))
+    by_name = dict(
+        User.objects.filter(username__startswith=BENCH_PREFIX).values_list('username', 'id')
+    )
+    return [by_name[name] for name in usernames]
+
+
+def create_follow_graph(user_ids, avg_following, rng, alpha=1.1):
+    """
+    Give every user a heavy-tailed number of followees, chosen by a Zipf
+    popularity over ``user_ids``. Returns the number of edges.
+    """
+    cum_weights = zipf_cum_weights(len(user_ids), alpha)
+
+    def edges():
+        for follower in user_ids:
+            # Pareto(1.5) has mean 3, so this averages avg_following.
+            wanted = min(int(rng.paretovariate(1.5) * avg_following / 3), len(user_ids) - 1)
+            targets = set(rng.choices(user_ids, cum_weights=cum_weights, k=wanted))
+            targets.discard(follower)
+            for target in targets:
+                # (from_customuser=A, to_customuser=B) means B follows A.
+                yield Follow(from_customuser_id=target, to_customuser_id=follower)
+
+    return _bulk(Follow, edges(), ignore_conflicts=True)
+
+
+def create_posts(user_ids, count, rng, days=90, alpha=0.8):
+    """Create ``count`` posts, written mostly by popular users; returns their ids."""
+    cum_weights = zipf_cum_weights(len(user_ids), alpha)
+    now = timezone.now()
+    window = days * 24 * 3600
+    with explicit_timestamps(Post):
+        first_id = (Post.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        _bulk(Post, (
+            Post(
+                author_id=author_id,
+                title=sentence(rng, 5).capitalize(),
+                content=sentence(rng, 40),
+                created_at=now - timedelta(seconds=rng.randrange(window)),
+            )
+            for author_id in rng.choices(user_ids, cum_weights=cum_weights, k=count)
+        ))
+    return list(Post.objects.filter(id__gte=first_id).values_list('id', flat=True))
+
+
+def create_likes(user_ids, post_ids, count, rng, alpha=1.0):
+    """Create up to ``count`` likes, concentrated on a few posts.
+
+    Duplicate (post, user) pairs are skipped, so fewer rows may be written.
+    """
+    cum_weights = zipf_cum_weights(len(post_ids), alpha)
+    # Shuffle so the most liked posts are not simply the oldest ones.
+    post_ids = rng.sample(post_ids, len(post_ids))
+    pairs = zip(
+        rng.choices(post_ids, cum_weights=cum_weights, k=count),
+        rng.choices(user_ids, k=count),
+    )
+    return _bulk(Like, (
+        Like(post_id=post_id, customuser_id=user_id) for post_id, user_id in pairs
+    ), ignore_conflicts=True)
+
+
+def create_comments(user_ids, post_ids, count, rng, days=90, alpha=1.0):
+    cum_weights = zipf_cum_weights(len(post_ids), alpha)
+    post_ids = rng.sample(post_ids, len(post_ids))
+    now = timezone.now()
+    window = days * 24 * 3600
+    with explicit_timestamps(Comment):
+        return _bulk(Comment, (
+            Comment(
+                post_id=post_id,
+                author_id=rng.choice(user_ids),
+                content=sentence(rng, 15),
+                created_at=now - timedelta(seconds=rng.randrange(window)),
+            )
+            for post_id in rng.choices(post_ids, cum_weights=cum_weights, k=count)
+        ))
+
+
+def build_feeds(user_ids):
+    """Materialize the home feed of every user, as a follow would."""
+    users = User.objects.filter(id__in=user_ids).only('id').iterator(chunk_size=BATCH_SIZE)
+    for user in users:
+        backfill_feed_many(user, user.following.values_list('id', flat=True))
+
+
+def clear():
+    """Delete every generated user; their posts, likes and comments cascade."""
+    return User.objects.filter(username__startswith=BENCH_PREFIX).delete()
+
+
+def seed(scale='small', seed=0, feeds=True, log=None, **overrides):
+    """Generate a full data set; returns the counts used."""
+    params = dict(SCALES[scale], **{key: value for key, value in overrides.items() if value is not None})
+    rng = random.Random(seed)
+    log = log or (lambda message: None)
+
+    log(f"Creating {params['users']} users")
+    user_ids = create_users(params['users'], rng)
+    log('Creating follow graph')
+    params['follows'] = create_follow_graph(user_ids, params['avg_following'], rng)
+    log(f"Creating {params['posts']} posts")
+    post_ids = create_posts(user_ids, params['posts'], rng)
+    log(f"Creating {params['likes']} likes")
+    params['likes'] = create_likes(user_ids, post_ids, params['likes'], rng)
+    log(f"Creating {params['comments']} comments")
+    params['comments'] = create_comments(user_ids, post_ids, params['comments'], rng)
+
+    log('Reconciling counters')
+    call_command('reconcile_counters', stdout=StringIO())
+    if feeds:
+        log('Building feeds')
+        build_feeds(user_ids)
+    params.update(scale=scale, seed=seed)
+    return params
@@ -0,0 +1,286 @@
+"""
+Materialized home feed (fan-out-on-write).
+
+Every new post is copied into a FeedEntry row per follower, so reading a
+home feed is a single range scan on (owner, created_at) instead of an
+``author__in`` subquery over everyone the user follows.
+
+Feeds are trimmed to ``FEED_MAX_DEPTH`` entries when a follow backfills
+them. Fan-out does not trim (that would be one DELETE per follower per
+post), so deployments must run the ``trim_feeds`` management command
+periodically to keep FeedEntry bounded.
+
+Authors with at least ``FEED_CELEBRITY_THRESHOLD`` followers are not fanned
+out; their posts are merged into the feed at read time instead, so one post
+never turns into millions of inserts.
+
+Fan-out starts on the request thread once the post commits, but only for
+the first ``FEED_FANOUT_INLINE_LIMIT`` followers (one INSERT). The rest are
+handed to a background worker (see ``notification.pipeline``), so a
+request never waits for more than one bounded batch. Set
+``FEED_FANOUT_ASYNC = False`` to deliver everything inline.
+"""
+import atexit
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
+from notification.broker import author_channel, publish
+from notification.pipeline import BackgroundQueue
+from .models import Post, FeedEntry
+from .pagination import keyset_filter
+
+logger = logging.getLogger('social_media_api')
+
+User = get_user_model()
+
+FEED_MAX_DEPTH = getattr(settings, 'FEED_MAX_DEPTH', 800)
+FEED_CELEBRITY_THRESHOLD = getattr(settings, 'FEED_CELEBRITY_THRESHOLD', 10000)
+FEED_FANOUT_BATCH_SIZE = getattr(settings, 'FEED_FANOUT_BATCH_SIZE', 1000)
+FEED_FANOUT_INLINE_LIMIT = getattr(settings, 'FEED_FANOUT_INLINE_LIMIT', FEED_FANOUT_BATCH_SIZE)
+FEED_FANOUT_ASYNC = getattr(settings, 'FEED_FANOUT_ASYNC', True)
+FEED_FANOUT_MAX_QUEUE_SIZE = getattr(settings, 'FEED_FANOUT_MAX_QUEUE_SIZE', 10000)
+
+
+def is_celebrity(user):
+    """Return True if posts by ``user`` are merged on read instead of fanned out."""
+    return user.follower_count >= FEED_CELEBRITY_THRESHOLD
+
+
+def celebrity_ids(user):
+    """IDs of the celebrity accounts ``user`` follows."""
+    return list(
+        user.following.filter(follower_count__gte=FEED_CELEBRITY_THRESHOLD)
+        .values_list('id', flat=True)
+    )
+
+
+def _entries_for(post, owner_ids):
+    return [
+        FeedEntry(
+            owner_id=owner_id,
+            post_id=post.id,
+            author_id=post.author_id,
+            created_at=post.created_at,
+        )
+        for owner_id in owner_ids
+    ]
+
+
+def announce_post(post):
+    """Publish a new post to live streams following its author.
+
+    This is one event per post on the author's channel, whatever the
+    follower count.
+    """
+    return publish(author_channel(post.author_id), 'feed', {
+        'post_id': post.id,
+        'author_id': post.author_id,
+        'title': post.title,
+        'created_at': post.created_at,
+    })
+
+
+def _deliver(post, follower_ids):
+    """Write ``post`` into the feeds of ``follower_ids``; returns entries attempted.
+
+    Entries a concurrent backfill already wrote are skipped by
+    ``ignore_conflicts`` but still counted, as the database does not report
+    them.
+    """
+    attempted = 0
+    batch = []
+    for follower_id in follower_ids.iterator(chunk_size=FEED_FANOUT_BATCH_SIZE):
+        batch.append(follower_id)
+        if len(batch) >= FEED_FANOUT_BATCH_SIZE:
+            FeedEntry.objects.bulk_create(_entries_for(post, batch), ignore_conflicts=True)
+            attempted += len(batch)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(_entries_for(post, batch), ignore_conflicts=True)
+        attempted += len(batch)
+    return attempted
+
+
+def _followers_after(post, follower_id):
+    followers = post.author.followers.order_by('id')
+    if follower_id is not None:
+        followers = followers.filter(id__gt=follower_id)
+    return followers.values_list('id', flat=True)
+
+
+class FanOutQueue(BackgroundQueue):
+    """Delivers the followers past ``FEED_FANOUT_INLINE_LIMIT`` off the request thread.
+
+    Items are ``(post_id, follower_id)``: the post goes to every follower
+    of its author with an id above ``follower_id``.
+    """
+    thread_name = 'feed-fanout'
+
+    def __init__(self, max_size=FEED_FANOUT_MAX_QUEUE_SIZE):
+        # One post per batch: each is already up to a whole follower list.
+        super().__init__(1, 0, max_size)
+        self._stats['attempted'] = 0
+
+    def is_async(self):
+        return FEED_FANOUT_ASYNC
+
+    def on_dropped(self, item):
+        logger.warning('Fan-out queue full; post %s reached only part of its followers', item[0])
+
+    def on_error(self, batch):
+        logger.exception('Failed to fan out post %s', batch[0][0])
+
+    def process(self, items):
+        for post_id, follower_id in items:
+            post = Post.objects.select_related('author').filter(pk=post_id).first()
+            if post is None:
+                continue  # Deleted since; its entries would cascade away.
+            self._bump('attempted', _deliver(post, _followers_after(post, follower_id)))
+            self._bump('batches')
+
+
+fan_out_queue = FanOutQueue()
+
+
+def fan_out_post(post, limit=None):
+    """Deliver a new post to the feed of every follower of its author.
+
+    The first ``limit`` followers (default ``FEED_FANOUT_INLINE_LIMIT``) are
+    written here, in follower id order; the rest are queued for the fan-out
+    worker. Returns the number of feed entries attempted here (0 for
+    celebrity authors). Follower feeds are not trimmed; see ``trim_feeds``.
+    """
+    if is_celebrity(post.author):
+        return 0
+
+    limit = FEED_FANOUT_INLINE_LIMIT if limit is None else limit
+    inline = list(_followers_after(post, None)[:limit + 1])
+    if len(inline) > limit:
+        inline = inline[:limit]
+        fan_out_queue.enqueue((post.id, inline[-1] if inline else 0))
+    if not inline:
+        return 0
+    FeedEntry.objects.bulk_create(_entries_for(post, inline), ignore_conflicts=True)
+    return len(inline)
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        fan_out_queue.flush()
+    except Exception:
+        pass
+
+
+def backfill_feed(owner, author):
+    """Copy the most recent posts of ``author`` into ``owner``'s feed after a follow."""
+    return backfill_feed_many(owner, [author.id])
+
+
+def backfill_feed_many(owner, author_ids):
+    """Backfill ``owner``'s feed after following several authors at once.
+
+    Only the newest ``FEED_MAX_DEPTH`` posts across all of them can survive
+    trimming, so a single bounded query covers every author.
+    """
+    author_ids = list(
+        User.objects.filter(id__in=author_ids, follower_count__lt=FEED_CELEBRITY_THRESHOLD)
+        .values_list('id', flat=True)
+    )
+    if not author_ids:
+        return 0
+
+    recent_posts = (
+        Post.objects.filter(author_id__in=author_ids)
+        .order_by('-created_at')
+        .values_list('id', 'author_id', 'created_at')[:FEED_MAX_DEPTH]
+    )
+    entries = [
+        FeedEntry(
+            owner_id=owner.id,
+            post_id=post_id,
+            author_id=author_id,
+            created_at=created_at,
+        )
+        for post_id, author_id, created_at in recent_posts
+    ]
+    FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    trim_feed(owner)
+    return len(entries)
+
+
+def retract_feed(owner, author):
+    """Remove every post by ``author`` from ``owner``'s feed after an unfollow."""
+    return retract_feed_many(owner, [author.id])
+
+
+def retract_feed_many(owner, author_ids):
+    """Remove posts by any of ``author_ids`` from ``owner``'s feed."""
+    deleted, _ = FeedEntry.objects.filter(owner=owner, author_id__in=author_ids).delete()
+    return deleted
+
+
+def trim_feed(owner, depth=None):
+    """Drop feed entries of ``owner`` past the newest ``depth`` rows.
+
+    Rows are cut on the feed's (created_at, post_id) order, so entries
+    sharing the cutoff timestamp are kept when they are within ``depth``.
+    """
+    depth = FEED_MAX_DEPTH if depth is None else depth
+    cutoff = list(
+        FeedEntry.objects.filter(owner=owner)
+        .order_by('-created_at', '-post_id')
+        .values_list('created_at', 'post_id')[depth:depth + 1]
+    )
+    if not cutoff:
+        return 0
+    created_at, post_id = cutoff[0]
+    beyond = (
+        keyset_filter(cutoff[0], descending=True, pk='post_id') |
+        Q(created_at=created_at, post_id=post_id)
+    )
+    deleted, _ = FeedEntry.objects.filter(beyond, owner=owner).delete()
+    return deleted
+
+
+def _window(queryset, position, descending, limit, pk='id'):
+    sign = '-' if descending else ''
+    if position is not None:
+        queryset = queryset.filter(keyset_filter(position, descending, pk=pk))
+    return queryset.order_by(f'{sign}created_at', f'{sign}{pk}').values_list(pk, flat=True)[:limit]
+
+
+def get_feed_queryset(user, position=None, descending=True, limit=None):
+    """Posts for ``user``'s home feed, newest first.
+
+    Reads the materialized timeline and merges in posts by followed
+    celebrity authors, which are never fanned out.
+
+    With ``limit`` (see ``KeysetPagination.get_window``) only the page is
+    read: up to ``limit`` post ids past ``position`` come from a range scan
+    on FeedEntry(owner, created_at, post), the same number from the
+    celebrity authors' posts, and the posts are loaded by id.
+    """
+    celebrities = celebrity_ids(user)
+    if limit is None:
+        condition = Q(id__in=FeedEntry.objects.filter(owner=user).values('post_id'))
+        if celebrities:
+            condition |= Q(author_id__in=celebrities)
+    else:
+        post_ids = list(_window(
+            FeedEntry.objects.filter(owner=user), position, descending, limit, pk='post_id'
+        ))
+        if celebrities:
+            post_ids += _window(
+                Post.objects.filter(author_id__in=celebrities), position, descending, limit
+            )
+        condition = Q(id__in=post_ids)
+
+    return (
+        Post.objects.filter(condition)
+        .select_related('author')
+        .order_by('-created_at', '-id')
+    )
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.counters import count_subquery
+from notification.models import Notification
+from posts.models import Post, Comment
+from perfkit.conditional import bump_collection
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized like, comment, follow and unread-notification counters in bulk.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only',
+            choices=['posts', 'users'],
+            help='Reconcile only post counters or only user counters.'
+        )
+
+    def handle(self, *args, **options):
+        only = options.get('only')
+        with transaction.atomic():
+            if only in (None, 'posts'):
+                self.reconcile_posts()
+            if only in (None, 'users'):
+                self.reconcile_users()
+
+    def reconcile_posts(self):
+        likes = Post.likes.through.objects.all()
+        drifted = Post.objects.exclude(
+            like_count=count_subquery(likes, 'post')
+        ).count() + Post.objects.exclude(
+            comment_count=count_subquery(Comment.objects.all(), 'post')
+        ).count()
+        updated = Post.objects.update(
+            like_count=count_subquery(likes, 'post'),
+            comment_count=count_subquery(Comment.objects.all(), 'post'),
+        )
+        bump_collection(Post)
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled {updated} posts ({drifted} drifted counters).'
+        ))
+
+    def reconcile_users(self):
+        follows = User.followers.through.objects.all()
+        unread = Notification.objects.filter(is_read=False)
+        drifted = User.objects.exclude(
+            follower_count=count_subquery(follows, 'from_customuser')
+        ).count() + User.objects.exclude(
+            following_count=count_subquery(follows, 'to_customuser')
+        ).count() + User.objects.exclude(
+            unread_notification_count=count_subquery(unread, 'recipient')
+        ).count()
+        updated = User.objects.update(
+            follower_count=count_subquery(follows, 'from_customuser'),
+            following_count=count_subquery(follows, 'to_customuser'),
+            unread_notification_count=count_subquery(unread, 'recipient'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciled {updated} users ({drifted} drifted counters).'
+        ))
@@ -0,0 +1,140 @@
+import random
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.follow_graph import remove_edges
+from accounts.views import BulkFollowView, UserFollowView
+from notification.views import NotificationListView
+from posts.factories import BENCH_PREFIX
+from posts.feed import retract_feed_many
+from posts.models import Post
+from posts.views import FeedAPIView, PostViewSet
+from perfkit.benchmarks import Case, compare_results, run_suite, save_results
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the hot API endpoints against the seeded benchmark data and '
+        'write p50/p95/p99 latencies and query counts to a JSON file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--only', nargs='+', help='Run only these cases.')
+        parser.add_argument(
+            '--output',
+            default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'results'),
+            help='Directory for the JSON results.'
+        )
+        parser.add_argument('--compare', help='Earlier results file to check for regressions.')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95 growth (0.2 = 20%%).')
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username__startswith=BENCH_PREFIX)
+        if not users.exists():
+            raise CommandError('No benchmark data found; run seed_benchmark_data first.')
+
+        cases = self.build_cases(users)
+        results = run_suite(
+            cases,
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            only=options['only'],
+            log=lambda result: self.stdout.write(
+                f"{result['name']:<20} p50={result['p50_ms']}ms p95={result['p95_ms']}ms "
+                f"p99={result['p99_ms']}ms queries={result['queries_median']}"
+            ),
+        )
+        dataset = {
+            'users': users.count(),
+            'posts': Post.objects.filter(author__username__startswith=BENCH_PREFIX).count(),
+        }
+        path = save_results(results, options['output'], dataset)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {path}'))
+
+        if options['compare']:
+            regressions = compare_results(options['compare'], results, options['tolerance'])
+            for line in regressions:
+                self.stdout.write(self.style.WARNING(f'Regression: {line}'))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}.')
+
+    def build_cases(self, users):
+        factory = APIRequestFactory()
+        rng = random.Random(0)
+
+        # Readers with the biggest feeds, plus a random sample of everyone else.
+        heavy = list(users.order_by('-following_count')[:20])
+        sample = list(users.order_by('?')[:80])
+        readers = heavy + sample
+        popular = list(users.order_by('-follower_count')[:200])
+        busy_post = Post.objects.order_by('-comment_count').first()
+
+        def get(path, user, **params):
+            request = factory.get(path, params)
+            force_authenticate(request, user=user)
+            return request
+
+        feed_view = FeedAPIView.as_view()
+        feed_cursors = {}
+        for reader in heavy:
+            response = feed_view(get('/api/feed/', reader))
+            next_link = response.data.get('next') if response.status_code == 200 else None
+            if next_link:
+                feed_cursors[reader.pk] = parse_qs(urlparse(next_link).query)['cursor'][0]
+        deep_readers = [reader for reader in heavy if reader.pk in feed_cursors] or heavy
+
+        def feed_page_2(i):
+            reader = deep_readers[i % len(deep_readers)]
+            params = {'cursor': feed_cursors[reader.pk]} if reader.pk in feed_cursors else {}
+            return get('/api/feed/', reader, **params), {}
+
+        def follow_target(i):
+            return popular[i % len(popular)]
+
+        def undo_follow(user, target_ids):
+            remove_edges({(user.id, pk) for pk in target_ids})
+            retract_feed_many(user, target_ids)
+
+        follower = sample[0]
+        cases = [
+            Case('feed', feed_view,
+                 lambda i: (get('/api/feed/', readers[i % len(readers)]), {})),
+            Case('feed-page-2', feed_view, feed_page_2),
+            Case('post-list', PostViewSet.as_view({'get': 'list'}),
+                 lambda i: (get('/api/posts/', readers[i % len(readers)]), {})),
+            Case('post-list-popular', PostViewSet.as_view({'get': 'list'}),
+                 lambda i: (get('/api/posts/', readers[i % len(readers)], ordering='-like_count'), {})),
+            Case('notifications', NotificationListView.as_view(),
+                 lambda i: (get('/api/notifications/', popular[i % len(popular)]), {})),
+            Case('follow', UserFollowView.as_view(), self._post_builder(
+                     factory, follower, lambda i: f'/api/auth/follow/{follow_target(i).pk}/',
+                     lambda i: {'action': 'follow'}, kwargs=lambda i: {'user_id': follow_target(i).pk}),
+                 teardown=lambda i, response: response.status_code == 200 and undo_follow(
+                     follower, [follow_target(i).pk])),
+            Case('bulk-follow', BulkFollowView.as_view(), self._post_builder(
+                     factory, follower, lambda i: '/api/auth/follow/bulk/',
+                     lambda i: {'action': 'follow', 'user_ids': [user.pk for user in rng.sample(popular, min(50, len(popular)))]}),
+                 teardown=lambda i, response: undo_follow(
+                     follower, [row['user_id'] for row in response.data['results'] if row['status'] == 'followed'])),
+        ]
+        if busy_post is not None:
+            cases.append(Case('post-comments', PostViewSet.as_view({'get': 'comments'}),
+                              lambda i: (get(f'/api/posts/{busy_post.pk}/comments/', readers[i % len(readers)]),
+                                         {'pk': busy_post.pk})))
+        return cases
+
+    def _post_builder(self, factory, user, path, data, kwargs=None):
+        def build(i):
+            request = factory.post(path(i), data(i), format='json')
+            force_authenticate(request, user=user)
+            return request, (kwargs(i) if kwargs else {})
+        return build
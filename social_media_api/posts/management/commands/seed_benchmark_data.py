@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from posts import factories
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a synthetic social graph for benchmarks: users, a power-law '
+        'follow graph, posts, likes and comments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(factories.SCALES), default='small')
+        parser.add_argument('--users', type=int, help='Override the number of users for the scale.')
+        parser.add_argument('--avg-following', type=int)
+        parser.add_argument('--posts', type=int)
+        parser.add_argument('--likes', type=int)
+        parser.add_argument('--comments', type=int)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--no-feeds', action='store_true', help='Skip building materialized feeds.')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated data first.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted, _ = factories.clear()
+            self.stdout.write(f'Deleted {deleted} rows of earlier benchmark data.')
+
+        params = factories.seed(
+            scale=options['scale'],
+            seed=options['seed'],
+            feeds=not options['no_feeds'],
+            log=self.stdout.write,
+            users=options['users'],
+            avg_following=options['avg_following'],
+            posts=options['posts'],
+            likes=options['likes'],
+            comments=options['comments'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Seeded: ' + ', '.join(f'{key}={value}' for key, value in params.items())
+        ))
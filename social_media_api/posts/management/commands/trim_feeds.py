@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts.feed import FEED_MAX_DEPTH, trim_feed
+from posts.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Trim every materialized home feed to the configured depth.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--depth',
+            type=int,
+            default=FEED_MAX_DEPTH,
+            help='Number of entries to keep per feed (default: FEED_MAX_DEPTH).'
+        )
+
+    def handle(self, *args, **options):
+        owner_ids = (
+            FeedEntry.objects.values_list('owner_id', flat=True)
+            .order_by('owner_id')
+            .distinct()
+        )
+        trimmed = 0
+        for owner_id in owner_ids.iterator():
+            trimmed += trim_feed(owner_id, depth=options['depth'])
+        self.stdout.write(self.style.SUCCESS(f'Trimmed {trimmed} feed entries.'))
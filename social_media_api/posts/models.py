@@ -1,10 +1,12 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from accounts.counters import CounterFieldsMixin
+
 User = get_user_model()
 
 
-class Post(models.Model):
+class Post(CounterFieldsMixin, models.Model):
     """Post model for user created content."""
     author = models.ForeignKey(
         User,
@@ -20,21 +22,24 @@ class Post(models.Model):
         related_name='liked_posts',
         blank=True
     )
+    # Denormalized counters, kept in sync by posts.signals with F() updates
+    # and repaired by the reconcile_counters management command. save() on an
+    # existing post leaves them alone (see accounts.counters.CounterFieldsMixin).
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    counter_fields = ('like_count', 'comment_count')
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Serves merge-on-read of celebrity authors into the home feed.
+            models.Index(fields=['author', '-created_at']),
+            models.Index(fields=['-like_count']),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.author.username}"
 
-    @property
-    def like_count(self):
-        return self.likes.count()
-
-    @property
-    def comment_count(self):
-        return self.comments.count()
-
 
 class Comment(models.Model):
     """Comment model for user comments on posts."""
@@ -57,3 +62,39 @@ class Comment(models.Model):
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.post.title}"
+
+
+class FeedEntry(models.Model):
+    """Materialized home-feed row: one post delivered to one follower."""
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    # Denormalized from the post so unfollows can retract by author and
+    # reads can range-scan (owner, created_at) without touching posts.
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at', '-post_id']
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'post'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            # Keyset reads: (owner, created_at, post) matches the feed cursor.
+            models.Index(fields=['owner', '-created_at', '-post']),
+            models.Index(fields=['owner', 'author']),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in feed of user {self.owner_id}"
@@ -0,0 +1,176 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def keyset_filter(position, descending, created='created_at', pk='id'):
+    """Rows strictly past ``position`` (a ``(created_at, id)`` pair) in scan order."""
+    created_at, row_id = position
+    lookup = 'lt' if descending else 'gt'
+    return (
+        Q(**{f'{created}__{lookup}': created_at}) |
+        Q(**{created: created_at, f'{pk}__{lookup}': row_id})
+    )
+
+
+class CustomPagination(PageNumberPagination):
+    """Page-number pagination for endpoints that need a total count."""
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on (created_at, id).
+
+    Each page is fetched with a ``WHERE (created_at, id) < (cursor)`` range
+    condition instead of an OFFSET, and no COUNT query is issued, so page
+    10,000 costs the same as page 1. Cursors are opaque and stay valid while
+    new rows are inserted ahead of them.
+
+    The direction follows the queryset's ordering on ``created_at``. Any
+    other ordering (e.g. ``?ordering=like_count``) falls back to
+    ``CustomPagination`` so existing filters keep working.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    fallback_class = CustomPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+
+        descending = self.get_direction(queryset)
+        if descending is None:
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+
+        # Walking backwards flips the scan direction; results are re-reversed below.
+        scan_descending = descending != reverse
+        sign = '-' if scan_descending else ''
+        queryset = queryset.order_by(f'{sign}created_at', f'{sign}id')
+
+        if cursor:
+            queryset = queryset.filter(
+                keyset_filter((cursor['created_at'], cursor['id']), scan_descending)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.page = results
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        return results
+
+    def get_window(self, request):
+        """
+        Describe the next page of a ``-created_at`` queryset before building it.
+
+        Returns ``(position, descending, limit)``: the cursor position (or
+        None), the scan direction and the number of rows the page reads.
+        Views whose rows come from several sources can fetch ``limit`` rows
+        past ``position`` from each and paginate the merged result.
+        """
+        cursor = self.decode_cursor(request)
+        limit = self.get_page_size(request) + 1
+        if cursor is None:
+            return None, True, limit
+        return (cursor['created_at'], cursor['id']), not cursor['reverse'], limit
+
+    def get_direction(self, queryset):
+        """Return True/False for -created_at/created_at ordering, None otherwise."""
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        if not ordering:
+            return None
+        primary = ordering[0]
+        if primary == '-created_at':
+            return True
+        if primary == 'created_at':
+            return False
+        return None
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            return {
+                'created_at': datetime.fromisoformat(payload['t']),
+                'id': int(payload['i']),
+                'reverse': bool(payload.get('r')),
+            }
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse=False):
+        payload = {'t': obj.created_at.isoformat(), 'i': obj.pk}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,46 @@
+"""
+Queryset builder for post reads.
+
+Every path that serializes posts (post list and detail, the feed action
+and FeedAPIView) goes through ``post_queryset``. The result is one query
+per page:
+
+- authors are joined with ``select_related``;
+- ``like_count`` and ``comment_count`` are stored columns (see
+  ``accounts.counters``), so they are read and sorted in SQL;
+- ``liked_by_me`` is an ``EXISTS`` subquery for the requesting user.
+
+``fields`` narrows the work to what the client asked for: the author
+join and the ``liked_by_me`` subquery are skipped when not requested.
+Column narrowing is left to ``perfkit.sparse_fields``.
+"""
+from django.db.models import BooleanField, Exists, OuterRef, Value
+
+from .models import Post
+
+Like = Post.likes.through
+
+
+def liked_by(user):
+    """Annotation: whether ``user`` likes each post."""
+    if user is None or not user.is_authenticated:
+        return Value(False, output_field=BooleanField())
+    return Exists(Like.objects.filter(post_id=OuterRef('pk'), customuser_id=user.pk))
+
+
+def post_queryset(user=None, fields=None, base=None):
+    """
+    Posts ready for ``PostSerializer``.
+
+    ``base`` is the queryset to build on (default ``Post.objects.all()``),
+    e.g. a feed. ``fields`` is the set of serializer fields the client
+    wants, or None for all of them.
+    """
+    queryset = Post.objects.all() if base is None else base
+    wanted = (lambda name: True) if fields is None else (lambda name: name in fields)
+
+    if wanted('author'):
+        queryset = queryset.select_related('author')
+    if wanted('liked_by_me'):
+        queryset = queryset.annotate(liked_by_me=liked_by(user))
+    return queryset
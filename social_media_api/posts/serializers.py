@@ -0,0 +1,59 @@
+from rest_framework import serializers
+
+from perfkit.sparse_fields import SparseFieldsetMixin
+from .models import Post, Comment
+
+AUTHOR_EXPANSION = (
+    'accounts.serializers.UserProfileSerializer',
+    {'fields': 'id,username,first_name,last_name,profile_picture'},
+)
+
+
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Serializer for comments on a post."""
+    author = serializers.ReadOnlyField(source='author.username')
+
+    class Meta:
+        model = Comment
+        fields = ['id', 'post', 'author', 'content', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'author', 'created_at', 'updated_at']
+        expandable_fields = {'author': AUTHOR_EXPANSION}
+
+
+class PostSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Serializer for reading posts; counters come from the stored columns.
+
+    Expects querysets from ``posts.querysets.post_queryset``, which
+    annotates ``liked_by_me``. Supports sparse fieldsets and
+    ``?expand=author``.
+    """
+    author = serializers.ReadOnlyField(source='author.username')
+    liked_by_me = serializers.BooleanField(read_only=True, default=False)
+
+    class Meta:
+        model = Post
+        fields = [
+            'id', 'author', 'title', 'content',
+            'like_count', 'comment_count', 'liked_by_me',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'author', 'like_count', 'comment_count',
+            'created_at', 'updated_at'
+        ]
+        expandable_fields = {'author': AUTHOR_EXPANSION}
+
+
+class PostCreateSerializer(serializers.ModelSerializer):
+    """Serializer for creating posts."""
+
+    class Meta:
+        model = Post
+        fields = ['id', 'title', 'content']
+        read_only_fields = ['id']
+
+
+class LikeSerializer(serializers.Serializer):
+    """Serializer for the like/unlike action."""
+    action = serializers.ChoiceField(choices=['like', 'unlike'])
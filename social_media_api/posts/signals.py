@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.counters import adjust_counter, changed_ids
+from notification.pipeline import notify, notify_mentions
+from perfkit.conditional import bump_collection, track_collection
+from .models import Post, Comment
+from .feed import announce_post, fan_out_post
+
+COUNTER_ACTIONS = {'post_add': 1, 'pre_remove': -1, 'pre_clear': -1}
+# Author columns shown with every post; a change to any of them changes post lists.
+AUTHOR_FIELDS = frozenset({'username', 'first_name', 'last_name', 'profile_picture'})
+
+# Post lists are versioned by write stamps (see perfkit.conditional).
+# Counter updates skip post_save, so the receivers below bump the stamp themselves.
+track_collection(Post)
+
+
+@receiver(post_save, sender=get_user_model())
+def bump_posts_on_author_change(sender, instance, created, update_fields, **kwargs):
+    """Profile edits change the posts that show them; logins and counters do not."""
+    if created or (update_fields is not None and not AUTHOR_FIELDS & update_fields):
+        return
+    bump_collection(Post)
+
+
+@receiver(post_save, sender=Post)
+def deliver_post_to_feeds(sender, instance, created, **kwargs):
+    """Fan a newly created post out to its author's followers once committed."""
+    if created:
+        transaction.on_commit(lambda: fan_out_post(instance))
+        transaction.on_commit(lambda: announce_post(instance))
+        notify_mentions(instance.content, instance.author_id, 'mentioned you in a post', target=instance)
+
+
+@receiver(m2m_changed, sender=Post.likes.through)
+def update_like_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep Post.like_count in sync with the likes relation."""
+    delta = COUNTER_ACTIONS.get(action)
+    if delta is None:
+        return
+
+    if reverse:
+        # user.liked_posts.add(...): every affected post gains one like.
+        ids = changed_ids(sender, action, 'customuser', 'post', instance, pk_set)
+        adjust_counter(Post, ids, 'like_count', delta)
+        bump_collection(Post)
+        if action == 'post_add':
+            for post in Post.objects.filter(pk__in=ids).only('id', 'author_id'):
+                notify(post.author_id, instance.pk, 'liked your post', 'like', target=post)
+    else:
+        ids = changed_ids(sender, action, 'post', 'customuser', instance, pk_set)
+        adjust_counter(Post, [instance.pk], 'like_count', delta * len(ids))
+        bump_collection(Post)
+        if action == 'post_add':
+            for user_id in ids:
+                notify(instance.author_id, user_id, 'liked your post', 'like', target=instance)
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(Post, [instance.post_id], 'comment_count', 1)
+        bump_collection(Post)
+        notify(instance.post.author_id, instance.author_id, 'commented on your post', 'comment', target=instance.post)
+        notify_mentions(instance.content, instance.author_id, 'mentioned you in a comment', target=instance)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    adjust_counter(Post, [instance.post_id], 'comment_count', -1)
+    bump_collection(Post)
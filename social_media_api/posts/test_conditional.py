@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from .models import Post
+from .views import PostViewSet
+
+User = get_user_model()
+
+
+class PostConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.post = Post.objects.create(author=self.author, title='Post', content='Body')
+
+    def get(self, action='list', **headers):
+        request = APIRequestFactory().get('/posts/', **headers)
+        kwargs = {'pk': self.post.pk} if action == 'retrieve' else {}
+        return PostViewSet.as_view({'get': action})(request, **kwargs)
+
+    def list_etag(self):
+        response = self.get()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response['ETag']
+
+    def not_modified(self, etag):
+        return self.get(HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_unchanged_list_is_not_modified(self):
+        self.assertTrue(self.not_modified(self.list_etag()))
+
+    def test_logins_and_other_users_keep_the_list_etag(self):
+        etag = self.list_etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.last_login = timezone.now()
+            self.author.save(update_fields=['last_login'])
+            User.objects.create_user(username='newcomer', password='password123')
+        self.assertTrue(self.not_modified(etag))
+
+    def test_author_profile_edit_changes_the_list_etag(self):
+        etag = self.list_etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.first_name = 'Ada'
+            self.author.save()
+        self.assertFalse(self.not_modified(etag))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_skips_stamps(self):
+        self.assertFalse(self.get().has_header('ETag'))
+        response = self.get('retrieve')
+        self.assertTrue(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from .models import Comment, Post
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.fan = User.objects.create_user(username='fan', password='password123')
+        self.post = Post.objects.create(author=self.author, title='Post', content='Body')
+
+    def test_signals_keep_counters_in_sync(self):
+        self.post.likes.add(self.fan)
+        Comment.objects.create(post=self.post, author=self.fan, content='Nice')
+        self.author.followers.add(self.fan)
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+        self.author.refresh_from_db()
+        self.fan.refresh_from_db()
+        self.assertEqual(self.author.follower_count, 1)
+        self.assertEqual(self.fan.following_count, 1)
+
+        self.post.likes.remove(self.fan)
+        self.post.comments.all().delete()
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (0, 0))
+
+    def test_save_does_not_write_stale_counters(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        self.post.likes.add(self.fan)
+        stale.title = 'Edited'
+        stale.save()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.title, 'Edited')
+        self.assertEqual(self.post.like_count, 1)
+
+        stale_user = User.objects.get(pk=self.author.pk)
+        self.author.followers.add(self.fan)
+        stale_user.bio = 'Hello'
+        stale_user.save()
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.bio, 'Hello')
+        self.assertEqual(self.author.follower_count, 1)
+
+    def test_reconcile_repairs_drift(self):
+        self.post.likes.add(self.fan)
+        self.author.followers.add(self.fan)
+        Post.objects.update(like_count=7, comment_count=3)
+        User.objects.update(follower_count=5, following_count=5)
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 0))
+        self.author.refresh_from_db()
+        self.fan.refresh_from_db()
+        self.assertEqual((self.author.follower_count, self.author.following_count), (1, 0))
+        self.assertEqual((self.fan.follower_count, self.fan.following_count), (0, 1))
+        self.assertIn('drifted', out.getvalue())
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.follow_graph import bulk_follow
+from .feed import fan_out_post, fan_out_queue, get_feed_queryset, trim_feed
+from .models import FeedEntry, Post
+
+User = get_user_model()
+
+
+class FeedTests(TestCase):
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.stranger = User.objects.create_user(username='stranger', password='password123')
+        bulk_follow(self.reader, [self.author.id])
+
+    def publish(self, author, title='Post'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(author=author, title=title, content='Body')
+
+    def feed_ids(self, **window):
+        return list(get_feed_queryset(self.reader, **window).values_list('id', flat=True))
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        post = self.publish(self.author)
+        self.assertTrue(FeedEntry.objects.filter(owner=self.reader, post=post).exists())
+        self.assertFalse(FeedEntry.objects.filter(owner=self.stranger).exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_posts_by_unfollowed_authors_stay_out(self):
+        self.publish(self.stranger)
+        self.assertEqual(self.feed_ids(), [])
+
+    def test_unfollow_retracts_feed_entries(self):
+        self.publish(self.author)
+        bulk_follow(self.reader, [self.author.id], action='unfollow')
+        self.assertFalse(FeedEntry.objects.filter(owner=self.reader).exists())
+        self.assertEqual(self.feed_ids(), [])
+
+    def test_follow_backfills_recent_posts(self):
+        post = self.publish(self.stranger)
+        bulk_follow(self.reader, [self.stranger.id])
+        self.assertIn(post.id, self.feed_ids())
+
+    def test_fan_out_past_the_inline_limit_is_left_to_the_worker(self):
+        fans = [User.objects.create_user(username=f'fan{n}', password='password123') for n in range(3)]
+        for fan in fans:
+            bulk_follow(fan, [self.author.id])
+        with mock.patch('posts.feed.FEED_FANOUT_INLINE_LIMIT', 2), \
+                mock.patch('posts.feed.FEED_FANOUT_ASYNC', True), \
+                mock.patch.object(fan_out_queue, '_ensure_worker'):
+            post = self.publish(self.author)
+            self.assertEqual(FeedEntry.objects.filter(post=post).count(), 2)
+            self.assertEqual(fan_out_queue.flush(), 1)
+        self.assertEqual(
+            set(FeedEntry.objects.filter(post=post).values_list('owner_id', flat=True)),
+            {self.reader.id} | {fan.id for fan in fans},
+        )
+
+    def test_celebrity_posts_are_merged_on_read(self):
+        self.author.refresh_from_db()
+        with mock.patch('posts.feed.FEED_CELEBRITY_THRESHOLD', 1):
+            post = self.publish(self.author)
+            self.assertEqual(fan_out_post(post), 0)
+            self.assertFalse(FeedEntry.objects.filter(owner=self.reader).exists())
+            self.assertEqual(self.feed_ids(), [post.id])
+            self.assertEqual(self.feed_ids(limit=5), [post.id])
+
+    def test_window_reads_one_page_past_the_cursor(self):
+        posts = [self.publish(self.author, title=f'Post {n}') for n in range(5)]
+        newest_first = sorted(posts, key=lambda post: (post.created_at, post.id), reverse=True)
+        self.assertEqual(self.feed_ids(), [post.id for post in newest_first])
+
+        self.assertEqual(self.feed_ids(limit=2), [post.id for post in newest_first[:2]])
+        cursor = newest_first[1]
+        self.assertEqual(
+            self.feed_ids(position=(cursor.created_at, cursor.id), limit=2),
+            [post.id for post in newest_first[2:4]],
+        )
+        self.assertEqual(
+            self.feed_ids(position=(cursor.created_at, cursor.id), descending=False, limit=2),
+            [newest_first[0].id],
+        )
+
+    def test_trim_keeps_the_newest_entries(self):
+        now = timezone.now()
+        for n in range(4):
+            post = Post.objects.create(author=self.stranger, title=f'Old {n}', content='Body')
+            FeedEntry.objects.create(
+                owner=self.reader, post=post, author=self.stranger,
+                created_at=now - timedelta(minutes=n),
+            )
+        self.assertEqual(trim_feed(self.reader, depth=2), 2)
+        self.assertEqual(FeedEntry.objects.filter(owner=self.reader).count(), 2)
+
+    def test_trim_keeps_entries_sharing_the_cutoff_timestamp(self):
+        now = timezone.now()
+        posts = [Post.objects.create(author=self.stranger, title=f'Same {n}', content='Body') for n in range(4)]
+        for post in posts:
+            FeedEntry.objects.create(owner=self.reader, post=post, author=self.stranger, created_at=now)
+        self.assertEqual(trim_feed(self.reader, depth=3), 1)
+        self.assertEqual(
+            sorted(FeedEntry.objects.filter(owner=self.reader).values_list('post_id', flat=True)),
+            sorted(post.id for post in posts)[1:],
+        )
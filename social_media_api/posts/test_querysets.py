@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from .models import Post
+from .querysets import post_queryset
+from .views import PostViewSet
+
+User = get_user_model()
+
+
+class PostQuerysetTests(APITestCase):
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        self.author = User.objects.create_user(username='author', password='password123')
+        self.liked = Post.objects.create(author=self.author, title='Liked', content='Body')
+        self.other = Post.objects.create(author=self.author, title='Other', content='Body')
+        self.liked.likes.add(self.reader)
+
+    def liked_by_me(self, user):
+        return {post.title: post.liked_by_me for post in post_queryset(user)}
+
+    def list_posts(self, **params):
+        request = APIRequestFactory().get('/posts/', params)
+        force_authenticate(request, self.reader)
+        response = PostViewSet.as_view({'get': 'list'})(request)
+        return {post['id']: post for post in response.data['results']}
+
+    def test_liked_by_me_is_per_user(self):
+        self.assertEqual(self.liked_by_me(self.reader), {'Liked': True, 'Other': False})
+        self.assertEqual(self.liked_by_me(self.author), {'Liked': False, 'Other': False})
+        self.assertEqual(self.liked_by_me(AnonymousUser()), {'Liked': False, 'Other': False})
+
+    def test_page_is_one_query_with_authors(self):
+        with self.assertNumQueries(1):
+            rows = [(post.author.username, post.liked_by_me) for post in post_queryset(self.reader)]
+        self.assertEqual(len(rows), 2)
+
+    def test_fields_skip_unrequested_work(self):
+        queryset = post_queryset(self.reader, fields={'id', 'title'})
+        self.assertFalse(queryset.query.select_related)
+        self.assertNotIn('liked_by_me', queryset.query.annotations)
+
+        queryset = post_queryset(self.reader, fields={'id', 'liked_by_me'})
+        self.assertFalse(queryset.query.select_related)
+        self.assertIn('liked_by_me', queryset.query.annotations)
+
+    def test_base_queryset_is_kept(self):
+        base = Post.objects.filter(title='Other')
+        self.assertEqual([post.pk for post in post_queryset(self.reader, base=base)], [self.other.pk])
+
+    def test_list_serializes_annotations(self):
+        posts = self.list_posts()
+        self.assertTrue(posts[self.liked.pk]['liked_by_me'])
+        self.assertFalse(posts[self.other.pk]['liked_by_me'])
+        self.assertEqual(posts[self.liked.pk]['author'], 'author')
+
+    def test_list_with_fields_omits_the_rest(self):
+        posts = self.list_posts(fields='id,title')
+        self.assertEqual(posts[self.liked.pk], {'id': self.liked.pk, 'title': 'Liked'})
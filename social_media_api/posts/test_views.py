@@ -0,0 +1,106 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from accounts.follow_graph import bulk_follow
+from perfkit.instrumentation import QueryBudgetTestMixin, metrics_view, query_budget
+from .models import Comment, Post
+from .views import PostViewSet
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF='posts.urls', QUERY_BUDGETS_ENFORCE=True)
+class QueryBudgetTests(QueryBudgetTestMixin, APITestCase):
+
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader', password='password123')
+        self.authors = [
+            User.objects.create_user(username=f'author{n}', password='password123') for n in range(3)
+        ]
+        bulk_follow(self.reader, [author.id for author in self.authors])
+        self.add_posts(2)
+
+    def add_posts(self, per_author):
+        for author in self.authors:
+            for n in range(per_author):
+                with self.captureOnCommitCallbacks(execute=True):
+                    post = Post.objects.create(author=author, title=f'Post {n}', content='Body')
+                post.likes.add(self.reader)
+                Comment.objects.create(post=post, author=self.reader, content='Nice')
+
+    def get_feed(self, **params):
+        self.client.force_authenticate(self.reader)
+        with self.assertMaxQueries(query_budget('FeedAPIView')) as recorder:
+            response = self.client.get(reverse('feed'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, recorder.count
+
+    def list_posts(self, **params):
+        request = APIRequestFactory().get('/posts/', params)
+        force_authenticate(request, self.reader)
+        view = PostViewSet.as_view({'get': 'list'})
+        with self.assertMaxQueries(query_budget('post-list')) as recorder:
+            response = view(request)
+            response.render()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, recorder.count
+
+    def test_feed_stays_within_budget(self):
+        response, _ = self.get_feed()
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertTrue(all(post['liked_by_me'] for post in response.data['results']))
+
+    def test_feed_queries_do_not_grow_with_rows(self):
+        _, before = self.get_feed()
+        self.add_posts(5)
+        _, after = self.get_feed(page_size=20)
+        self.assertEqual(before, after)
+
+    def test_feed_next_page_stays_within_budget(self):
+        response, _ = self.get_feed(page_size=4)
+        self.client.force_authenticate(self.reader)
+        with self.assertMaxQueries(query_budget('FeedAPIView')):
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_post_list_stays_within_budget(self):
+        response, _ = self.list_posts()
+        self.assertEqual(len(response.data['results']), 6)
+
+    def test_post_list_queries_do_not_grow_with_rows(self):
+        _, before = self.list_posts()
+        self.add_posts(5)
+        _, after = self.list_posts(page_size=30)
+        self.assertEqual(before, after)
+
+
+@mock.patch('perfkit.instrumentation.METRICS_TOKEN', 'scrape-secret')
+class MetricsViewTests(TestCase):
+
+    def get_metrics(self, user=None, **headers):
+        request = RequestFactory().get('/metrics/', REMOTE_ADDR='127.0.0.1', **headers)
+        request.user = user or AnonymousUser()
+        return metrics_view(request).status_code
+
+    def test_staff_can_read_metrics(self):
+        staff = User.objects.create_user(username='staff', password='password123', is_staff=True)
+        self.assertEqual(self.get_metrics(staff), status.HTTP_200_OK)
+
+    def test_scraper_needs_the_bearer_token(self):
+        self.assertEqual(self.get_metrics(HTTP_AUTHORIZATION='Bearer scrape-secret'), status.HTTP_200_OK)
+        self.assertEqual(self.get_metrics(HTTP_AUTHORIZATION='Bearer wrong'), status.HTTP_403_FORBIDDEN)
+
+    def test_local_address_alone_is_forbidden(self):
+        user = User.objects.create_user(username='user', password='password123')
+        self.assertEqual(self.get_metrics(), status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.get_metrics(user), status.HTTP_403_FORBIDDEN)
+
+    @mock.patch('perfkit.instrumentation.METRICS_TOKEN', '')
+    def test_empty_token_setting_disables_token_access(self):
+        self.assertEqual(self.get_metrics(HTTP_AUTHORIZATION='Bearer '), status.HTTP_403_FORBIDDEN)
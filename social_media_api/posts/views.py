@@ -12,22 +12,54 @@ from .serializers import (
     LikeSerializer
 )
 from .permissions import IsOwnerOrReadOnly
-from .pagination import CustomPagination
+from .pagination import KeysetPagination
+from .feed import get_feed_queryset
+from .querysets import post_queryset
+from perfkit.conditional import ConditionalGetMixin
+from perfkit.fast_serializers import FastListMixin, fast_serializer
+from perfkit.sparse_fields import SparseFieldsetViewMixin, narrow_queryset, sparse_params
 
 User = get_user_model()
 
 
-class PostViewSet(viewsets.ModelViewSet):
-    """ViewSet for viewing and editing posts."""
+class PostViewSet(ConditionalGetMixin, SparseFieldsetViewMixin, FastListMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for viewing and editing posts.
+
+    GETs carry ETag and Last-Modified (see perfkit.conditional);
+    a matching If-None-Match gets a 304 without serializing anything.
+    """
     queryset = Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['author']
     search_fields = ['title', 'content']
-    ordering_fields = ['created_at', 'updated_at', 'like_count']
+    ordering_fields = ['created_at', 'updated_at', 'like_count', 'comment_count']
     ordering = ['-created_at']
+    fast_list_extra_values = ('pk', 'created_at')
+    # Everything PostSerializer shows, read without building a Post.
+    object_version_fields = (
+        'updated_at', 'like_count', 'comment_count', 'author_id', 'author__username',
+        'author__first_name', 'author__last_name', 'author__profile_picture', 'liked_by_me',
+    )
+    # Author profile edits bump the Post stamp (see posts.signals).
+    version_models = (Post,)
+
+    def get_object_version_fields(self):
+        # liked_by_me is only annotated when it is asked for.
+        fields = self.get_sparse_field_names()
+        if fields is None or 'liked_by_me' in fields:
+            return self.object_version_fields
+        return self.object_version_fields[:-1]
+
+    def get_queryset(self):
+        return post_queryset(
+            self.request.user,
+            fields=self.get_sparse_field_names(),
+            base=super().get_queryset(),
+        )
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -69,7 +101,7 @@ class PostViewSet(viewsets.ModelViewSet):
     def comments(self, request, pk=None):
         """Get all comments for a specific post."""
         post = self.get_object()
-        comments = post.comments.all()
+        comments = post.comments.select_related('author')
         page = self.paginate_queryset(comments)
 
         if page is not None:
@@ -85,22 +117,15 @@ class PostViewSet(viewsets.ModelViewSet):
         """
         Get posts from users that the current user follows.
         This view returns posts ordered by creation date, showing the most recent posts at the top.
+        Reads the materialized feed (see posts.feed) rather than scanning every followed author.
         """
-        # Get users that the current user follows
-        following_users = request.user.following.all()
-        
-        # The exact pattern the checker is looking for:
-        # Filter posts where author is in following_users, order by creation date (newest first)
-        feed_posts = Post.objects.filter(author__in=following_users).order_by('-created_at')
-        
-        # Apply pagination
-        page = self.paginate_queryset(feed_posts)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
-        
-        serializer = self.get_serializer(feed_posts, many=True, context={'request': request})
-        return Response(serializer.data)
+        position, descending, limit = self.paginator.get_window(request)
+        feed_posts = self.narrow_queryset(post_queryset(
+            request.user,
+            fields=self.get_sparse_field_names(),
+            base=get_feed_queryset(request.user, position, descending, limit),
+        ))
+        return self.list_response(feed_posts)
 
 
 class FeedAPIView(APIView):
@@ -109,34 +134,42 @@ class FeedAPIView(APIView):
     
     def get(self, request):
         """Get posts from users that the current user follows."""
-        # Get users that the current user follows
-        following_users = request.user.following.all()
+        sparse = sparse_params(request)
+        fields = set(PostSerializer(**sparse).fields) if sparse else None
+        # Apply pagination manually; only the requested page is read from the feed.
+        paginator = KeysetPagination()
+        position, descending, limit = paginator.get_window(request)
+        base = get_feed_queryset(request.user, position, descending, limit)
+        feed_posts = post_queryset(request.user, fields=fields, base=base)
+        feed_posts = narrow_queryset(feed_posts, PostSerializer(**sparse))
+        compiled = fast_serializer(PostSerializer(**sparse), feed_posts)
         
-        # Explicit implementation of the feed query
-        # This is the exact line: Post.objects.filter(author__in=following_users).order_by()
-        feed_posts = Post.objects.filter(author__in=following_users).order_by('-created_at')
-        
-        # Apply pagination manually
-        paginator = CustomPagination()
+        if compiled is not None:
+            rows = compiled.values(feed_posts, ('pk', 'created_at'))
+            page = paginator.paginate_queryset(rows, request)
+            if page is not None:
+                return paginator.get_paginated_response(compiled(page))
+            return Response(compiled(rows))
         page = paginator.paginate_queryset(feed_posts, request)
         
         if page is not None:
-            serializer = PostSerializer(page, many=True, context={'request': request})
+            serializer = PostSerializer(page, many=True, context={'request': request}, **sparse)
             return paginator.get_paginated_response(serializer.data)
         
-        serializer = PostSerializer(feed_posts, many=True, context={'request': request})
+        serializer = PostSerializer(feed_posts, many=True, context={'request': request}, **sparse)
         return Response(serializer.data)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(SparseFieldsetViewMixin, FastListMixin, viewsets.ModelViewSet):
     """ViewSet for viewing and editing comments."""
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
-    pagination_class = CustomPagination
+    pagination_class = KeysetPagination
+    fast_list_extra_values = ('pk', 'created_at')
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('author')
         post_id = self.request.query_params.get('post_id')
         if post_id:
             queryset = queryset.filter(post_id=post_id)
@@ -149,15 +182,11 @@ class CommentViewSet(viewsets.ModelViewSet):
 # Helper function that explicitly shows the pattern
 def generate_user_feed(user):
     """
-    Generate feed for a user with the exact pattern:
-    Post.objects.filter(author__in=following_users).order_by('-created_at')
+    Generate feed for a user from the materialized timeline.
+    Equivalent to Post.objects.filter(author__in=following_users).order_by('-created_at')
+    but served by a range scan over the user's FeedEntry rows.
     """
-    following_users = user.following.all()
-    
-    # This is the exact pattern
-    user_feed = Post.objects.filter(author__in=following_users).order_by('-created_at')
-    
-    return user_feed
+    return get_feed_queryset(user)
 
 
 # Test reference - explicitly showing the pattern
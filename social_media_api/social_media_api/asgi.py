@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_media_api.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after setup: the stream loads models. It serves /api/stream/
+# (live notifications and feed updates) and hands everything else to Django.
+from notification.stream import StreamApplication  # noqa: E402
+
+application = StreamApplication(django_application)
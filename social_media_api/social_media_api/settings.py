@@ -4,12 +4,19 @@ Django settings for social_media_api project.
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 import dj_database_url
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Performance helpers shared by the projects in this repository (lib/perfkit).
+SHARED_LIB_DIR = BASE_DIR.parent / 'lib'
+if str(SHARED_LIB_DIR) not in sys.path:
+    sys.path.append(str(SHARED_LIB_DIR))
+
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = config('SECRET_KEY', default='django-insecure-your-secret-key-here-change-in-production')
 
@@ -37,10 +44,12 @@ INSTALLED_APPS = [
     # Local apps
     'accounts',
     'posts',
+    'notification',
     'notifications',
 ]
 
 MIDDLEWARE = [
+    'perfkit.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For serving static files
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -103,7 +112,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'accounts.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -115,8 +124,16 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'perfkit.fast_serializers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# List endpoints read rows through compiled serializers where they can,
+# see lib/perfkit/fast_serializers.py.
+FAST_LIST_SERIALIZERS = True
+
 # CORS settings - configure properly for production
 if DEBUG:
     CORS_ALLOW_ALL_ORIGINS = True
@@ -169,6 +186,56 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='webmaster@localhost')
 
+# Shared by every process: Redis when REDIS_URL is set, otherwise files,
+# which only processes on the same host share.
+REDIS_URL = config('REDIS_URL', default='')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'social_media_api_cache'),
+    },
+}
+
+# Token authentication cache (see accounts/authentication.py). Every hit
+# checks a revocation stamp in the shared cache, so logouts apply in every
+# process at once; the TTL only bounds how stale follower counts may be.
+TOKEN_AUTH_CACHE_SIZE = 10000
+TOKEN_AUTH_CACHE_TTL = 5
+# Must be shared by every process; None disables the cache.
+TOKEN_AUTH_SHARED_CACHE = 'default'
+
+# Conditional GETs keep per-table write stamps in this cache (see
+# lib/perfkit/conditional.py); it must be shared by every process.
+COLLECTION_VERSION_CACHE = 'default'
+
+# Notification pipeline (see notification/pipeline.py)
+NOTIFICATIONS_ASYNC = True
+NOTIFICATIONS_BATCH_SIZE = 500
+NOTIFICATIONS_MAX_QUEUE_SIZE = 100000
+
+# Live stream (ASGI only, see social_media_api/asgi.py). The in-memory broker
+# only reaches clients connected to the same process.
+NOTIFICATIONS_STREAM_BROKER = 'notification.broker.InMemoryBroker'
+NOTIFICATIONS_STREAM_HEARTBEAT = 15
+NOTIFICATIONS_STREAM_REPLAY_SIZE = 100
+NOTIFICATIONS_STREAM_MAX_PENDING = 500
+
+# Query budgets per URL name or view class, see lib/perfkit/instrumentation.py.
+# Over-budget requests are logged; tests set QUERY_BUDGETS_ENFORCE = True to fail.
+QUERY_BUDGETS = {
+    'FeedAPIView': 5,
+    'post-list': 2,
+    'NotificationListView': 6,
+    'UnreadCountView': 2,
+}
+QUERY_BUDGETS_ENFORCE = False
+QUERY_METRICS_DUPLICATE_THRESHOLD = 3
+# Bearer token for Prometheus scrapes of /metrics/; empty allows staff users only.
+QUERY_METRICS_TOKEN = config('QUERY_METRICS_TOKEN', default='')
+
 # Logging configuration for production
 LOGGING = {
     'version': 1,
@@ -182,6 +249,10 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        # One JSON object per request, see lib/perfkit/instrumentation.py.
+        'query_metrics': {
+            '()': 'perfkit.instrumentation.QueryMetricsFormatter',
+        },
     },
     'handlers': {
         'file': {
@@ -195,6 +266,11 @@ LOGGING = {
             'class': 'logging.StreamHandler',
             'formatter': 'simple',
         },
+        'query_metrics': {
+            'level': 'DEBUG',
+            'class': 'logging.StreamHandler',
+            'formatter': 'query_metrics',
+        },
     },
     'loggers': {
         'django': {
@@ -207,6 +283,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        'perfkit.instrumentation': {
+            'handlers': ['file', 'query_metrics'],
+            'level': 'DEBUG',
+            'propagate': False,
+        },
     },
 }
 
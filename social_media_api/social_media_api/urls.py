@@ -6,6 +6,8 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from perfkit.instrumentation import metrics_view
+
 # Define the main urlpatterns
 urlpatterns = [
     # Admin URLs
@@ -16,6 +18,12 @@ urlpatterns = [
     
     # Posts and Comments URLs - This is what the checker is looking for
     path('api/', include('posts.urls')),
+    
+    # Notification URLs
+    path('api/notifications/', include('notification.urls')),
+
+    # Prometheus metrics (staff or QUERY_METRICS_TOKEN bearer)
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 # Add media serving in development